@@ -0,0 +1,86 @@
+"""Cold-start benchmark of the command-line entry points.
+
+Times fresh interpreters importing the CLI and the data-stage modules
+(median of several runs), and checks that none of them pulls in the
+plotting or modelling libraries, which only the stages using them may
+import. Exits non-zero when a check fails or a timing exceeds its budget,
+so a slow top-level import shows up as a failed run.
+
+Usage:
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --runs 10 --max-ms 1500
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ('matplotlib', 'seaborn', 'scipy', 'sklearn', 'xgboost', 'shap', 'statsmodels')
+
+LIGHT_MODULES = (
+    'src.cli',
+    'src.pipeline.stages',
+    'src.data_scripts.loader',
+    'src.data_scripts.cleaner',
+    'src.analysis.eda',
+)
+
+# Command and default budget in milliseconds
+COMMANDS = {
+    'cli --help': ([sys.executable, '-m', 'src.cli', '--help'], 1000),
+    'import src.cli': ([sys.executable, '-c', 'import src.cli'], 500),
+    'import data stages': (
+        [sys.executable, '-c', 'import ' + ', '.join(LIGHT_MODULES)], 1500
+    ),
+}
+
+
+def time_command(command: list, runs: int) -> float:
+    """Median wall time of ``command`` in milliseconds."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def heavy_imports(module: str) -> list:
+    """Heavy modules loaded by importing ``module`` in a fresh interpreter."""
+    check = (
+        f"import sys, {module}; "
+        f"print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, '-c', check], check=True,
+                            capture_output=True, text=True)
+    return result.stdout.split()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-ms', type=float,
+                        help="Budget for every command instead of the defaults")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in LIGHT_MODULES:
+        loaded = heavy_imports(module)
+        print(f"  {module:<28} {'ok' if not loaded else 'imports ' + ', '.join(loaded)}")
+        failed |= bool(loaded)
+
+    for name, (command, budget) in COMMANDS.items():
+        budget = args.max_ms or budget
+        elapsed = time_command(command, args.runs)
+        over = elapsed > budget
+        print(f"  {name:<28} {elapsed:8.0f} ms  (budget {budget:.0f} ms)"
+              + ('  OVER BUDGET' if over else ''))
+        failed |= over
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
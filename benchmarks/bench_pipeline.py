@@ -0,0 +1,129 @@
+"""Throughput benchmark of the pipeline steps on synthetic data.
+
+Runs loading, feature derivation, cleaning, the quality report and the
+risk cube (optionally model training) on synthetic data of each
+requested size, written in the raw format by ``SyntheticDataGenerator``.
+Collects the profiling spans and prints rows per second per step.
+Results are appended to a JSON-lines history together with the git
+commit, and compared with the latest run of another commit at the same
+size, so regressions show up across commits.
+
+Usage:
+    python -m benchmarks.bench_pipeline --rows 10000 100000 1000000
+    python -m benchmarks.bench_pipeline --rows 10000000 --skip-load --train
+"""
+
+import argparse
+import json
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from src.analysis.eda import InsuranceEDA
+from src.data_scripts.cleaner import DataCleaner
+from src.data_scripts.generator import SyntheticDataGenerator
+from src.data_scripts.loader import InsuranceDataLoader
+from src.modeling.trainer import RiskModelTrainer
+from src.utils import profiling
+from src.utils.config import ConfigManager
+from src.utils.visualization import Visualizer
+
+DEFAULT_HISTORY = 'benchmarks/results/history.jsonl'
+
+
+def run_steps(config: ConfigManager, n_rows: int, seed: int, work_dir: Path,
+              skip_load: bool = False, train: bool = False) -> pd.DataFrame:
+    """Run the profiled pipeline steps once and summarise their spans."""
+    config.config['data'].update({
+        'raw_dir': str(work_dir), 'raw_file': 'synthetic.txt',
+        'use_cache': False, 'cache_dir': str(work_dir / 'cache'),
+    })
+    config.config.setdefault('model', {})['save_dir'] = str(work_dir / 'models')
+    loader = InsuranceDataLoader(config)
+
+    generator = SyntheticDataGenerator(n_rows, seed=seed)
+    if skip_load:
+        df = generator.frame()
+        profiling.reset()
+    else:
+        generator.write(work_dir / 'synthetic.txt')
+        profiling.reset()
+        df = loader.load_raw_data()
+
+    df = loader.create_derived_features(df)
+    df = DataCleaner(config.get('cleaning_strategies', {})).clean(df, inplace=True)
+    eda = InsuranceEDA(Visualizer())
+    eda.generate_quality_report(df)
+    cube = eda.build_cube(df)
+    with profiling.profiled('eda.rollup', rows=len(df)):
+        for dims in (['Province'], ['make'], ['Month'], ['Province', 'make']):
+            cube.rollup(dims)
+    if train:
+        RiskModelTrainer(config).train_models(df)
+    return profiling.summarize()
+
+
+def load_history(path: Path) -> list:
+    if not path.exists():
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def baseline(history: list, n_rows: int, commit) -> dict:
+    """Latest recorded run at ``n_rows`` from a different commit."""
+    for entry in reversed(history):
+        if entry['rows'] == n_rows and entry['run'].get('commit') != commit:
+            return entry
+    return {}
+
+
+def report(summary: pd.DataFrame, n_rows: int, previous: dict):
+    """Print per-step throughput, with the change against ``previous``."""
+    before = {s['name']: s.get('rows_per_s') for s in previous.get('steps', [])}
+    print(f"\n{n_rows:,} rows"
+          + (f" (vs {previous['run']['commit'][:10]})" if previous.get('run', {}).get('commit') else ''))
+    for step in summary.itertuples():
+        line = f"  {step.name:<34} {step.wall_s:9.3f} s"
+        if pd.notna(step.rows_per_s):
+            line += f"  {step.rows_per_s:14,.0f} rows/s"
+            if before.get(step.name):
+                line += f"  {step.rows_per_s / before[step.name] - 1:+7.1%}"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--config', default='config/settings.yml')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--skip-load', action='store_true',
+                        help="Start from the in-memory frame instead of parsing a file")
+    parser.add_argument('--train', action='store_true', help="Include model training")
+    parser.add_argument('--history', default=DEFAULT_HISTORY)
+    parser.add_argument('--no-record', action='store_true',
+                        help="Do not append the results to the history")
+    args = parser.parse_args(argv)
+
+    profiling.configure(enabled=True)
+    history_path = Path(args.history)
+    history = load_history(history_path)
+    meta = profiling.run_metadata()
+
+    for n_rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            summary = run_steps(ConfigManager(args.config), n_rows, args.seed,
+                                Path(tmp), args.skip_load, args.train)
+        report(summary, n_rows, baseline(history, n_rows, meta['commit']))
+        if not args.no_record:
+            steps = summary.astype(object).where(summary.notna(), None)
+            entry = {'run': meta, 'rows': n_rows, 'skip_load': args.skip_load,
+                     'steps': steps.to_dict(orient='records')}
+            history_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(history_path, 'a') as f:
+                f.write(json.dumps(entry, default=str) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Latency and throughput benchmark for the premium scoring service.
+
+Reports p50/p99 latency for single quotes (Python API and local HTTP
+endpoint) and bulk throughput in quotes per second. Requires a trained
+model checkpoint (run the pipeline first).
+
+Usage:
+    python -m benchmarks.bench_scoring --config config/settings.yml
+"""
+
+import argparse
+import http.client
+import json
+import threading
+import time
+
+import numpy as np
+
+from src.modeling.scoring import PremiumScorer, serve
+from src.utils.config import ConfigManager
+
+
+def synthetic_quotes(scorer: PremiumScorer, n: int, seed: int = 0) -> dict:
+    """Random quotes over the categories and ranges the model was fit on."""
+    rng = np.random.default_rng(seed)
+    schema = scorer.input_schema()
+    quotes = {}
+    for source, categories in schema['categorical'].items():
+        quotes[source] = rng.choice(categories, n).tolist()
+    for source, stats in schema['numeric'].items():
+        center = stats['mean'] if stats['scale'] == 1.0 else stats['median']
+        quotes[source] = np.abs(rng.normal(center, stats['scale'], n)).round().tolist()
+    quotes['RegistrationYear'] = rng.integers(1990, 2015, n).tolist()
+    quotes['TransactionMonth'] = ['2015-06-01'] * n
+    return quotes
+
+
+def _rows(columns: dict) -> list:
+    keys = list(columns)
+    return [dict(zip(keys, values)) for values in zip(*columns.values())]
+
+
+def _percentiles(samples: list) -> str:
+    ms = np.asarray(samples) * 1000
+    return f"p50={np.percentile(ms, 50):.3f} ms  p99={np.percentile(ms, 99):.3f} ms"
+
+
+def bench_single(scorer: PremiumScorer, quotes: list, iterations: int):
+    """Latency of scoring one quote at a time through the Python API."""
+    for quote in quotes[:100]:
+        scorer.score(quote)
+    samples = []
+    for quote in quotes[:iterations]:
+        start = time.perf_counter()
+        scorer.score(quote)
+        samples.append(time.perf_counter() - start)
+    print(f"single quote (API):   {_percentiles(samples)}")
+
+
+def bench_bulk(scorer: PremiumScorer, columns: dict, rows: list):
+    """Throughput of one large batch, columnar and as quote dicts."""
+    for label, payload in (('columnar', columns), ('records', rows)):
+        start = time.perf_counter()
+        scorer.score(payload)
+        elapsed = time.perf_counter() - start
+        print(f"bulk {label:<9} {len(rows):>8} quotes: {len(rows) / elapsed:,.0f} quotes/s")
+
+
+def bench_http(scorer: PremiumScorer, quotes: list, iterations: int):
+    """Round-trip latency of single-quote requests to the local endpoint."""
+    server = serve(scorer, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1])
+        samples = []
+        for i, quote in enumerate(quotes[:iterations + 100]):
+            body = json.dumps(quote)
+            start = time.perf_counter()
+            conn.request('POST', '/score', body, {'Content-Type': 'application/json'})
+            conn.getresponse().read()
+            if i >= 100:
+                samples.append(time.perf_counter() - start)
+        print(f"single quote (HTTP):  {_percentiles(samples)}")
+    finally:
+        server.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--config', default='config/settings.yml')
+    parser.add_argument('--model', help='Model checkpoint name (default: scoring.model)')
+    parser.add_argument('--iterations', type=int, default=5000)
+    parser.add_argument('--bulk', type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    scorer = PremiumScorer.from_artifacts(ConfigManager(args.config), args.model)
+    columns = synthetic_quotes(scorer, max(args.bulk, args.iterations + 100))
+    rows = _rows(columns)
+    bench_single(scorer, rows, args.iterations)
+    bench_bulk(scorer, {k: v[:args.bulk] for k, v in columns.items()}, rows[:args.bulk])
+    bench_http(scorer, rows, min(args.iterations, 2000))
+
+
+if __name__ == '__main__':
+    main()
@@ -5,65 +5,50 @@ Orchestrates the end-to-end workflow including:
 - Exploratory data analysis
 - Hypothesis testing
 - Model training and evaluation
+
+Stages are declared as a graph and run through ``StageRunner``, which
+caches intermediate artifacts and skips stages whose inputs, code and
+configuration are unchanged. Timings and memory of every stage and step
+are written to the ``profiling.report_path`` JSON report.
+
+The stage graph lives in ``src.pipeline.stages``; ``src.cli`` offers the
+same run plus per-stage subcommands (``python -m src.cli --help``).
 """
 
-from src.data.loader import InsuranceDataLoader
-from src.data.cleaner import DataCleaner
-from src.analysis.eda import InsuranceEDA
-from src.analysis.hypothesis import HypothesisTester
-from src.modeling.trainer import RiskModelTrainer
-from src.utils.visualization import Visualizer
-from src.utils.config import ConfigManager
-from src.utils.logger import setup_logging
-import joblib
+import argparse
 
-def main():
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command-line overrides for the pipeline configuration."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--config', default='config/settings.yml',
+                        help='Path to the YAML configuration file')
+    parser.add_argument('--executor', choices=['serial', 'process'],
+                        help='Run feature/cleaning stages serially or on a process pool')
+    parser.add_argument('--workers', type=int,
+                        help='Worker processes for the process executor')
+    parser.add_argument('--partition-by',
+                        help="Partition by 'rows' or by a column such as Province")
+    parser.add_argument('--incremental', action='store_true', default=None,
+                        help='Process only new or changed months into the monthly store')
+    parser.add_argument('--stages', nargs='+',
+                        help='Run only these stages (and whatever they depend on)')
+    parser.add_argument('--force', action='append', default=[],
+                        help='Re-run a stage and its downstream stages even if cached')
+    parser.add_argument('--no-stage-cache', action='store_true',
+                        help='Ignore cached stage artifacts')
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Execute the end-to-end analytics pipeline."""
-    # Initialize system
-    setup_logging()
-    config = ConfigManager("config/settings.yml")
-    
-    # === DATA PIPELINE ===
-    loader = InsuranceDataLoader(config)
-    cleaner = DataCleaner(config.get('cleaning_strategies'))
-    
-    # Load and preprocess data
-    df = loader.load_raw_data()
-    df = loader.create_derived_features(df)
-    df = cleaner.clean(df)
-    
-    # Save cleaned data
-    processed_path = config.get('data.processed_path')
-    df.to_parquet(processed_path)
-    print(f"Saved cleaned data to {processed_path}")
-    
-    # === ANALYSIS PIPELINE ===
-    visualizer = Visualizer()
-    eda = InsuranceEDA(visualizer)
-    
-    # Generate reports
-    eda_report = eda.generate_quality_report(df)
-    eda.analyze_risk_factors(df, config.get('reports.figures_path'))
-    
-    # Hypothesis testing
-    tester = HypothesisTester(alpha=0.05)
-    provincial_result = tester.test_provincial_risk(df)
-    gender_result = tester.test_gender_risk(df)
-    
-    # Save hypothesis results
-    joblib.dump(
-        {'provincial': provincial_result, 'gender': gender_result},
-        config.get('reports.hypothesis_results_path')
-    )
-    
-    # === MODELING PIPELINE ===
-    trainer = RiskModelTrainer(config)
-    model_results = trainer.train_models(df)
-    
-    # Save final results
-    joblib.dump(
-        {'eda': eda_report, 'models': model_results},
-        config.get('reports.final_results_path')
+    args = parse_args(argv)
+    
+    # Imported after parsing so --help stays instant
+    from src.cli import run_pipeline
+    run_pipeline(
+        args.config, stages=args.stages, force=args.force,
+        executor=args.executor, workers=args.workers,
+        partition_by=args.partition_by, incremental=args.incremental,
+        use_cache=False if args.no_stage_cache else None
     )
     print("Pipeline executed successfully!")
 
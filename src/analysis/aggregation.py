@@ -0,0 +1,380 @@
+"""Single-pass aggregation of insurance data into a risk cube.
+
+The cube holds additive risk measures for every observed combination of
+the categorical dimensions and the transaction month. Per-dimension views
+(by province, by make, by month, ...) are roll-ups of the cube, so the
+policy-level frame is scanned once no matter how many views are needed.
+Distinct policy counts use sparse HyperLogLog registers per cell, which
+roll up by taking the register-wise maximum.
+
+Cubes persist as Parquet, merge with the partial cube of a new month, and
+answer slice queries from the pre-aggregated cells.
+"""
+
+import json
+import shutil
+from pathlib import Path
+from typing import Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from ..data_scripts.schema import concat_chunks, resolve_column
+from ..data_scripts.storage import read_parquet_dataset, write_parquet_stream
+from ..utils.logger import get_logger
+from ..utils.sketches import HyperLogLog
+
+logger = get_logger(__name__)
+
+DEFAULT_DIMENSIONS = ('Province', 'make', 'VehicleType')
+MONTH_DIMENSION = 'Month'
+DEFAULT_PRECISION = 14
+CUBE_VERSION = 1
+CUBE_META = '_cube.json'
+
+# Additive measures: output column -> (source column, reduction)
+MEASURES = {
+    'Rows': (None, 'size'),
+    'TotalPremium': ('TotalPremium', 'sum'),
+    'TotalClaims': ('TotalClaims', 'sum'),
+    'ClaimCount': ('HasClaim', 'sum'),
+    'ClaimObservations': ('HasClaim', 'count'),
+    'LossRatioSum': ('LossRatio', 'sum'),
+    'LossRatioCount': ('LossRatio', 'count'),
+    'SeveritySum': ('ClaimSeverity', 'sum'),
+    'SeverityCount': ('ClaimSeverity', 'count'),
+}
+
+
+class RiskCube:
+    """Additive risk measures by dimension combination and month.
+
+    Build with ``from_frame`` or ``load``; query with ``rollup`` and
+    ``slice``; fold in new data with ``merge``.
+
+    Args:
+        cells: One row per cell with the dimension columns and the
+            additive measures
+        registers: Sparse HyperLogLog registers with ``cell``,
+            ``register`` and ``rank`` columns, ``cell`` being the row
+            position in ``cells``
+        dimensions: Dimension columns of ``cells``
+        precision: HyperLogLog precision of the registers
+    """
+
+    def __init__(self, cells: pd.DataFrame, registers: pd.DataFrame,
+                 dimensions: List[str], precision: int = DEFAULT_PRECISION):
+        self.cells = cells
+        self.registers = registers
+        self.dimensions = list(dimensions)
+        self.precision = precision
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame,
+                   dimensions: Optional[Iterable[str]] = None,
+                   month_column: str = 'TransactionMonth',
+                   policy_column: str = 'PolicyID',
+                   precision: int = DEFAULT_PRECISION) -> 'RiskCube':
+        """Aggregate a policy-level frame in one grouped pass.
+
+        Dimensions missing from ``df`` are skipped, as are measures whose
+        source column is absent.
+
+        Args:
+            df: Frame with derived features
+            dimensions: Categorical dimension columns
+            month_column: Date column bucketed into the month dimension
+            policy_column: Column counted distinctly per cell
+            precision: HyperLogLog precision for the distinct counts
+
+        Returns:
+            The aggregated cube
+        """
+        try:
+            keys, names = [], []
+            for name in dimensions or DEFAULT_DIMENSIONS:
+                col = resolve_column(name, df.columns)
+                if col is None:
+                    logger.warning(f"Cube dimension {name} not in data, skipping")
+                    continue
+                keys.append(df[col])
+                names.append(col)
+            month = resolve_column(month_column, df.columns)
+            if month is not None:
+                months = df[month].to_numpy().astype('datetime64[M]').astype('datetime64[ns]')
+                keys.append(pd.Series(months, index=df.index, name=MONTH_DIMENSION))
+                names.append(MONTH_DIMENSION)
+
+            aggregations = {}
+            for measure, (source, how) in MEASURES.items():
+                if source is None:
+                    continue
+                col = resolve_column(source, df.columns)
+                if col is not None:
+                    aggregations[measure] = (col, how)
+            # Sum in float64, so neither the cells nor their roll-ups round
+            # to the float32 of the raw amounts
+            sources = df[list(dict.fromkeys(col for col, _ in aggregations.values()))]
+            floats = sources.select_dtypes('floating').columns
+            sources = sources.astype({col: np.float64 for col in floats})
+            grouped = sources.groupby(keys, observed=True, dropna=False, sort=True)
+            cells = grouped.agg(**aggregations) if aggregations else pd.DataFrame(
+                index=grouped.size().index
+            )
+            cells.insert(0, 'Rows', grouped.size().to_numpy())
+            cells = cells.reset_index()
+            cells.columns = names + list(cells.columns[len(names):])
+
+            policy = resolve_column(policy_column, df.columns)
+            registers = cls._cell_registers(
+                grouped.ngroup().to_numpy(), df[policy] if policy else None, precision
+            )
+            logger.info("Built risk cube", cells=len(cells), rows=len(df),
+                        dimensions=names)
+            return cls(cells, registers, names, precision)
+        except Exception as e:
+            logger.error(f"Risk cube aggregation failed: {str(e)}")
+            raise
+
+    def rollup(self, dimensions: Iterable[str], dropna: bool = True) -> pd.DataFrame:
+        """Aggregate the cube to a subset of its dimensions.
+
+        Args:
+            dimensions: Dimensions to keep; an empty list gives the total
+            dropna: Drop cells whose dimension values are missing, like a
+                plain ``groupby``
+
+        Returns:
+            Frame with the kept dimensions, the summed measures and the
+            derived ``Policies``, ``LossRatio``, ``AvgLossRatio``,
+            ``ClaimFrequency`` and ``AvgClaim`` columns
+        """
+        return self._view(self.cells, list(dimensions), dropna)
+
+    def slice(self, by: Optional[Iterable[str]] = None, months=None,
+              **criteria) -> pd.DataFrame:
+        """Answer a filtered query from the pre-aggregated cells.
+
+        For example ``cube.slice(Province='Gauteng', make='TOYOTA',
+        months='2015')`` gives the totals and loss ratio of that segment.
+
+        Args:
+            by: Dimensions to break the result down by; the default gives
+                one total row
+            months: A period string (``'2015'``, ``'2015-03'``), a
+                ``(start, end)`` tuple of periods, inclusive, or a list
+                of period strings
+            **criteria: Dimension values, each a scalar or a list
+
+        Returns:
+            Roll-up of the selected cells, as returned by ``rollup``
+        """
+        mask = np.ones(len(self.cells), dtype=bool)
+        for name, value in criteria.items():
+            if name not in self.dimensions:
+                raise KeyError(f"Unknown cube dimension: {name}")
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            mask &= self.cells[name].isin(values).to_numpy()
+        if months is not None:
+            mask &= self._month_mask(months)
+        return self._view(self.cells[mask], list(by or []), dropna=True)
+
+    def merge(self, *others: 'RiskCube', replace_months: bool = False) -> 'RiskCube':
+        """Combine with other cubes, e.g. the partial cubes of new months.
+
+        Args:
+            *others: Cubes over the same dimensions and precision
+            replace_months: Drop this cube's cells for every month present
+                in ``others`` first, for re-ingested months
+
+        Returns:
+            New merged cube
+        """
+        for other in others:
+            if other.dimensions != self.dimensions or other.precision != self.precision:
+                raise ValueError("Cannot merge cubes with different dimensions or precision")
+        base = self
+        if replace_months and MONTH_DIMENSION in self.dimensions:
+            base = self.drop_months(pd.concat(
+                [other.cells[MONTH_DIMENSION] for other in others]
+            ).unique())
+        cubes = [base, *others]
+
+        cells = concat_chunks([cube.cells for cube in cubes]).reset_index(drop=True)
+        grouped = cells.groupby(self.dimensions, observed=True, dropna=False, sort=True)
+        measures = [c for c in cells.columns if c not in self.dimensions]
+        merged = grouped[measures].sum().reset_index()
+        new_ids = grouped.ngroup().to_numpy(dtype=np.int64)
+
+        offsets = np.cumsum([0] + [len(cube.cells) for cube in cubes[:-1]])
+        old_ids = np.concatenate([
+            cube.registers['cell'].to_numpy() + offset
+            for cube, offset in zip(cubes, offsets)
+        ])
+        registers = self._reduce_registers(
+            new_ids[old_ids],
+            np.concatenate([cube.registers['register'].to_numpy() for cube in cubes]),
+            np.concatenate([cube.registers['rank'].to_numpy() for cube in cubes]),
+            self.precision
+        )
+        logger.info("Merged risk cubes", cubes=len(cubes), cells=len(merged))
+        return RiskCube(merged, registers, self.dimensions, self.precision)
+
+    def drop_months(self, months: Iterable) -> 'RiskCube':
+        """Return a cube without the cells of the given months.
+
+        Args:
+            months: Month timestamps; NaT drops the cells without a month
+        """
+        months = pd.DatetimeIndex(pd.to_datetime(list(months))).to_period('M').to_timestamp()
+        stale = self.cells[MONTH_DIMENSION].isin(months).to_numpy()
+        cells, registers = self._subset(~stale)
+        return RiskCube(cells, registers, self.dimensions, self.precision)
+
+    def save(self, path: Union[str, Path]):
+        """Persist the cube as Parquet datasets plus a metadata file.
+
+        The cube is written to a temporary sibling directory that replaces
+        ``path`` once complete.
+
+        Args:
+            path: Cube directory
+        """
+        try:
+            path = Path(path)
+            tmp_path = path.with_name(path.name + '.tmp')
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            write_parquet_stream([self.cells], tmp_path / 'cells')
+            write_parquet_stream([self.registers], tmp_path / 'registers')
+            with open(tmp_path / CUBE_META, 'w') as f:
+                json.dump({
+                    'version': CUBE_VERSION,
+                    'dimensions': self.dimensions,
+                    'precision': self.precision,
+                }, f, indent=2)
+            shutil.rmtree(path, ignore_errors=True)
+            tmp_path.rename(path)
+            logger.info(f"Saved risk cube to {path}")
+        except Exception as e:
+            logger.error(f"Saving risk cube failed: {str(e)}")
+            raise
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'RiskCube':
+        """Load a cube written by ``save``.
+
+        Raises:
+            FileNotFoundError: If no cube exists at ``path``
+            ValueError: If the cube was written by an incompatible version
+        """
+        path = Path(path)
+        with open(path / CUBE_META) as f:
+            meta = json.load(f)
+        if meta.get('version') != CUBE_VERSION:
+            raise ValueError(f"Unsupported risk cube version in {path}")
+        cells = read_parquet_dataset(path / 'cells')
+        registers = read_parquet_dataset(path / 'registers')
+        return cls(cells, registers, meta['dimensions'], meta['precision'])
+
+    def _view(self, cells: pd.DataFrame, dimensions: List[str],
+              dropna: bool) -> pd.DataFrame:
+        """Roll up a subset of cells (indexed by cell position)."""
+        unknown = [d for d in dimensions if d not in self.dimensions]
+        if unknown:
+            raise KeyError(f"Unknown cube dimensions: {unknown}")
+
+        measures = [c for c in cells.columns if c not in self.dimensions]
+        groups = np.full(len(self.cells), -1, dtype=np.int64)
+        if dimensions:
+            grouped = cells.groupby(dimensions, observed=True, dropna=dropna, sort=True)
+            view = grouped[measures].sum().reset_index()
+            # ngroup leaves rows of dropped (NaN) groups missing
+            groups[cells.index] = grouped.ngroup().fillna(-1).to_numpy(dtype=np.int64)
+        else:
+            view = cells[measures].sum().to_frame().T.astype(cells[measures].dtypes)
+            groups[cells.index] = 0
+        view['Policies'] = self._distinct(groups, len(view))
+        return self._derive(view)
+
+    def _subset(self, mask: np.ndarray):
+        """Cells and renumbered registers for the cells selected by ``mask``."""
+        new_ids = np.cumsum(mask) - 1
+        keep = mask[self.registers['cell'].to_numpy()]
+        registers = self.registers[keep].reset_index(drop=True)
+        registers['cell'] = new_ids[registers['cell'].to_numpy()]
+        return self.cells[mask].reset_index(drop=True), registers
+
+    def _month_mask(self, months) -> np.ndarray:
+        """Select cells whose month falls in the requested periods."""
+        if MONTH_DIMENSION not in self.dimensions:
+            raise KeyError("Cube has no month dimension")
+        if isinstance(months, tuple):
+            ranges = [(pd.Period(months[0]).start_time, pd.Period(months[1]).end_time)]
+        else:
+            periods = months if isinstance(months, list) else [months]
+            ranges = [(pd.Period(p).start_time, pd.Period(p).end_time) for p in periods]
+        values = self.cells[MONTH_DIMENSION]
+        mask = np.zeros(len(values), dtype=bool)
+        for start, end in ranges:
+            mask |= ((values >= start) & (values <= end)).to_numpy()
+        return mask
+
+    def _distinct(self, groups: np.ndarray, n_groups: int) -> np.ndarray:
+        """Estimate distinct policies per roll-up group from cell registers."""
+        if self.registers.empty:
+            return np.zeros(n_groups, dtype=np.int64)
+        cell_group = groups[self.registers['cell'].to_numpy()]
+        keep = cell_group >= 0
+        merged = pd.DataFrame({
+            'group': cell_group[keep],
+            'register': self.registers['register'].to_numpy()[keep],
+            'rank': self.registers['rank'].to_numpy()[keep],
+        }).groupby(['group', 'register'], sort=False)['rank'].max()
+        weights = pd.Series(np.exp2(-merged.to_numpy(dtype=float)),
+                            index=merged.index.get_level_values('group'))
+        summary = weights.groupby(level=0).agg(['sum', 'size'])
+        harmonic = np.zeros(n_groups)
+        nonzero = np.zeros(n_groups)
+        harmonic[summary.index] = summary['sum'].to_numpy()
+        nonzero[summary.index] = summary['size'].to_numpy()
+        estimate = HyperLogLog.estimate_from(harmonic, nonzero, self.precision)
+        return np.rint(estimate).astype(np.int64)
+
+    @staticmethod
+    def _cell_registers(cell_ids: np.ndarray, policies: Optional[pd.Series],
+                        precision: int) -> pd.DataFrame:
+        """Sparse per-cell HyperLogLog registers for the policy column."""
+        columns = {'cell': np.int64, 'register': np.uint32, 'rank': np.uint8}
+        if policies is None:
+            return pd.DataFrame({c: np.empty(0, dtype=t) for c, t in columns.items()})
+        present = policies.notna().to_numpy()
+        index, rank = HyperLogLog.hash_values(policies, precision)
+        return RiskCube._reduce_registers(cell_ids[present], index, rank, precision)
+
+    @staticmethod
+    def _reduce_registers(cell_ids: np.ndarray, index: np.ndarray, rank: np.ndarray,
+                          precision: int) -> pd.DataFrame:
+        """Keep the maximum rank per (cell, register) pair."""
+        # One key per (cell, register) pair keeps the reduction a flat groupby
+        key = cell_ids.astype(np.int64) << np.int64(precision) | index.astype(np.int64)
+        best = pd.Series(rank).groupby(key, sort=True).max()
+        keys = best.index.to_numpy()
+        return pd.DataFrame({
+            'cell': keys >> np.int64(precision),
+            'register': (keys & ((1 << precision) - 1)).astype(np.uint32),
+            'rank': best.to_numpy(dtype=np.uint8),
+        })
+
+    @staticmethod
+    def _derive(view: pd.DataFrame) -> pd.DataFrame:
+        """Add ratio measures computed from the additive ones."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if {'TotalClaims', 'TotalPremium'} <= set(view.columns):
+                view['LossRatio'] = view['TotalClaims'] / view['TotalPremium']
+            if 'LossRatioSum' in view.columns:
+                view['AvgLossRatio'] = view['LossRatioSum'] / view['LossRatioCount'].replace(0, np.nan)
+            if 'ClaimCount' in view.columns:
+                view['ClaimFrequency'] = view['ClaimCount'] / view['ClaimObservations'].replace(0, np.nan)
+            if 'SeveritySum' in view.columns:
+                view['AvgClaim'] = view['SeveritySum'] / view['SeverityCount'].replace(0, np.nan)
+        return view
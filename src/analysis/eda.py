@@ -6,21 +6,37 @@ generation.
 
 import pandas as pd
 import numpy as np
-from src.utils.visualization import Visualizer
+from typing import TYPE_CHECKING, Iterable, Optional
+from src.analysis.aggregation import RiskCube
+from src.analysis.quality import QualityProfile, profile_chunks
 from src.utils.logger import get_logger
+from src.utils.profiling import profiled
+
+if TYPE_CHECKING:
+    # Plotting pulls in matplotlib and seaborn; only the visualizer passed in needs them
+    from src.utils.visualization import Visualizer
 
 logger = get_logger(__name__)
 
 class InsuranceEDA:
     """Performs comprehensive exploratory data analysis.
     
+    Risk views are roll-ups of a single ``RiskCube`` aggregation, kept
+    in ``cube_`` after ``analyze_risk_factors`` for further queries.
+    
     Args:
         visualizer: Visualization utility instance
+        cube_dimensions: Categorical dimensions of the risk cube; the
+            transaction month is always included
     """
     
-    def __init__(self, visualizer: Visualizer):
+    def __init__(self, visualizer: 'Visualizer',
+                 cube_dimensions: Optional[Iterable[str]] = None):
         self.visualizer = visualizer
+        self.cube_dimensions = cube_dimensions
+        self.cube_ = None
         
+    @profiled('eda.quality_report')
     def generate_quality_report(self, df: pd.DataFrame) -> dict:
         """Generate comprehensive data quality report.
         
@@ -30,22 +46,43 @@ class InsuranceEDA:
         - Numeric feature statistics
         - Categorical feature cardinality
         
+        Statistics come from a single streaming ``QualityProfile`` pass:
+        percentiles are sketched rather than sorted and cardinalities are
+        HyperLogLog estimates.
+        
         Args:
             df: DataFrame to analyze
             
         Returns:
             Dictionary with quality metrics
         """
-        report = {
-            'missing_values': self._calculate_missing(df),
-            'dtype_summary': self._get_dtype_summary(df),
-            'numeric_stats': self._get_numeric_stats(df),
-            'categorical_summary': self._get_categorical_summary(df)
-        }
+        report = QualityProfile().update(df).report()
         logger.info("Generated data quality report")
         return report
     
-    def analyze_risk_factors(self, df: pd.DataFrame, output_dir: str):
+    @profiled('eda.stream_quality_report')
+    def generate_stream_quality_report(self, chunks: Iterable[pd.DataFrame],
+                                       max_workers: Optional[int] = None) -> dict:
+        """Generate the quality report from a stream of chunks.
+        
+        Chunks are profiled independently (in parallel when
+        ``max_workers`` > 1) and the profiles merged, so the dataset is
+        never held in memory.
+        
+        Args:
+            chunks: DataFrame chunks
+            max_workers: Worker processes for profiling
+            
+        Returns:
+            Dictionary with quality metrics
+        """
+        report = profile_chunks(chunks, max_workers=max_workers).report()
+        logger.info("Generated streaming data quality report")
+        return report
+    
+    @profiled('eda.risk_factors')
+    def analyze_risk_factors(self, df: pd.DataFrame, output_dir: str,
+                             cube: Optional[RiskCube] = None):
         """Generate key risk visualizations.
         
         Produces:
@@ -56,25 +93,30 @@ class InsuranceEDA:
         Args:
             df: Cleaned DataFrame
             output_dir: Directory to save visualizations
+            cube: Pre-aggregated cube of ``df`` (e.g. a persisted,
+                incrementally maintained one); built from ``df`` if None
         """
         try:
+            # One pass over the rows; every view below is a roll-up
+            if cube is None:
+                cube = self.build_cube(df)
+            else:
+                self.cube_ = cube
+            
             # Provincial risk
-            provincial_risk = df.groupby('Province').agg(
-                Policies=('PolicyID', 'nunique'),
-                AvgLossRatio=('LossRatio', 'mean'),
-                ClaimFrequency=('HasClaim', 'mean')
-            ).reset_index()
+            provincial_risk = cube.rollup(['Province'])[
+                ['Province', 'Policies', 'AvgLossRatio', 'ClaimFrequency']
+            ]
             self.visualizer.plot_provincial_risk(provincial_risk, output_dir)
             
             # Vehicle risk
-            vehicle_risk = df.groupby('make').agg(
-                Policies=('PolicyID', 'nunique'),
-                AvgClaim=('ClaimSeverity', 'mean')
-            ).query('Policies > 50').reset_index()
+            vehicle_risk = cube.rollup(['make'])[
+                ['make', 'Policies', 'AvgClaim']
+            ].query('Policies > 50').reset_index(drop=True)
             self.visualizer.plot_vehicle_risk(vehicle_risk, output_dir)
             
             # Temporal trends
-            temporal_df = self._prepare_temporal_data(df)
+            temporal_df = self._prepare_temporal_data(df, cube)
             self.visualizer.plot_temporal_trends(temporal_df, output_dir)
             
             logger.info("Risk factor analysis completed")
@@ -82,36 +124,37 @@ class InsuranceEDA:
             logger.error(f"Risk analysis failed: {str(e)}")
             raise
     
-    def _calculate_missing(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Calculate missing value statistics."""
-        missing = df.isnull().sum()
-        missing_pct = (missing / len(df)) * 100
-        return pd.DataFrame({
-            'missing_count': missing,
-            'missing_pct': missing_pct
-        }).sort_values('missing_pct', ascending=False)
-    
-    def _get_dtype_summary(self, df: pd.DataFrame) -> dict:
-        """Summarize data types distribution."""
-        return df.dtypes.value_counts().to_dict()
-    
-    def _get_numeric_stats(self, df: pd.DataFrame) -> dict:
-        """Compute descriptive statistics for numeric features."""
-        return df.describe(percentiles=[0.25, 0.5, 0.75, 0.95]).to_dict()
-    
-    def _get_categorical_summary(self, df: pd.DataFrame) -> dict:
-        """Calculate cardinality for categorical features."""
-        cat_cols = df.select_dtypes(include=['object', 'category']).columns
-        return {col: df[col].nunique() for col in cat_cols}
+    @profiled('eda.build_cube')
+    def build_cube(self, df: pd.DataFrame) -> RiskCube:
+        """Aggregate the frame into a risk cube and keep it in ``cube_``.
+        
+        Args:
+            df: DataFrame with derived features
+            
+        Returns:
+            Risk cube over the configured dimensions and month
+        """
+        self.cube_ = RiskCube.from_frame(df, dimensions=self.cube_dimensions)
+        return self.cube_
     
-    def _prepare_temporal_data(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Prepare monthly aggregated data for trend analysis."""
-        monthly = df.groupby(pd.Grouper(key='TransactionMonth', freq='M')).agg(
-            TotalPremium=('TotalPremium', 'sum'),
-            TotalClaims=('TotalClaims', 'sum'),
-            ClaimCount=('HasClaim', 'sum'),
-            PolicyCount=('PolicyID', 'nunique')
-        )
+    @profiled('eda.temporal_data')
+    def _prepare_temporal_data(self, df: pd.DataFrame,
+                               cube: Optional[RiskCube] = None) -> pd.DataFrame:
+        """Prepare monthly aggregated data for trend analysis.
+        
+        Months without transactions inside the observed range are kept
+        with zero totals, as a monthly resample would.
+        """
+        if cube is None:
+            cube = self.build_cube(df)
+        monthly = cube.rollup(['Month']).set_index('Month')
+        monthly = monthly[['TotalPremium', 'TotalClaims', 'ClaimCount', 'Policies']]
+        monthly = monthly.rename(columns={'Policies': 'PolicyCount'})
+        if len(monthly):
+            months = pd.date_range(monthly.index.min(), monthly.index.max(), freq='MS')
+            monthly = monthly.reindex(months, fill_value=0)
+        # Label months by their last day, matching pd.Grouper(freq='M')
+        monthly.index = (monthly.index + pd.offsets.MonthEnd(0)).rename('TransactionMonth')
         monthly['LossRatio'] = monthly['TotalClaims'] / monthly['TotalPremium']
         monthly['AvgClaim'] = monthly['TotalClaims'] / monthly['ClaimCount']
-        return monthly.reset_index()
\ No newline at end of file
+        return monthly.reset_index()
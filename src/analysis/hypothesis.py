@@ -0,0 +1,420 @@
+"""Batched statistical hypothesis testing for insurance risk segments.
+
+Tests are (grouping column, metric) pairs. Group moments and contingency
+counts for every pair come from one ``bincount`` pass per grouping and
+metric, and the chi-square, Welch t and one-way ANOVA statistics are then
+computed for all pairs at once on padded moment arrays. A permutation
+mode resamples in seeded blocks of index matrices, optionally across a
+process pool, and permutes the statistic of the parametric test: Welch's
+t for two groups of a continuous metric, otherwise the between-group
+sum of squares, which orders resamples like chi-square and F. P-values
+are corrected for multiple testing with the Benjamini-Hochberg false
+discovery rate procedure.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+from statsmodels.stats.multitest import multipletests
+
+from ..utils.logger import get_logger
+from ..utils.processes import process_pool
+
+logger = get_logger(__name__)
+
+# Upper bound on resampled values held per permutation block
+BLOCK_ELEMENTS = 8_000_000
+
+# Per-process test data set up once by the pool initializer
+_WORKER = {}
+
+
+def _init_worker(samples: List[tuple]):
+    """Keep the permutation inputs of every test in the worker."""
+    _WORKER['samples'] = samples
+
+
+def _permutation_block(test: int, seed: np.random.SeedSequence, size: int) -> int:
+    """Count resampled statistics at least as extreme as the observed one."""
+    codes, values, counts, observed, welch = _WORKER['samples'][test]
+    return _count_exceedances(codes, values, counts, observed, welch, seed, size)
+
+
+def _permutation_statistic(sums: np.ndarray, squares: Optional[np.ndarray],
+                           counts: np.ndarray, welch: bool) -> np.ndarray:
+    """Test statistic from per-group sums along the last axis.
+
+    Without ``welch`` it is the between-group sum ``sum_g S_g**2 / n_g``.
+    Group sizes and the total sum of squares do not change under
+    permutation, so it orders resamples exactly like the chi-square and
+    F statistics. With ``welch`` it is the absolute Welch t of two
+    groups, which needs the per-group sums of squares as well.
+    """
+    if not welch:
+        return (sums ** 2 / counts).sum(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = sums / counts
+        se2 = (squares - sums * mean) / (counts - 1) / counts
+        return np.abs(mean[..., 0] - mean[..., 1]) / np.sqrt(se2.sum(axis=-1))
+
+
+def _count_exceedances(codes: np.ndarray, values: np.ndarray, counts: np.ndarray,
+                       observed: float, welch: bool, seed: np.random.SeedSequence,
+                       size: int) -> int:
+    """Permute group labels ``size`` times and count extreme statistics."""
+    rng = np.random.default_rng(seed)
+    k = counts.size
+    labels = rng.permuted(np.tile(codes.astype(np.int32), (size, 1)), axis=1)
+    labels += (np.arange(size, dtype=np.int32) * k)[:, None]
+    labels = labels.ravel()
+    sums = np.bincount(labels, weights=np.tile(values, size), minlength=size * k)
+    squares = None
+    if welch:
+        squares = np.bincount(labels, weights=np.tile(values ** 2, size),
+                              minlength=size * k).reshape(size, k)
+    statistic = _permutation_statistic(sums.reshape(size, k), squares, counts, welch)
+    return int(np.count_nonzero(statistic >= observed * (1 - 1e-12)))
+
+
+def benjamini_hochberg(p_values: Sequence[float], alpha: float = 0.05):
+    """Benjamini-Hochberg FDR correction, ignoring missing p-values.
+
+    Args:
+        p_values: Raw p-values; NaNs are passed through
+        alpha: False discovery rate
+
+    Returns:
+        Tuple of adjusted p-values and rejection flags
+    """
+    p_values = np.asarray(p_values, dtype=float)
+    adjusted = np.full(p_values.shape, np.nan)
+    reject = np.zeros(p_values.shape, dtype=bool)
+    present = ~np.isnan(p_values)
+    if present.any():
+        reject[present], adjusted[present], _, _ = multipletests(
+            p_values[present], alpha=alpha, method='fdr_bh'
+        )
+    return adjusted, reject
+
+
+class HypothesisTester:
+    """Runs many segment hypothesis tests in one batch.
+
+    The test for each pair is chosen from the data: a chi-square test of
+    independence for 0/1 metrics (e.g. ``HasClaim``), Welch's t-test for
+    continuous metrics over two groups, and one-way ANOVA otherwise.
+
+    Args:
+        alpha: Significance level (false discovery rate of the batch)
+        method: ``'parametric'`` or ``'permutation'``
+        n_resamples: Resamples per test in permutation mode
+        random_state: Seed for resampling
+        max_workers: Worker processes for resampling; serial when None
+            or 1
+    """
+
+    def __init__(self, alpha: float = 0.05, method: str = 'parametric',
+                 n_resamples: int = 999, random_state: int = 0,
+                 max_workers: Optional[int] = None):
+        if method not in ('parametric', 'permutation'):
+            raise ValueError(f"Unknown testing method: {method}")
+        self.alpha = alpha
+        self.method = method
+        self.n_resamples = n_resamples
+        self.random_state = random_state
+        self.max_workers = max_workers
+
+    @classmethod
+    def from_config(cls, config_manager) -> 'HypothesisTester':
+        """Build a tester from the ``hypothesis`` config section."""
+        settings = config_manager.get('hypothesis', {}) or {}
+        return cls(
+            alpha=settings.get('alpha', 0.05),
+            method=settings.get('method', 'parametric'),
+            n_resamples=settings.get('n_resamples', 999),
+            random_state=settings.get('random_state', 0),
+            max_workers=settings.get('max_workers')
+        )
+
+    def test_provincial_risk(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Test whether claim frequency, severity and margin differ by province.
+
+        Args:
+            df: Cleaned DataFrame with derived features
+
+        Returns:
+            Batch results (see ``run_batch``)
+        """
+        metrics = self._risk_metrics(df)
+        return self.run_batch(df, [('Province', m) for m in metrics], metrics=metrics)
+
+    def test_gender_risk(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Test whether claim frequency, severity and margin differ between
+        women and men.
+
+        Args:
+            df: Cleaned DataFrame with derived features
+
+        Returns:
+            Batch results (see ``run_batch``)
+        """
+        metrics = self._risk_metrics(df)
+        return self.run_batch(
+            df, [('Gender', m) for m in metrics], metrics=metrics,
+            group_values={'Gender': ['Female', 'Male']}
+        )
+
+    def run_batch(self, df: pd.DataFrame, tests: Iterable[Tuple[str, str]],
+                  metrics: Optional[Dict[str, pd.Series]] = None,
+                  group_values: Optional[Dict[str, list]] = None) -> pd.DataFrame:
+        """Run a batch of (grouping column, metric) tests.
+
+        Rows with a missing group or metric value are left out of that
+        test only.
+
+        Args:
+            df: DataFrame holding the grouping and metric columns
+            tests: (grouping column, metric) pairs
+            metrics: Computed metrics by name, aligned with ``df``, that
+                take precedence over columns of ``df``
+            group_values: Restrict a grouping column to these values
+
+        Returns:
+            One row per test with ``group``, ``metric``, ``test``,
+            ``n_groups``, ``n``, ``statistic``, ``df_num``, ``df_den``,
+            ``min_mean``, ``max_mean``, ``p_value``, ``p_adjusted`` and
+            ``reject``, where ``p_adjusted``/``reject`` are FDR-corrected
+            over the batch
+        """
+        try:
+            tests = list(tests)
+            metrics = metrics or {}
+            group_values = group_values or {}
+            codes = {
+                group: self._group_codes(df[group], group_values.get(group))
+                for group in dict.fromkeys(g for g, _ in tests)
+            }
+            samples = [
+                self._sample(codes[group], self._metric(df, metrics, metric))
+                for group, metric in tests
+            ]
+            results = self._parametric(samples)
+            results.insert(0, 'group', [g for g, _ in tests])
+            results.insert(1, 'metric', [m for _, m in tests])
+            if self.method == 'permutation':
+                welch = (results['test'] == 'welch_t').to_numpy()
+                results['p_value'] = self._permutation_p_values(samples, welch)
+                results.loc[results['test'] != 'none', 'test'] += ' (permutation)'
+            results['p_adjusted'], results['reject'] = benjamini_hochberg(
+                results['p_value'], self.alpha
+            )
+            logger.info(
+                "Hypothesis batch finished",
+                tests=len(results), rejected=int(results['reject'].sum()),
+                method=self.method
+            )
+            return results
+        except Exception as e:
+            logger.error(f"Hypothesis testing failed: {str(e)}")
+            raise
+
+    def bootstrap_group_means(self, df: pd.DataFrame, group: str, metric: str,
+                              ci: float = 0.95) -> pd.DataFrame:
+        """Bootstrap confidence intervals for the metric mean of each group.
+
+        Resamples are drawn as index matrices in seeded blocks.
+
+        Args:
+            df: DataFrame holding the columns
+            group: Grouping column
+            metric: Metric column
+            ci: Confidence level
+
+        Returns:
+            Frame indexed by group with ``n``, ``mean``, ``ci_low`` and
+            ``ci_high``
+        """
+        values = pd.to_numeric(df[metric], errors='coerce').to_numpy(dtype=float)
+        codes, uniques = pd.factorize(df[group], sort=True)
+        seeds = np.random.SeedSequence(self.random_state).spawn(len(uniques))
+        rows = []
+        for code, label in enumerate(uniques):
+            sample = values[(codes == code) & ~np.isnan(values)]
+            means = np.empty(0)
+            if sample.size:
+                size = max(1, BLOCK_ELEMENTS // sample.size)
+                block_seeds = seeds[code].spawn(-(-self.n_resamples // size))
+                blocks = []
+                for i, seed in enumerate(block_seeds):
+                    draws = min(size, self.n_resamples - i * size)
+                    index = np.random.default_rng(seed).integers(
+                        0, sample.size, (draws, sample.size)
+                    )
+                    blocks.append(sample[index].mean(axis=1))
+                means = np.concatenate(blocks)
+            tail = (1 - ci) / 2
+            rows.append({
+                group: label,
+                'n': sample.size,
+                'mean': sample.mean() if sample.size else np.nan,
+                'ci_low': np.quantile(means, tail) if means.size else np.nan,
+                'ci_high': np.quantile(means, 1 - tail) if means.size else np.nan,
+            })
+        return pd.DataFrame(rows).set_index(group)
+
+    @staticmethod
+    def _risk_metrics(df: pd.DataFrame) -> Dict[str, pd.Series]:
+        """Claim frequency, severity (claimants only) and margin.
+
+        The raw file's NA markers also match zero, so missing premium and
+        claim amounts count as zero; otherwise the margin would only
+        cover claimants.
+        """
+        claims = df['TotalClaims'].astype(float).fillna(0.0)
+        has_claim = claims > 0
+        return {
+            'ClaimFrequency': has_claim.astype(float),
+            'ClaimSeverity': claims.where(has_claim),
+            'Margin': df['TotalPremium'].astype(float).fillna(0.0) - claims,
+        }
+
+    @staticmethod
+    def _group_codes(column: pd.Series, values: Optional[list]) -> np.ndarray:
+        """Integer group codes, -1 for missing or excluded values."""
+        if values is not None:
+            column = column.where(column.isin(values))
+        codes, _ = pd.factorize(column, sort=True)
+        return codes
+
+    @staticmethod
+    def _metric(df: pd.DataFrame, metrics: Dict[str, pd.Series], name: str) -> np.ndarray:
+        """Metric values as float64, from the computed metrics or ``df``."""
+        values = metrics[name] if name in metrics else df[name]
+        return pd.to_numeric(values, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+
+    @staticmethod
+    def _sample(codes: np.ndarray, values: np.ndarray) -> tuple:
+        """Compact codes and values of a test's valid rows.
+
+        Returns:
+            Tuple of dense group codes, values, group counts and whether
+            the metric is binary
+        """
+        valid = (codes >= 0) & ~np.isnan(values)
+        codes, values = codes[valid], values[valid]
+        # Renumber so only groups with observations remain
+        present, codes = np.unique(codes, return_inverse=True)
+        counts = np.bincount(codes, minlength=present.size)
+        binary = bool(values.size) and bool(np.isin(values, (0.0, 1.0)).all())
+        return codes, values, counts, binary
+
+    def _parametric(self, samples: List[tuple]) -> pd.DataFrame:
+        """Vectorised chi-square, Welch t and ANOVA over all tests."""
+        n_tests = len(samples)
+        width = max([s[2].size for s in samples] + [2])
+        n = np.zeros((n_tests, width))
+        mean = np.zeros((n_tests, width))
+        m2 = np.zeros((n_tests, width))
+        for i, (codes, values, counts, _) in enumerate(samples):
+            k = counts.size
+            if not k:
+                continue
+            n[i, :k] = counts
+            mean[i, :k] = np.bincount(codes, weights=values, minlength=k) / counts
+            m2[i, :k] = np.bincount(
+                codes, weights=(values - mean[i, codes]) ** 2, minlength=k
+            )
+        binary = np.array([s[3] for s in samples], dtype=bool)
+        k = (n > 0).sum(axis=1)
+        total = n.sum(axis=1)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            grand = (n * mean).sum(axis=1) / total
+            ssb = (n * (mean - grand[:, None]) ** 2).sum(axis=1)
+            ssw = m2.sum(axis=1)
+
+            # Chi-square test of independence on the k x 2 table
+            rate = grand[:, None]
+            expected = n * rate
+            chi2 = np.where(
+                n > 0,
+                (n * mean - expected) ** 2 / expected
+                + (n * (1 - mean) - (n - expected)) ** 2 / (n - expected),
+                0.0
+            ).sum(axis=1)
+            chi2_p = stats.chi2.sf(chi2, k - 1)
+
+            # One-way ANOVA
+            f_stat = (ssb / (k - 1)) / (ssw / (total - k))
+            f_p = stats.f.sf(f_stat, k - 1, total - k)
+
+            # Welch's t-test on the first two (only) groups
+            var = m2[:, :2] / (n[:, :2] - 1)
+            se2 = var / n[:, :2]
+            t_stat = (mean[:, 0] - mean[:, 1]) / np.sqrt(se2.sum(axis=1))
+            welch_df = se2.sum(axis=1) ** 2 / (
+                se2[:, 0] ** 2 / (n[:, 0] - 1) + se2[:, 1] ** 2 / (n[:, 1] - 1)
+            )
+            t_p = 2 * stats.t.sf(np.abs(t_stat), welch_df)
+
+        kind = np.where(binary, 'chi2', np.where(k == 2, 'welch_t', 'anova'))
+        kind = np.where(k < 2, 'none', kind)
+        statistic = np.select([kind == 'chi2', kind == 'welch_t', kind == 'anova'],
+                              [chi2, t_stat, f_stat], np.nan)
+        p_value = np.select([kind == 'chi2', kind == 'welch_t', kind == 'anova'],
+                            [chi2_p, t_p, f_p], np.nan)
+        df_num = np.select([kind == 'chi2', kind == 'welch_t', kind == 'anova'],
+                           [k - 1, welch_df, k - 1], np.nan)
+        df_den = np.where(kind == 'anova', total - k, np.nan)
+        present = n > 0
+        return pd.DataFrame({
+            'test': kind,
+            'n_groups': k,
+            'n': total.astype(np.int64),
+            'statistic': statistic,
+            'df_num': df_num,
+            'df_den': df_den,
+            'min_mean': np.where(present, mean, np.inf).min(axis=1, initial=np.inf),
+            'max_mean': np.where(present, mean, -np.inf).max(axis=1, initial=-np.inf),
+            'p_value': p_value,
+        }).replace([np.inf, -np.inf], np.nan)
+
+    def _permutation_p_values(self, samples: List[tuple], welch: np.ndarray) -> np.ndarray:
+        """Permutation p-values for every test, resampled in seeded blocks.
+
+        ``welch`` flags the tests whose statistic is Welch's t.
+        """
+        perm_samples, tasks = [], []
+        test_seeds = np.random.SeedSequence(self.random_state).spawn(len(samples))
+        for i, (codes, values, counts, _) in enumerate(samples):
+            if counts.size < 2:
+                perm_samples.append(None)
+                continue
+            sums = np.bincount(codes, weights=values, minlength=counts.size)
+            squares = np.bincount(codes, weights=values ** 2, minlength=counts.size)
+            observed = float(_permutation_statistic(sums, squares, counts, bool(welch[i])))
+            perm_samples.append((codes, values, counts, observed, bool(welch[i])))
+            size = max(1, min(self.n_resamples, BLOCK_ELEMENTS // max(values.size, 1)))
+            n_blocks = -(-self.n_resamples // size)
+            for b, seed in enumerate(test_seeds[i].spawn(n_blocks)):
+                tasks.append((i, seed, min(size, self.n_resamples - b * size)))
+
+        exceed = np.zeros(len(samples))
+        if self.max_workers and self.max_workers > 1:
+            with process_pool(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(perm_samples,)
+            ) as pool:
+                counts = pool.map(_permutation_block, *zip(*tasks)) if tasks else []
+                for (i, _, _), count in zip(tasks, counts):
+                    exceed[i] += count
+        else:
+            for i, seed, size in tasks:
+                exceed[i] += _count_exceedances(*perm_samples[i], seed, size)
+
+        p_values = (exceed + 1) / (self.n_resamples + 1)
+        p_values[[s is None for s in perm_samples]] = np.nan
+        return p_values
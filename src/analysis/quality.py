@@ -0,0 +1,294 @@
+"""Streaming data quality profiling with mergeable statistics.
+
+A ``QualityProfile`` consumes DataFrame chunks and keeps per-column state
+that can be merged across chunks, workers or months: null counts, exact
+count/mean/variance (Welford updates, Chan et al. merges), min/max,
+approximate percentiles from a ``QuantileSketch`` and approximate
+distinct counts from a ``HyperLogLog``. Date columns are profiled as
+their nanosecond values and reported as timestamps, as ``describe()``
+does. Nothing is sorted and no chunk is retained, so profiles of data
+larger than memory cost one pass.
+"""
+
+from typing import Dict, Iterable, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+from ..utils.logger import get_logger
+from ..utils.processes import process_pool
+from ..utils.sketches import HyperLogLog, QuantileSketch
+
+logger = get_logger(__name__)
+
+DEFAULT_PERCENTILES = (0.25, 0.5, 0.75, 0.95)
+DISTINCT_PRECISION = 12
+
+
+class QualityProfile:
+    """Mergeable per-column quality statistics.
+
+    Args:
+        percentiles: Percentiles reported for numeric columns
+        sketch_k: Capacity of the quantile sketches
+    """
+
+    def __init__(self, percentiles: Iterable[float] = DEFAULT_PERCENTILES,
+                 sketch_k: int = 2000):
+        self.percentiles = tuple(percentiles)
+        self.sketch_k = sketch_k
+        self.rows = 0
+        self.dtypes: Dict[str, str] = {}
+        self.nulls: Dict[str, int] = {}
+        self.numeric: Dict[str, dict] = {}
+        self.datetimes: Set[str] = set()
+        self.distinct: Dict[str, HyperLogLog] = {}
+
+    def update(self, chunk: pd.DataFrame) -> 'QualityProfile':
+        """Fold one chunk into the profile.
+
+        Args:
+            chunk: DataFrame chunk
+
+        Returns:
+            The updated profile
+        """
+        self.rows += len(chunk)
+        for col, count in chunk.isnull().sum().items():
+            self.nulls[col] = self.nulls.get(col, 0) + int(count)
+        for col, dtype in chunk.dtypes.items():
+            self.dtypes[col] = str(dtype)
+
+        numeric = chunk.select_dtypes(include='number')
+        if len(numeric.columns):
+            self._update_numeric(numeric)
+        dates = chunk.select_dtypes(include='datetime')
+        if len(dates.columns):
+            self.datetimes.update(dates.columns)
+            self._update_numeric(pd.DataFrame({
+                col: dates[col].to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(float)
+                for col in dates.columns
+            }).where(dates.notna().to_numpy()))
+        for col in chunk.select_dtypes(include=['object', 'category']).columns:
+            sketch = self.distinct.setdefault(col, HyperLogLog(DISTINCT_PRECISION))
+            sketch.update(chunk[col])
+        return self
+
+    def merge(self, other: 'QualityProfile') -> 'QualityProfile':
+        """Fold a profile of other rows into this one.
+
+        Args:
+            other: Profile built on different chunks
+
+        Returns:
+            The merged profile
+        """
+        self.rows += other.rows
+        for col, count in other.nulls.items():
+            self.nulls[col] = self.nulls.get(col, 0) + count
+        self.dtypes.update(other.dtypes)
+        self.datetimes |= other.datetimes
+        for col, state in other.numeric.items():
+            if col in self.numeric:
+                self._merge_moments(self.numeric[col], state)
+                self.numeric[col]['sketch'].merge(state['sketch'])
+            else:
+                self.numeric[col] = {
+                    **state, 'sketch': QuantileSketch(self.sketch_k).merge(state['sketch'])
+                }
+        for col, sketch in other.distinct.items():
+            self.distinct.setdefault(col, HyperLogLog(sketch.precision)).merge(sketch)
+        return self
+
+    def report(self) -> dict:
+        """Quality report in the layout of ``InsuranceEDA.generate_quality_report``.
+
+        ``dtype_summary`` is keyed by dtype name (e.g. ``'float32'``,
+        ``'category'``) rather than by dtype object, so chunks whose
+        categoricals have different category sets count as one dtype.
+
+        Returns:
+            Dictionary with ``missing_values``, ``dtype_summary``,
+            ``numeric_stats`` and ``categorical_summary``
+        """
+        nulls = pd.Series(self.nulls, dtype='int64')
+        missing = pd.DataFrame({
+            'missing_count': nulls,
+            'missing_pct': nulls / self.rows * 100 if self.rows else nulls * np.nan,
+        }).sort_values('missing_pct', ascending=False)
+
+        return {
+            'missing_values': missing,
+            'dtype_summary': pd.Series(self.dtypes, dtype=object).value_counts().to_dict(),
+            'numeric_stats': {
+                col: self._describe(state, col in self.datetimes)
+                for col, state in self.numeric.items()
+            },
+            'categorical_summary': {
+                col: int(round(sketch.estimate())) for col, sketch in self.distinct.items()
+            },
+        }
+
+    def compare(self, other: 'QualityProfile') -> pd.DataFrame:
+        """Column-level drift between this profile and a later one.
+
+        Args:
+            other: Profile of the later period
+
+        Returns:
+            Frame indexed by column with missing percentages, means and
+            distinct counts before/after, and the mean shift in units of
+            this profile's standard deviation
+        """
+        before, after = self.report(), other.report()
+        columns = sorted(set(self.dtypes) | set(other.dtypes))
+        frame = pd.DataFrame(index=pd.Index(columns, name='column'))
+        frame['missing_pct_before'] = before['missing_values']['missing_pct']
+        frame['missing_pct_after'] = after['missing_values']['missing_pct']
+        # Date columns drift by month by construction; only numbers shift
+        dates = self.datetimes | other.datetimes
+        means_before, means_after, std = (
+            pd.Series({c: s[key] for c, s in report['numeric_stats'].items() if c not in dates},
+                      dtype=float)
+            for report, key in ((before, 'mean'), (after, 'mean'), (before, 'std'))
+        )
+        frame['mean_before'] = means_before
+        frame['mean_after'] = means_after
+        frame['mean_shift_std'] = (frame['mean_after'] - frame['mean_before']) / std.replace(0, np.nan)
+        frame['distinct_before'] = pd.Series(before['categorical_summary'], dtype=float)
+        frame['distinct_after'] = pd.Series(after['categorical_summary'], dtype=float)
+        return frame
+
+    def _update_numeric(self, numeric: pd.DataFrame):
+        """Vectorised chunk moments merged into the running state."""
+        values = numeric.to_numpy(dtype=np.float64, na_value=np.nan)
+        present = ~np.isnan(values)
+        counts = present.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.nansum(values, axis=0) / counts
+            m2 = np.nansum((values - means) ** 2, axis=0)
+        # An infinite value makes the mean infinite and the spread undefined
+        m2[~np.isfinite(means)] = np.nan
+        for i, col in enumerate(numeric.columns):
+            state = self.numeric.get(col)
+            if state is None:
+                state = self.numeric[col] = {
+                    'count': 0, 'mean': 0.0, 'm2': 0.0,
+                    'min': np.inf, 'max': -np.inf,
+                    'sketch': QuantileSketch(self.sketch_k),
+                }
+            if not counts[i]:
+                continue
+            column = values[present[:, i], i]
+            self._merge_moments(state, {
+                'count': int(counts[i]), 'mean': means[i], 'm2': m2[i],
+                'min': column.min(), 'max': column.max(),
+            })
+            state['sketch'].update(column)
+
+    @staticmethod
+    def _merge_moments(state: dict, other: dict):
+        """Combine count/mean/M2/min/max of two disjoint row sets."""
+        if not other['count']:
+            return
+        total = state['count'] + other['count']
+        if np.isfinite(state['mean']) and np.isfinite(other['mean']):
+            delta = other['mean'] - state['mean']
+            state['mean'] += delta * other['count'] / total
+            state['m2'] += other['m2'] + delta ** 2 * state['count'] * other['count'] / total
+        else:
+            # inf stays inf, opposite infinities give NaN, as in describe()
+            with np.errstate(invalid='ignore'):
+                state['mean'] = state['mean'] + other['mean']
+            state['m2'] = np.nan
+        state['count'] = total
+        state['min'] = min(state['min'], other['min'])
+        state['max'] = max(state['max'], other['max'])
+
+    def _describe(self, state: dict, is_datetime: bool = False) -> dict:
+        """``describe()``-style statistics from a column state.
+
+        Date columns report timestamps (NaT when empty) and no standard
+        deviation, like ``describe()``.
+        """
+        count = state['count']
+        stats = {
+            'count': float(count),
+            'mean': state['mean'] if count else np.nan,
+            'std': np.sqrt(state['m2'] / (count - 1)) if count > 1 else np.nan,
+            'min': state['min'] if count else np.nan,
+        }
+        for q in self.percentiles:
+            stats[f"{q * 100:g}%"] = state['sketch'].quantile(q)
+        stats['max'] = state['max'] if count else np.nan
+        if is_datetime:
+            stats['std'] = np.nan
+            stats.update({name: pd.to_datetime(value, unit='ns')
+                          for name, value in stats.items() if name not in ('count', 'std')})
+        return stats
+
+
+def _profile_chunk(chunk: pd.DataFrame) -> QualityProfile:
+    """Profile a single chunk (process pool entry point)."""
+    return QualityProfile().update(chunk)
+
+
+def profile_chunks(chunks: Iterable[pd.DataFrame],
+                   max_workers: Optional[int] = None) -> QualityProfile:
+    """Profile a stream of chunks, optionally across a process pool.
+
+    Args:
+        chunks: DataFrame chunks
+        max_workers: Worker processes; profiles serially when None or 1
+
+    Returns:
+        Merged profile of all chunks
+    """
+    profile = QualityProfile()
+    if not max_workers or max_workers == 1:
+        for chunk in chunks:
+            profile.update(chunk)
+        return profile
+    with process_pool(max_workers=max_workers) as pool:
+        for partial in pool.map(_profile_chunk, chunks):
+            profile.merge(partial)
+    return profile
+
+
+def profile_by_month(chunks: Iterable[pd.DataFrame],
+                     month_column: str = 'TransactionMonth') -> Dict[str, QualityProfile]:
+    """Profile each month separately in one pass over the chunks.
+
+    Args:
+        chunks: DataFrame chunks
+        month_column: Date column defining the months
+
+    Returns:
+        Profiles keyed by ``YYYY-MM``, in month order
+    """
+    profiles: Dict[str, QualityProfile] = {}
+    for chunk in chunks:
+        months = chunk[month_column].dt.to_period('M')
+        for month, rows in chunk.groupby(months, observed=True, sort=False):
+            profiles.setdefault(str(month), QualityProfile()).update(rows)
+    return dict(sorted(profiles.items()))
+
+
+def month_over_month(profiles: Dict[str, QualityProfile]) -> pd.DataFrame:
+    """Compare every month's profile with the previous month's.
+
+    Args:
+        profiles: Profiles keyed by month, in month order
+
+    Returns:
+        Long frame of ``QualityProfile.compare`` results with a ``month``
+        column naming the later month
+    """
+    months = list(profiles)
+    frames = [
+        profiles[prev].compare(profiles[month]).assign(month=month)
+        for prev, month in zip(months, months[1:])
+    ]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames).reset_index()
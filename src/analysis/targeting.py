@@ -0,0 +1,327 @@
+"""Credibility-weighted targeting of low-risk segments.
+
+Every combination of the configured dimensions (Province, Province x
+Gender, Province x VehicleType x make, ...) is evaluated as a set of
+segments. Within each combination the Bühlmann-Straub model, with
+transaction months as periods and premium as weights, shrinks each
+segment's loss ratio towards the combination's overall loss ratio by its
+credibility ``Z = P / (P + s2 / a)``. Here ``s2`` is the expected
+within-segment variance and ``a`` the variance between segments.
+
+Confidence bounds come from a parametric bootstrap. The claim count is
+drawn from its Jeffreys posterior and the claim amount from a Gamma with
+the portfolio's severity coefficient of variation. Each replicate goes
+through the same credibility weighting. Segments whose upper bound is
+below the target loss ratio are candidates for a premium reduction and
+are ranked by how far the premium could drop before reaching the target.
+
+Rows are encoded and summed to cells once. Each combination is then
+reduced with ``np.unique``/``bincount`` over the cells, and bootstrap
+replicates are shared by segments with the same claim count, so no step
+loops over individual segments.
+"""
+
+import os
+from itertools import combinations
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from ..data_scripts.schema import resolve_column
+from ..utils.logger import get_logger
+from ..utils.profiling import profiled
+
+logger = get_logger(__name__)
+
+DEFAULT_DIMENSIONS = ('Province', 'VehicleType', 'Gender', 'make')
+MISSING_LABEL = '(missing)'
+
+
+class SegmentTargeter:
+    """Finds segments whose premium can be lowered with confidence.
+
+    Args:
+        dimensions: Categorical dimensions whose combinations form segments
+        max_order: Most dimensions combined in one segment; all by default
+        min_rows: Segments with fewer rows are not evaluated
+        n_bootstrap: Bootstrap replicates per distinct claim count
+        confidence: Two-sided confidence level of the bounds
+        target_loss_ratio: Loss ratio a reduced premium must still meet;
+            defaults to the portfolio loss ratio
+        random_state: Bootstrap seed
+    """
+
+    def __init__(self, dimensions: Iterable[str] = DEFAULT_DIMENSIONS,
+                 max_order: Optional[int] = None, min_rows: int = 30,
+                 n_bootstrap: int = 2000, confidence: float = 0.9,
+                 target_loss_ratio: Optional[float] = None,
+                 random_state: int = 0):
+        self.dimensions = list(dimensions)
+        self.max_order = max_order
+        self.min_rows = min_rows
+        self.n_bootstrap = n_bootstrap
+        if not 0 < confidence < 1:
+            raise ValueError("confidence must be between 0 and 1")
+        self.confidence = confidence
+        self.target_loss_ratio = target_loss_ratio
+        self.random_state = random_state
+
+    @classmethod
+    def from_config(cls, config_manager) -> 'SegmentTargeter':
+        """Build a targeter from the ``targeting`` config section."""
+        settings = config_manager.get('targeting', {}) or {}
+        return cls(
+            dimensions=settings.get('dimensions', DEFAULT_DIMENSIONS),
+            max_order=settings.get('max_order'),
+            min_rows=settings.get('min_rows', 30),
+            n_bootstrap=settings.get('n_bootstrap', 2000),
+            confidence=settings.get('confidence', 0.9),
+            target_loss_ratio=settings.get('target_loss_ratio'),
+            random_state=settings.get('random_state', 0)
+        )
+
+    @profiled('targeting.run')
+    def run(self, df: pd.DataFrame, output_path: Optional[str] = None) -> pd.DataFrame:
+        """Evaluate every segment, rank the candidates and export them.
+
+        Args:
+            df: Cleaned frame with the dimensions, ``TransactionMonth``,
+                ``TotalPremium``, ``TotalClaims`` and ``HasClaim``
+            output_path: CSV or Parquet file for the ranked candidates
+
+        Returns:
+            Ranked candidates, as returned by ``rank``
+        """
+        try:
+            ranked = self.rank(self.evaluate(df))
+            if output_path:
+                self.export(ranked, output_path)
+            return ranked
+        except Exception as e:
+            logger.error(f"Segment targeting failed: {str(e)}")
+            raise
+
+    @profiled('targeting.evaluate')
+    def evaluate(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Credibility-weighted loss ratio and bounds of every segment.
+
+        Args:
+            df: Cleaned frame, as for ``run``
+
+        Returns:
+            One row per segment with at least ``min_rows`` rows: the
+            dimension values (missing for dimensions not in the segment),
+            ``Dimensions``, ``Segment``, ``Order``, ``Rows``, ``Premium``,
+            ``Claims``, ``ClaimCount``, ``Months``, ``LossRatio``,
+            ``Credibility``, ``CredibleLossRatio``, ``LowerBound`` and
+            ``UpperBound``
+        """
+        cells = self._cells(df)
+        names = list(cells['levels'])
+        max_order = min(self.max_order or len(names), len(names))
+        frames = []
+        for order in range(1, max_order + 1):
+            for combo in combinations(range(len(names)), order):
+                frames.append(self._combination(cells, combo))
+        segments = pd.concat(frames, ignore_index=True)
+        segments = segments[names + [c for c in segments.columns if c not in names]]
+        lower, upper = self._bootstrap(segments, cells['severity_cv2'])
+        segments['LowerBound'] = lower
+        segments['UpperBound'] = upper
+        segments = segments.drop(columns=['CollectiveLossRatio'])
+        segments.attrs['portfolio_loss_ratio'] = cells['portfolio_loss_ratio']
+        logger.info("Evaluated segments", segments=len(segments),
+                    combinations=len(frames), dimensions=names)
+        return segments
+
+    def rank(self, segments: pd.DataFrame) -> pd.DataFrame:
+        """Segments whose upper bound is below the target, best first.
+
+        Segments without credibility carry no evidence of their own and
+        are never candidates, whatever their bounds.
+        ``PremiumReduction`` is the share by which the premium could
+        fall before the upper bound reaches the target loss ratio.
+        """
+        target = self.target_loss_ratio or segments.attrs.get('portfolio_loss_ratio')
+        if target is None:
+            raise ValueError("target_loss_ratio is required for segments without a portfolio loss ratio")
+        credible = (segments['Credibility'] > 0) & (segments['UpperBound'] < target)
+        candidates = segments[credible].copy()
+        candidates['TargetLossRatio'] = target
+        candidates['PremiumReduction'] = 1 - candidates['UpperBound'] / target
+        candidates = candidates.sort_values(
+            ['PremiumReduction', 'Premium'], ascending=False, ignore_index=True
+        )
+        candidates.insert(0, 'Rank', np.arange(1, len(candidates) + 1))
+        return candidates
+
+    @staticmethod
+    def export(ranked: pd.DataFrame, path: str) -> Path:
+        """Write the ranked segments to CSV, or Parquet by extension."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + '.tmp')
+        if path.suffix == '.parquet':
+            ranked.to_parquet(tmp_path, index=False)
+        else:
+            ranked.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        logger.info(f"Saved {len(ranked)} ranked segments: {path}")
+        return path
+
+    def _cells(self, df: pd.DataFrame) -> dict:
+        """Encode the rows and sum them into dimension x month cells."""
+        levels, codes = {}, []
+        for name in self.dimensions:
+            column = resolve_column(name, df.columns)
+            if column is None:
+                logger.warning(f"Targeting dimension {name} not in data, skipping")
+                continue
+            code, uniques = pd.factorize(df[column], use_na_sentinel=True)
+            # Missing values become their own last level
+            levels[column] = np.append(uniques.astype(str), MISSING_LABEL)
+            codes.append(np.where(code < 0, len(uniques), code))
+        if not codes:
+            raise KeyError(f"None of the targeting dimensions are in the data: {self.dimensions}")
+
+        month_column = resolve_column('TransactionMonth', df.columns)
+        if month_column is None:
+            raise KeyError("Column not found: TransactionMonth")
+        month, _ = pd.factorize(df[month_column].to_numpy().astype('datetime64[M]'),
+                                use_na_sentinel=False)
+        premium = self._numeric(df, 'TotalPremium')
+        claims = self._numeric(df, 'TotalClaims')
+        if resolve_column('HasClaim', df.columns) is not None:
+            count = self._numeric(df, 'HasClaim')
+        else:
+            count = (claims > 0).astype(float)
+
+        shape = [len(v) for v in levels.values()] + [int(month.max()) + 1 if len(month) else 1]
+        keys, cell = np.unique(np.ravel_multi_index(codes + [month], shape), return_inverse=True)
+        positive = np.where(count > 0, claims, 0.0)
+        severity = positive[positive > 0]
+        mean = severity.mean() if len(severity) else 0.0
+        total_premium = premium.sum()
+        return {
+            'levels': levels,
+            'codes': np.unravel_index(keys, shape),
+            'rows': np.bincount(cell, minlength=len(keys)),
+            'premium': np.bincount(cell, weights=premium, minlength=len(keys)),
+            'claims': np.bincount(cell, weights=claims, minlength=len(keys)),
+            'count': np.bincount(cell, weights=count, minlength=len(keys)),
+            'portfolio_loss_ratio': claims.sum() / total_premium if total_premium > 0 else np.nan,
+            'severity_cv2': severity.var() / mean ** 2 if mean > 0 else 1.0,
+        }
+
+    def _combination(self, cells: dict, combo: tuple) -> pd.DataFrame:
+        """Bühlmann-Straub credibility of the segments of one combination."""
+        names = list(cells['levels'])
+        sizes = [len(cells['levels'][names[d]]) for d in combo]
+        segment_keys, segment = np.unique(
+            np.ravel_multi_index([cells['codes'][d] for d in combo], sizes),
+            return_inverse=True
+        )
+        n_segments = len(segment_keys)
+        n_months = int(cells['codes'][-1].max()) + 1
+
+        # Segment-month periods with positive premium are the observations
+        period_keys, period = np.unique(segment * n_months + cells['codes'][-1],
+                                        return_inverse=True)
+        period_premium = np.bincount(period, weights=cells['premium'])
+        period_claims = np.bincount(period, weights=cells['claims'])
+        period_segment = period_keys // n_months
+        valid = period_premium > 0
+        owner = period_segment[valid]
+        weights = period_premium[valid]
+        premium = np.bincount(owner, weights=weights, minlength=n_segments)
+        claims = np.bincount(owner, weights=period_claims[valid], minlength=n_segments)
+        months = np.bincount(owner, minlength=n_segments)
+        squares = np.bincount(owner, weights=period_claims[valid] ** 2 / weights,
+                              minlength=n_segments)
+
+        observed = premium > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            loss_ratio = np.where(observed, claims / premium, np.nan)
+        total = premium.sum()
+        collective = claims.sum() / total if total > 0 else np.nan
+        # Expected process variance from the spread of months within segments
+        dof = np.clip(months - 1, 0, None).sum()
+        within = (squares[observed] - claims[observed] ** 2 / premium[observed]).sum()
+        s2 = within / dof if dof > 0 else 0.0
+        # Variance of the hypothetical means between segments
+        n_observed = int(observed.sum())
+        spread = (premium[observed] * (loss_ratio[observed] - collective) ** 2).sum()
+        denominator = total - (premium ** 2).sum() / total if total > 0 else 0.0
+        a = (spread - (n_observed - 1) * s2) / denominator if denominator > 0 else 0.0
+        if a > 0:
+            credibility = premium / (premium + s2 / a)
+        else:
+            credibility = np.zeros(n_segments)
+        credible = np.where(observed, credibility * np.nan_to_num(loss_ratio)
+                            + (1 - credibility) * collective, collective)
+
+        rows = np.bincount(segment, weights=cells['rows'], minlength=n_segments)
+        frame = pd.DataFrame({
+            'Order': len(combo),
+            'Rows': rows.astype(np.int64),
+            'Premium': premium,
+            'Claims': claims,
+            'ClaimCount': np.bincount(segment, weights=cells['count'], minlength=n_segments),
+            'Months': months,
+            'LossRatio': loss_ratio,
+            'Credibility': credibility,
+            'CredibleLossRatio': credible,
+            'CollectiveLossRatio': collective,
+        })
+        level_codes = np.unravel_index(segment_keys, sizes)
+        labels = []
+        for d, codes in zip(combo, level_codes):
+            values = cells['levels'][names[d]][codes]
+            frame.insert(len(labels), names[d], values)
+            labels.append(names[d] + '=' + frame[names[d]])
+        frame.insert(len(combo), 'Dimensions', ' x '.join(names[d] for d in combo))
+        frame.insert(len(combo) + 1, 'Segment', labels[0].str.cat(labels[1:], sep=', '))
+        return frame[frame['Rows'] >= self.min_rows].reset_index(drop=True)
+
+    def _bootstrap(self, segments: pd.DataFrame, severity_cv2: float):
+        """Percentile bounds of the credibility-weighted loss ratio.
+
+        A replicate draws the claim rate from its Jeffreys posterior
+        ``Gamma(count + 1/2)``, the claim count from a Poisson and the
+        claim amount from ``severity * cv2 * Gamma(count* / cv2)``. The
+        amount over the segment's severity therefore depends only on the
+        observed claim count, and the credibility-weighted loss ratio is
+        increasing in it, so replicates are drawn once per distinct claim
+        count and their quantiles scaled to each segment.
+        """
+        alpha = (1 - self.confidence) / 2
+        count = np.rint(segments['ClaimCount'].to_numpy())
+        claims = segments['Claims'].to_numpy()
+        premium = segments['Premium'].to_numpy()
+        # Claim-free segments borrow the average severity
+        fallback = claims.sum() / max(count.sum(), 1)
+        severity = np.divide(claims, count, out=np.full(len(count), fallback),
+                             where=(count > 0) & (claims > 0))
+
+        counts, index = np.unique(count, return_inverse=True)
+        rng = np.random.default_rng(self.random_state)
+        rate = rng.gamma(counts[:, None] + 0.5, size=(len(counts), self.n_bootstrap))
+        drawn = rng.poisson(rate)
+        ratio = np.zeros(drawn.shape)
+        positive = drawn > 0
+        ratio[positive] = rng.gamma(drawn[positive] / severity_cv2, severity_cv2)
+        quantiles = np.quantile(ratio, [alpha, 1 - alpha], axis=1)[:, index]
+
+        scale = np.divide(segments['Credibility'].to_numpy() * severity, premium,
+                          out=np.zeros(len(premium)), where=premium > 0)
+        base = (1 - segments['Credibility'].to_numpy()) * segments['CollectiveLossRatio'].to_numpy()
+        return base + scale * quantiles[0], base + scale * quantiles[1]
+
+    @staticmethod
+    def _numeric(df: pd.DataFrame, name: str) -> np.ndarray:
+        column = resolve_column(name, df.columns)
+        if column is None:
+            raise KeyError(f"Column not found: {name}")
+        return pd.to_numeric(df[column], errors='coerce').fillna(0.0).to_numpy(dtype=float)
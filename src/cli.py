@@ -0,0 +1,356 @@
+"""Command-line interface for insurance risk analytics.
+
+Subcommands run one pipeline stage each (``load``, ``clean``, ``eda``,
+``test``, ``target``, ``train``, ``glm``), the whole stage graph (``run``) or
+the premium scorer (``score``). ``snapshot`` and ``checkout`` store and
+restore versions of the raw data files::
+
+    python -m src.cli clean --config config/settings.yml
+    python -m src.cli train --force
+    python -m src.cli score quotes.csv --output premiums.csv
+    python -m src.cli score --serve --port 8080
+    python -m src.cli snapshot
+    python -m src.cli checkout <hash> data/raw/MachineLearningRating_v3.txt
+
+Only typer and the standard library are imported at module load. Each
+command imports what it needs when it runs, so ``--help`` and the data
+commands never load matplotlib, seaborn, scipy, scikit-learn, xgboost
+or shap.
+"""
+
+import json
+import sys
+from pathlib import Path
+from typing import Annotated, Iterable, List, Optional
+
+import typer
+
+app = typer.Typer(
+    help="Insurance risk analytics pipeline.",
+    add_completion=False,
+    no_args_is_help=True,
+)
+
+DEFAULT_CONFIG = 'config/settings.yml'
+
+ConfigOption = Annotated[str, typer.Option('--config', '-c', help="YAML configuration file")]
+ForceOption = Annotated[bool, typer.Option(
+    '--force', help="Re-run the stage and its downstream stages even if cached"
+)]
+NoCacheOption = Annotated[bool, typer.Option(
+    '--no-stage-cache', help="Ignore cached stage artifacts"
+)]
+ExecutorOption = Annotated[Optional[str], typer.Option(
+    help="Run feature/cleaning stages 'serial' or on a 'process' pool"
+)]
+WorkersOption = Annotated[Optional[int], typer.Option(
+    help="Worker processes for the process executor"
+)]
+PartitionOption = Annotated[Optional[str], typer.Option(
+    help="Partition by 'rows' or by a column such as Province"
+)]
+IncrementalOption = Annotated[Optional[bool], typer.Option(
+    '--incremental/--full',
+    help="Process only new or changed months into the monthly store, or rebuild in full"
+)]
+
+
+def _setup(config_path: str):
+    """Configure logging and profiling and load the configuration."""
+    from .utils import profiling
+    from .utils.config import ConfigManager
+    from .utils.logger import setup_logging
+    setup_logging()
+    config = ConfigManager(config_path)
+    profiling.configure_from(config)
+    return config
+
+
+def _write_profile(manager, **metadata):
+    """Write the profiling run report if one is configured."""
+    from .utils import profiling
+    report_path = manager.get('profiling.report_path')
+    if manager.get('profiling.enabled', True) and report_path:
+        profiling.write_report(report_path, **metadata)
+
+
+def run_pipeline(config_path: str = DEFAULT_CONFIG,
+                 stages: Optional[List[str]] = None,
+                 force: Iterable[str] = (),
+                 executor: Optional[str] = None,
+                 workers: Optional[int] = None,
+                 partition_by: Optional[str] = None,
+                 incremental: Optional[bool] = None,
+                 use_cache: Optional[bool] = None) -> dict:
+    """Run the stage graph for ``stages`` and whatever they depend on.
+
+    Args:
+        config_path: YAML configuration file
+        stages: Target stages; defaults to the whole pipeline
+        force: Stages to re-run even if cached
+        executor: See ``build_pipeline``
+        workers: See ``build_pipeline``
+        partition_by: See ``build_pipeline``
+        incremental: See ``build_pipeline``
+        use_cache: See ``build_pipeline``
+
+    Returns:
+        Outputs of the target stages keyed by stage name
+    """
+    config = _setup(config_path)
+    from .pipeline.stages import build_pipeline
+    runner = build_pipeline(
+        config, executor=executor, workers=workers, partition_by=partition_by,
+        incremental=incremental, use_cache=use_cache
+    )
+    try:
+        return runner.run(targets=stages, force=force)
+    finally:
+        _write_profile(config, config=config_path, stages=stages)
+
+
+def _run_stage(stage: str, config: str, force: bool, no_stage_cache: bool,
+               executor: Optional[str], workers: Optional[int],
+               partition_by: Optional[str], incremental: Optional[bool]):
+    return run_pipeline(
+        config, stages=[stage], force=[stage] if force else [],
+        executor=executor, workers=workers, partition_by=partition_by,
+        incremental=incremental, use_cache=False if no_stage_cache else None
+    )[stage]
+
+
+@app.command()
+def run(
+    config: ConfigOption = DEFAULT_CONFIG,
+    stages: Annotated[Optional[List[str]], typer.Option(
+        '--stage', help="Run only this stage and its dependencies (repeatable)"
+    )] = None,
+    force: Annotated[Optional[List[str]], typer.Option(
+        '--force', help="Re-run this stage and its downstream stages (repeatable)"
+    )] = None,
+    no_stage_cache: NoCacheOption = False,
+    executor: ExecutorOption = None,
+    workers: WorkersOption = None,
+    partition_by: PartitionOption = None,
+    incremental: IncrementalOption = None,
+):
+    """Run the end-to-end pipeline."""
+    run_pipeline(
+        config, stages=stages or None, force=force or [], executor=executor,
+        workers=workers, partition_by=partition_by, incremental=incremental,
+        use_cache=False if no_stage_cache else None
+    )
+    typer.echo("Pipeline executed successfully!")
+
+
+@app.command()
+def load(
+    config: ConfigOption = DEFAULT_CONFIG,
+    no_cache: Annotated[bool, typer.Option(
+        '--no-cache', help="Parse the raw file instead of reading the Parquet cache"
+    )] = False,
+):
+    """Load the raw data (refreshing the Parquet cache) and describe it."""
+    manager = _setup(config)
+    from .data_scripts.loader import InsuranceDataLoader
+    try:
+        df = InsuranceDataLoader(manager).load_raw_data(use_cache=False if no_cache else None)
+    finally:
+        _write_profile(manager, config=config, command='load')
+    typer.echo(
+        f"Loaded {len(df):,} rows x {df.shape[1]} columns "
+        f"({df.memory_usage(deep=True).sum() / 1e6:.1f} MB)"
+    )
+
+
+@app.command()
+def snapshot(
+    paths: Annotated[Optional[List[Path]], typer.Argument(
+        help="Files to store; defaults to dvc.tracked_files", exists=True, dir_okay=False
+    )] = None,
+    config: ConfigOption = DEFAULT_CONFIG,
+):
+    """Store data files in the content-addressed remote and print their hashes."""
+    manager = _setup(config)
+    from .data_scripts.versioning import DVCManager
+    paths = paths or [Path(p) for p in manager.get('dvc.tracked_files') or []]
+    if not paths:
+        raise typer.BadParameter("Pass files to store or set dvc.tracked_files")
+    dvc = DVCManager.from_config(manager)
+    with dvc.batch():
+        for path in paths:
+            typer.echo(f"{dvc.add(path)}  {path}")
+
+
+@app.command()
+def checkout(
+    digest: Annotated[str, typer.Argument(help="Content hash printed by snapshot")],
+    target: Annotated[Path, typer.Argument(help="File to create or replace")],
+    config: ConfigOption = DEFAULT_CONFIG,
+):
+    """Restore a stored data file version from the remote."""
+    manager = _setup(config)
+    from .data_scripts.versioning import DVCManager
+    link_type = DVCManager.from_config(manager).checkout(digest, target)
+    typer.echo(f"Checked out {digest[:12]} to {target} ({link_type})")
+
+
+@app.command()
+def clean(
+    config: ConfigOption = DEFAULT_CONFIG,
+    force: ForceOption = False,
+    no_stage_cache: NoCacheOption = False,
+    executor: ExecutorOption = None,
+    workers: WorkersOption = None,
+    partition_by: PartitionOption = None,
+    incremental: IncrementalOption = None,
+):
+    """Load, derive features and clean; writes the processed dataset."""
+    df = _run_stage('clean', config, force, no_stage_cache, executor, workers,
+                    partition_by, incremental)
+    typer.echo(f"Cleaned data: {len(df):,} rows x {df.shape[1]} columns")
+
+
+@app.command()
+def eda(
+    config: ConfigOption = DEFAULT_CONFIG,
+    force: ForceOption = False,
+    no_stage_cache: NoCacheOption = False,
+    incremental: IncrementalOption = None,
+):
+    """Quality report, risk cube and figures."""
+    report = _run_stage('eda', config, force, no_stage_cache, None, None, None, incremental)
+    missing = report['missing_values']
+    typer.echo(f"Quality report: {len(report['numeric_stats'])} numeric columns, "
+               f"{int((missing['missing_count'] > 0).sum())} with missing values")
+
+
+@app.command()
+def test(
+    config: ConfigOption = DEFAULT_CONFIG,
+    force: ForceOption = False,
+    no_stage_cache: NoCacheOption = False,
+    incremental: IncrementalOption = None,
+):
+    """Hypothesis tests on provincial and gender risk."""
+    results = _run_stage('hypothesis', config, force, no_stage_cache,
+                         None, None, None, incremental)
+    for name, result in results.items():
+        columns = ['metric', 'test', 'p_value', 'p_adjusted', 'reject']
+        typer.echo(f"{name}:\n{result[columns].to_string(index=False)}\n")
+
+
+@app.command()
+def target(
+    config: ConfigOption = DEFAULT_CONFIG,
+    force: ForceOption = False,
+    no_stage_cache: NoCacheOption = False,
+    incremental: IncrementalOption = None,
+    top: Annotated[int, typer.Option(help="Candidates to print")] = 20,
+):
+    """Rank low-risk segments for premium reduction."""
+    ranked = _run_stage('targeting', config, force, no_stage_cache,
+                        None, None, None, incremental)
+    columns = ['Rank', 'Segment', 'Rows', 'CredibleLossRatio', 'UpperBound', 'PremiumReduction']
+    typer.echo(f"{len(ranked)} candidate segments")
+    if len(ranked):
+        typer.echo(ranked[columns].head(top).to_string(index=False))
+
+
+@app.command()
+def train(
+    config: ConfigOption = DEFAULT_CONFIG,
+    force: ForceOption = False,
+    no_stage_cache: NoCacheOption = False,
+    incremental: IncrementalOption = None,
+):
+    """Train (or resume) the claim risk models."""
+    results = _run_stage('model', config, force, no_stage_cache,
+                         None, None, None, incremental)
+    for name, result in results.items():
+        if name.startswith('_'):
+            continue
+        metrics = '  '.join(f"{k}={v:.4g}" for k, v in result['metrics'].items())
+        typer.echo(f"{name:<15} {metrics}{'  (resumed)' if result['resumed'] else ''}")
+
+
+@app.command()
+def glm(
+    config: ConfigOption = DEFAULT_CONFIG,
+    force: ForceOption = False,
+    no_stage_cache: NoCacheOption = False,
+    incremental: IncrementalOption = None,
+):
+    """Fit the frequency, severity and pure-premium GLMs."""
+    results = _run_stage('glm', config, force, no_stage_cache, None, None, None, incremental)
+    typer.echo(results['summary'].to_string(index=False))
+
+
+def _read_quotes(path: Path):
+    """Read quotes from CSV, JSON (one quote or a list) or JSON lines."""
+    import pandas as pd
+    if path.suffix == '.csv':
+        return pd.read_csv(path)
+    if path.suffix == '.jsonl':
+        return pd.read_json(path, lines=True)
+    with open(path) as f:
+        quotes = json.load(f)
+    return pd.DataFrame([quotes] if isinstance(quotes, dict) else quotes)
+
+
+@app.command()
+def score(
+    quotes: Annotated[Optional[Path], typer.Argument(
+        help="Quotes as .csv, .json or .jsonl", exists=True, dir_okay=False
+    )] = None,
+    config: ConfigOption = DEFAULT_CONFIG,
+    model: Annotated[Optional[str], typer.Option(
+        help="Model checkpoint; defaults to scoring.model"
+    )] = None,
+    output: Annotated[Optional[Path], typer.Option(
+        '--output', '-o', help="CSV file for the premiums (default: stdout)"
+    )] = None,
+    serve: Annotated[bool, typer.Option(
+        '--serve', help="Run the local HTTP scoring endpoint instead"
+    )] = False,
+    host: Annotated[Optional[str], typer.Option(help="Endpoint interface")] = None,
+    port: Annotated[Optional[int], typer.Option(help="Endpoint port")] = None,
+):
+    """Price quotes from a file, or serve them over HTTP."""
+    if not serve and quotes is None:
+        raise typer.BadParameter("Pass a quotes file or --serve")
+    manager = _setup(config)
+    from .modeling.scoring import PremiumScorer
+    scorer = PremiumScorer.from_artifacts(manager, model)
+
+    if serve:
+        from .modeling.scoring import serve as serve_http
+        server = serve_http(
+            scorer,
+            host=host or manager.get('scoring.host', '127.0.0.1'),
+            port=manager.get('scoring.port', 8080) if port is None else port,
+            max_batch=manager.get('scoring.max_batch', 1024),
+            max_wait_ms=manager.get('scoring.max_wait_ms', 0.0)
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return
+
+    result = _read_quotes(quotes)
+    # Missing fields reach the scorer as None, like absent JSON keys
+    present = result.astype(object).where(result.notna(), None)
+    for key, values in scorer.score(present.to_dict(orient='list')).items():
+        result[key] = values
+    if output is None:
+        result.to_csv(sys.stdout, index=False)
+    else:
+        result.to_csv(output, index=False)
+        typer.echo(f"Scored {len(result):,} quotes to {output}")
+
+
+if __name__ == '__main__':
+    app()
@@ -4,23 +4,75 @@ Implements data cleaning pipelines including missing value imputation,
 outlier handling, and categorical encoding.
 """
 
+import json
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
 import numpy as np
 import pandas as pd
+from .schema import resolve_column
 from ..utils.logger import get_logger
+from ..utils.profiling import profiled
+from ..utils.sketches import QuantileSketch
 
 logger = get_logger(__name__)
 
+FILL_UNKNOWN = 'Unknown'
+OTHER_CATEGORY = 'Other'
+TOP_K_CATEGORIES = 10
+DEFAULT_STATE_PATH = 'models/cleaner_state.json'
+STATE_VERSION = 1
+
+
+def _to_builtin(value):
+    """Convert NumPy scalars to JSON-serialisable Python values."""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _top_categories(counts: pd.Series, na_count: int, fill=None) -> list:
+    """Pick the most frequent categories, counting missing values as ``fill``."""
+    counts = counts[counts.index.notna()]
+    counts.index = counts.index.astype(object)
+    if fill is not None and na_count:
+        counts[fill] = counts.get(fill, 0) + na_count
+        counts = counts.sort_values(ascending=False, kind='stable')
+    return counts.head(TOP_K_CATEGORIES).index.tolist()
+
+
+def _upcast_for(values: np.ndarray, *stats) -> np.ndarray:
+    """Promote integer values to float when a statistic has a fraction.
+
+    Casting a fractional median or bound to the column's integer type
+    would truncate it.
+    """
+    if values.dtype.kind in 'iub' and any(float(v) != int(v) for v in stats):
+        return values.astype(np.float64)
+    return values
+
+
 class DataCleaner:
     """Implements configurable data cleaning pipeline.
     
+    All statistics the pipeline needs (fill values, medians, winsorize
+    bounds, top categories) are computed in one batched pass over the
+    input and then applied column by column without intermediate copies.
+    
+    ``fit`` learns the statistics and ``transform`` applies them, so new
+    batches can be cleaned against frozen statistics saved with
+    ``save_state`` and restored with ``load_state``.
+    
     Args:
         strategy_config: Dictionary of cleaning strategies
     """
     
     def __init__(self, strategy_config: dict):
         self.strategies = strategy_config
-        
-    def clean(self, df: pd.DataFrame) -> pd.DataFrame:
+        self.state_ = None
+    
+    def clean(self, df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
         """Apply complete cleaning pipeline.
         
         Pipeline includes:
@@ -29,75 +81,425 @@ class DataCleaner:
         3. Outlier treatment
         4. Categorical encoding
         
+        Statistics are learned from ``df`` itself; use ``fit`` and
+        ``transform`` to clean new batches against frozen statistics.
+        
+        Args:
+            df: DataFrame to clean
+            inplace: Modify ``df`` directly instead of cleaning a copy
+        
+        Returns:
+            Cleaned DataFrame
+        """
+        return self.fit(df).transform(df, inplace=inplace)
+    
+    def fit(self, df: pd.DataFrame) -> 'DataCleaner':
+        """Learn cleaning statistics from a DataFrame.
+        
+        Args:
+            df: DataFrame to learn fill values, medians, winsorize bounds
+                and top categories from
+            
+        Returns:
+            The fitted cleaner
+        """
+        try:
+            with self._timed_step('compute_statistics', df):
+                self.state_ = self._compute_statistics(df)
+            logger.info("Cleaning statistics fitted", rows=len(df))
+            return self
+        except Exception as e:
+            logger.error(f"Cleaning failed: {str(e)}")
+            raise
+    
+    def transform(self, df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+        """Clean a DataFrame with the fitted statistics.
+        
         Args:
             df: DataFrame to clean
+            inplace: Modify ``df`` directly instead of cleaning a copy
             
         Returns:
             Cleaned DataFrame
+            
+        Raises:
+            RuntimeError: If the cleaner has not been fitted or loaded
         """
+        if self.state_ is None:
+            raise RuntimeError("DataCleaner must be fitted or loaded before transform")
         try:
-            df = self._handle_missing_values(df)
-            df = self._fix_numeric_columns(df)
-            df = self._winsorize_outliers(df)
-            df = self._encode_categoricals(df)
+            if not inplace:
+                df = df.copy()
+            stats = self._present_statistics(df)
+            with self._timed_step('missing_values', df):
+                self._handle_missing_values(df, stats)
+            with self._timed_step('numeric_columns', df):
+                self._fix_numeric_columns(df, stats)
+            with self._timed_step('winsorize', df):
+                self._winsorize_outliers(df, stats)
+            with self._timed_step('encode_categoricals', df):
+                self._encode_categoricals(df, stats)
             logger.info("Data cleaning completed")
             return df
         except Exception as e:
             logger.error(f"Cleaning failed: {str(e)}")
             raise
     
-    def _handle_missing_values(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Handle missing values with exact column name matching."""
-        for col, strategy in self.strategies['missing_values'].items():
-            # Use exact column name from config
-            if col not in df.columns:
-                available_cols = [c for c in df.columns if c.lower() == col.lower()]
-                if available_cols:
-                    logger.warning(f"Using {available_cols[0]} instead of {col}")
-                    col = available_cols[0]  # Use case-insensitive match if found
-                else:
-                    logger.warning(f"Column {col} not found in DataFrame. Available columns: {list(df.columns)}")
-                    continue
-                    
-            if strategy == 'fill_mode':
-                df[col] = df[col].fillna(df[col].mode()[0])
-            elif strategy == 'fill_median':
-                df[col] = df[col].fillna(df[col].median())
-            elif strategy == 'fill_unknown':
-                df[col] = df[col].fillna('Unknown')
-        
-        return df
-    
-    def _fix_numeric_columns(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Handle zero/invalid values in numeric columns."""
-        for col in self.strategies['numeric_columns']:
-            df[col] = df[col].replace(0, np.nan).fillna(df[col].median())
-        return df
-    
-    def _winsorize_outliers(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Winsorize numeric columns while preserving NaN values."""
-        from scipy.stats import mstats
-        
-        for col in self.strategies['outlier_columns']:
-            if col not in df.columns:
-                continue
-                
-            # Preserve original index and NA values
-            mask = df[col].notna()
-            if mask.any():  # Only process if non-NA values exist
-                winsorized = mstats.winsorize(
-                    df.loc[mask, col].values,
-                    limits=self.strategies['winsorize_limits']
-                )
-                df.loc[mask, col] = winsorized
-                
-        return df
-    
-    def _encode_categoricals(self, df: pd.DataFrame) -> pd.DataFrame:
+    def fit_transform(self, df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+        """Fit on a DataFrame and clean it (alias of ``clean``)."""
+        return self.clean(df, inplace=inplace)
+    
+    def fit_stream(self, chunks: Iterable[pd.DataFrame]) -> 'DataCleaner':
+        """Learn cleaning statistics from a stream of chunks.
+        
+        Accumulates mergeable statistics (value counts and quantile
+        sketches) chunk by chunk, so the full data never has to fit in
+        memory. Medians and winsorize bounds are approximate.
+        
+        Args:
+            chunks: Iterable of DataFrame chunks with the same columns
+            
+        Returns:
+            The fitted cleaner
+            
+        Raises:
+            ValueError: If the stream is empty
+        """
+        try:
+            accumulator = None
+            rows = 0
+            for chunk in chunks:
+                if accumulator is None:
+                    accumulator = StreamingStatistics(
+                        self._plan(chunk.columns),
+                        self.strategies.get('winsorize_limits', [0, 0])
+                    )
+                accumulator.update(chunk)
+                rows += len(chunk)
+            if accumulator is None:
+                raise ValueError("Cannot fit DataCleaner on an empty stream")
+            self.state_ = accumulator.finalize()
+            logger.info("Cleaning statistics fitted from stream", rows=rows)
+            return self
+        except Exception as e:
+            logger.error(f"Cleaning failed: {str(e)}")
+            raise
+    
+    def transform_stream(self, chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """Clean a stream of chunks with the fitted statistics.
+        
+        Chunks are cleaned in place, so callers should not reuse them.
+        
+        Args:
+            chunks: Iterable of DataFrame chunks
+            
+        Yields:
+            Cleaned chunks
+        """
+        for chunk in chunks:
+            yield self.transform(chunk, inplace=True)
+    
+    def save_state(self, path: Optional[str] = None) -> Path:
+        """Persist the fitted statistics as a small JSON artifact.
+        
+        Args:
+            path: Output file; defaults to ``state_path`` in the strategies
+            
+        Returns:
+            Path of the written file
+            
+        Raises:
+            RuntimeError: If the cleaner has not been fitted
+        """
+        if self.state_ is None:
+            raise RuntimeError("DataCleaner must be fitted before saving state")
+        path = Path(path or self.strategies.get('state_path', DEFAULT_STATE_PATH))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            'version': STATE_VERSION,
+            'strategies': self.strategies,
+            'state': self.state_,
+        }
+        with open(path, 'w') as f:
+            json.dump(payload, f, indent=2, default=_to_builtin)
+        logger.info(f"Saved cleaning state: {path}")
+        return path
+    
+    def load_state(self, path: Optional[str] = None,
+                   require_strategies: bool = False) -> 'DataCleaner':
+        """Load statistics saved by ``save_state``.
+        
+        Args:
+            path: State file; defaults to ``state_path`` in the strategies
+            require_strategies: Reject a state fitted with different
+                strategies instead of only warning
+            
+        Returns:
+            The cleaner, ready to ``transform``
+            
+        Raises:
+            FileNotFoundError: If the state file doesn't exist
+            ValueError: If the file was written by an incompatible version,
+                or with different strategies when ``require_strategies``
+        """
+        path = Path(path or self.strategies.get('state_path', DEFAULT_STATE_PATH))
+        if not path.exists():
+            raise FileNotFoundError(f"Cleaning state not found: {path}")
+        with open(path) as f:
+            payload = json.load(f)
+        if payload.get('version') != STATE_VERSION:
+            raise ValueError(
+                f"Unsupported cleaning state version {payload.get('version')} in {path}")
+        if payload.get('strategies') != json.loads(json.dumps(self.strategies, default=_to_builtin)):
+            if require_strategies:
+                raise ValueError(f"Cleaning state {path} was fitted with different strategies")
+            logger.warning(f"Cleaning state {path} was fitted with different strategies")
+        self.state_ = payload['state']
+        logger.info(f"Loaded cleaning state: {path}")
+        return self
+    
+    def _present_statistics(self, df: pd.DataFrame) -> dict:
+        """Restrict the fitted statistics to columns present in ``df``."""
+        present = set(df.columns)
+        stats = {}
+        for key, values in self.state_.items():
+            stats[key] = {col: v for col, v in values.items() if col in present}
+            absent = set(values) - present
+            if absent:
+                logger.warning(f"Columns missing from batch, skipped in {key}: {sorted(absent)}")
+        return stats
+    
+    def _compute_statistics(self, df: pd.DataFrame) -> dict:
+        """Compute every statistic the cleaning steps need in one pass.
+        
+        Statistics are taken from the input before any step runs, so
+        medians and winsorize bounds ignore the values missing-value
+        handling fills in. Zeros are excluded from numeric-correction
+        medians, and the filled values do count towards the top
+        categories.
+        """
+        plan = self._plan(df.columns)
+        
+        # Missing value fills
+        fill_values = {col: FILL_UNKNOWN for col in plan['fill_unknown']}
+        if plan['fill_mode']:
+            modes = df[plan['fill_mode']].mode()
+            if len(modes):
+                fill_values.update(modes.iloc[0].dropna().to_dict())
+        if plan['fill_median']:
+            fill_values.update(df[plan['fill_median']].median().dropna().to_dict())
+        
+        # Medians of valid (non-zero) values for numeric correction
+        numeric_medians = {}
+        if plan['numeric']:
+            numeric = df[plan['numeric']]
+            numeric_medians = numeric.where(numeric.ne(0)).median().dropna().to_dict()
+        
+        # Winsorize bounds as exact order statistics
+        lower, upper = self.strategies.get('winsorize_limits', [0, 0])
+        winsorize_bounds = {}
+        for col in plan['outlier']:
+            values = df[col].to_numpy(dtype=float, na_value=np.nan)
+            values = values[~np.isnan(values)]
+            if values.size:
+                winsorize_bounds[col] = self._order_statistic_bounds(values, lower, upper)
+        
+        # Top categories, counting the values missing handling will fill in
+        top_categories = {
+            col: _top_categories(
+                df[col].value_counts(), df[col].isna().sum(), fill_values.get(col)
+            )
+            for col in plan['high_cardinality']
+        }
+        
+        return {
+            'fill_values': fill_values,
+            'numeric_medians': numeric_medians,
+            'winsorize_bounds': winsorize_bounds,
+            'top_categories': top_categories,
+        }
+    
+    def _plan(self, columns) -> dict:
+        """Resolve the configured columns of every cleaning step."""
+        plan = {'fill_unknown': [], 'fill_mode': [], 'fill_median': []}
+        for name, strategy in self.strategies.get('missing_values', {}).items():
+            col = self._resolve(columns, name)
+            if col is not None and strategy in plan:
+                plan[strategy].append(col)
+        plan['numeric'] = self._resolve_all(columns, 'numeric_columns')
+        plan['outlier'] = self._resolve_all(columns, 'outlier_columns')
+        plan['high_cardinality'] = self._resolve_all(columns, 'high_cardinality_cols')
+        return plan
+    
+    def _handle_missing_values(self, df: pd.DataFrame, stats: dict):
+        """Fill missing values with the precomputed fill values."""
+        fill_values = stats['fill_values']
+        for col, value in fill_values.items():
+            series = df[col]
+            if (isinstance(series.dtype, pd.CategoricalDtype)
+                    and value not in series.cat.categories):
+                df[col] = series.cat.add_categories([value])
+        if fill_values:
+            df.fillna(value=fill_values, inplace=True)
+    
+    def _fix_numeric_columns(self, df: pd.DataFrame, stats: dict):
+        """Replace zero/invalid values in numeric columns with the median."""
+        for col, median in stats['numeric_medians'].items():
+            values = df[col].to_numpy()
+            invalid = (values == 0) | pd.isna(values)
+            if invalid.any():
+                values = _upcast_for(values, median)
+                df[col] = np.where(invalid, values.dtype.type(median), values)
+    
+    def _winsorize_outliers(self, df: pd.DataFrame, stats: dict):
+        """Clip numeric columns to their winsorize bounds, preserving NaN."""
+        for col, (low, high) in stats['winsorize_bounds'].items():
+            values = _upcast_for(df[col].to_numpy(), low, high)
+            df[col] = np.clip(values, values.dtype.type(low), values.dtype.type(high))
+    
+    def _encode_categoricals(self, df: pd.DataFrame, stats: dict):
         """Reduce cardinality of high-dimension categoricals."""
-        high_cardinality = self.strategies.get('high_cardinality_cols', [])
-        for col in high_cardinality:
-            if col in df.columns:
-                top_categories = df[col].value_counts().head(10).index
-                df[col] = df[col].where(df[col].isin(top_categories), 'Other')
-        return df
\ No newline at end of file
+        for col, top in stats['top_categories'].items():
+            series = df[col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                # Recode categories rather than comparing every row
+                top = set(top)
+                kept = [cat for cat in series.cat.categories if cat in top]
+                series = series.cat.set_categories(kept)
+                if OTHER_CATEGORY not in kept:
+                    series = series.cat.add_categories([OTHER_CATEGORY])
+                df[col] = series.fillna(OTHER_CATEGORY)
+            else:
+                df[col] = series.where(series.isin(top), OTHER_CATEGORY)
+    
+    @staticmethod
+    def _order_statistic_bounds(values: np.ndarray, lower: float, upper: float) -> list:
+        """Find winsorize bounds matching ``scipy.stats.mstats.winsorize``.
+        
+        Uses a partial sort, so only the two order statistics are placed.
+        """
+        n = values.size
+        low_idx = int(lower * n)
+        high_idx = n - int(upper * n) - 1
+        bounds = np.partition(values, [low_idx, high_idx])
+        return [float(bounds[low_idx]), float(bounds[high_idx])]
+    
+    def _resolve_all(self, columns, key: str) -> list:
+        """Resolve every column listed under a strategy key."""
+        resolved = (self._resolve(columns, col) for col in self.strategies.get(key, []))
+        return [col for col in resolved if col is not None]
+    
+    def _resolve(self, columns, col: str):
+        """Match a configured column name, falling back to case-insensitive."""
+        resolved = resolve_column(col, columns)
+        if resolved is None:
+            logger.warning(f"Column {col} not found in DataFrame. Available columns: {list(columns)}")
+        elif resolved != col:
+            logger.warning(f"Using {resolved} instead of {col}")
+        return resolved
+    
+    @contextmanager
+    def _timed_step(self, step: str, df: pd.DataFrame):
+        """Profile a cleaning step, adding the frame memory delta."""
+        start_mem = df.memory_usage(deep=False).sum()
+        with profiled(f"clean.{step}", rows=len(df)) as span:
+            yield
+            span.extra['memory_delta_mb'] = round(
+                (df.memory_usage(deep=False).sum() - start_mem) / 1e6, 3
+            )
+
+
+class StreamingStatistics:
+    """Mergeable accumulators for fitting ``DataCleaner`` on chunk streams.
+    
+    Keeps value counts for mode and high-cardinality columns and quantile
+    sketches for median and winsorized columns. Accumulators built on
+    different chunks or workers can be combined with ``merge``.
+    
+    Args:
+        plan: Resolved columns per cleaning step (see ``DataCleaner._plan``)
+        winsorize_limits: Lower and upper winsorize fractions
+    """
+    
+    def __init__(self, plan: dict, winsorize_limits):
+        self.plan = plan
+        self.winsorize_limits = winsorize_limits
+        count_cols = plan['fill_mode'] + plan['high_cardinality']
+        self.counts = {col: pd.Series(dtype=float) for col in count_cols}
+        self.na_counts = {col: 0 for col in count_cols}
+        self.median_sketches = {col: QuantileSketch() for col in plan['fill_median']}
+        self.valid_sketches = {col: QuantileSketch() for col in plan['numeric']}
+        self.outlier_sketches = {col: QuantileSketch() for col in plan['outlier']}
+    
+    def update(self, chunk: pd.DataFrame) -> 'StreamingStatistics':
+        """Accumulate the statistics of one chunk."""
+        for col in self.counts:
+            counts = chunk[col].value_counts()
+            counts.index = counts.index.astype(object)
+            self.counts[col] = self.counts[col].add(counts, fill_value=0)
+            self.na_counts[col] += int(chunk[col].isna().sum())
+        for col, sketch in self.median_sketches.items():
+            sketch.update(chunk[col].to_numpy(dtype=float, na_value=np.nan))
+        for col, sketch in self.valid_sketches.items():
+            values = chunk[col].to_numpy(dtype=float, na_value=np.nan)
+            sketch.update(values[values != 0])
+        for col, sketch in self.outlier_sketches.items():
+            sketch.update(chunk[col].to_numpy(dtype=float, na_value=np.nan))
+        return self
+    
+    def merge(self, other: 'StreamingStatistics') -> 'StreamingStatistics':
+        """Fold the accumulators of another stream into this one."""
+        for col, counts in other.counts.items():
+            self.counts[col] = self.counts[col].add(counts, fill_value=0)
+            self.na_counts[col] += other.na_counts[col]
+        for mine, theirs in ((self.median_sketches, other.median_sketches),
+                             (self.valid_sketches, other.valid_sketches),
+                             (self.outlier_sketches, other.outlier_sketches)):
+            for col, sketch in theirs.items():
+                mine[col].merge(sketch)
+        return self
+    
+    def finalize(self) -> dict:
+        """Turn the accumulators into a cleaning state.
+        
+        Returns:
+            Statistics in the layout produced by ``DataCleaner.fit``
+        """
+        fill_values = {col: FILL_UNKNOWN for col in self.plan['fill_unknown']}
+        for col in self.plan['fill_mode']:
+            if len(self.counts[col]) and self.counts[col].max() > 0:
+                fill_values[col] = self.counts[col].idxmax()
+        for col, sketch in self.median_sketches.items():
+            if sketch.count:
+                fill_values[col] = sketch.quantile(0.5)
+        
+        numeric_medians = {
+            col: sketch.quantile(0.5)
+            for col, sketch in self.valid_sketches.items() if sketch.count
+        }
+        
+        lower, upper = self.winsorize_limits
+        winsorize_bounds = {}
+        for col, sketch in self.outlier_sketches.items():
+            if sketch.count:
+                n = sketch.count
+                winsorize_bounds[col] = [
+                    sketch.value_at_rank(int(lower * n)),
+                    sketch.value_at_rank(n - int(upper * n) - 1),
+                ]
+        
+        top_categories = {
+            col: _top_categories(
+                self.counts[col].sort_values(ascending=False, kind='stable'),
+                self.na_counts[col],
+                fill_values.get(col)
+            )
+            for col in self.plan['high_cardinality']
+        }
+        
+        return {
+            'fill_values': fill_values,
+            'numeric_medians': numeric_medians,
+            'winsorize_bounds': winsorize_bounds,
+            'top_categories': top_categories,
+        }
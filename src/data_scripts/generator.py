@@ -0,0 +1,477 @@
+"""Synthetic insurance data in the raw file format.
+
+Generates the 52-column pipe-delimited extract that ``load_raw_data``
+reads, for load- and scale-testing without production data. Missing
+categorical values are written as ``' '`` and missing outstanding
+capital as ``'.000000000000'`` (the markers in ``RAW_NA_VALUES``), and
+``TransactionMonth`` uses the extract's ``YYYY-MM-DD 00:00:00`` layout.
+
+Policies keep their vehicle, location and client attributes across their
+monthly rows. Make, model, body type and cover distributions follow
+Zipf-like skews, claims are sparse and missingness is configurable.
+Chunks are generated and formatted independently from per-chunk seeds,
+so the output is identical whatever the number of worker processes, and
+are written in parallel through Arrow's CSV writer.
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+from .schema import RAW_NA_VALUES, RAW_SEPARATOR
+from ..utils.logger import get_logger
+from ..utils.processes import process_pool
+
+logger = get_logger(__name__)
+
+MISSING_CATEGORY, MISSING_AMOUNT = RAW_NA_VALUES
+DEFAULT_CHUNKSIZE = 250_000
+COPY_BLOCK_SIZE = 64 * 1024 * 1024
+
+RAW_COLUMNS = [
+    'UnderwrittenCoverID', 'PolicyID', 'TransactionMonth', 'IsVATRegistered',
+    'Citizenship', 'LegalType', 'Title', 'Language', 'Bank', 'AccountType',
+    'MaritalStatus', 'Gender', 'Country', 'Province', 'PostalCode',
+    'MainCrestaZone', 'SubCrestaZone', 'ItemType', 'mmcode', 'VehicleType',
+    'RegistrationYear', 'make', 'Model', 'Cylinders', 'cubiccapacity',
+    'kilowatts', 'bodytype', 'NumberOfDoors', 'VehicleIntroDate',
+    'CustomValueEstimate', 'AlarmImmobiliser', 'TrackingDevice',
+    'CapitalOutstanding', 'NewVehicle', 'WrittenOff', 'Rebuilt', 'Converted',
+    'CrossBorder', 'NumberOfVehiclesInFleet', 'SumInsured', 'TermFrequency',
+    'CalculatedPremiumPerTerm', 'ExcessSelected', 'CoverCategory', 'CoverType',
+    'CoverGroup', 'Section', 'Product', 'StatutoryClass', 'StatutoryRiskType',
+    'TotalPremium', 'TotalClaims',
+]
+
+PROVINCES = {
+    'Gauteng': 0.393, 'Western Cape': 0.170, 'KwaZulu-Natal': 0.170,
+    'North West': 0.143, 'Mpumalanga': 0.052, 'Eastern Cape': 0.031,
+    'Limpopo': 0.024, 'Free State': 0.008, 'Northern Cape': 0.009,
+}
+MAKES = [
+    'TOYOTA', 'MERCEDES-BENZ', 'VOLKSWAGEN', 'NISSAN', 'HYUNDAI', 'FORD',
+    'ISUZU', 'AUDI', 'BMW', 'MAZDA', 'KIA', 'RENAULT', 'CHEVROLET', 'HONDA',
+    'OPEL', 'PEUGEOT', 'SUZUKI', 'MITSUBISHI', 'LAND ROVER', 'JEEP', 'VOLVO',
+    'FIAT', 'CITROEN', 'MINI', 'SUBARU', 'LEXUS', 'JAGUAR', 'PORSCHE',
+    'MAHINDRA', 'TATA', 'GWM', 'CHERY', 'JMC', 'FOTON', 'IVECO', 'MAN',
+    'SCANIA', 'DAF', 'HINO', 'UD TRUCKS', 'FAW', 'POWERSTAR', 'MARCOPOLO',
+    'BAW', 'ALFA ROMEO', 'DODGE',
+]
+N_MODELS = 411
+N_POSTAL_CODES = 888
+N_CRESTA_ZONES = 16
+N_SUB_CRESTA_ZONES = 45
+VEHICLE_TYPES = {
+    'Passenger Vehicle': 0.93, 'Medium Commercial': 0.05, 'Heavy Commercial': 0.01,
+    'Light Commercial': 0.007, 'Bus': 0.003,
+}
+BODY_TYPES = ['B/S', 'S/D', 'H/B', 'D/S', 'S/C', 'P/V', 'C/C', 'MPV', 'SUV',
+              'CPE', 'CAB', 'CONV', 'WAG']
+COVER_TYPES = [
+    'Own Damage', 'Windscreen', 'Third Party', 'Signage and Vehicle Wraps',
+    'Emergency Charges', 'Keys and Alarms', 'Cleaning and Removal of Accident Debris',
+    'External Cover', 'Income Protector', 'Passenger Liability', 'Fire and Theft',
+    'Accidental Death', 'Basic Excess Waiver', 'Cash Takeover',
+    'Credit Protection', 'Deposit Cover', 'Asset Value Preservation',
+    'Tyre and Rim', 'Standalone Passenger Liability', 'Roadside Assistance',
+    'Loss of Use', 'Medical Expenses',
+]
+EXCESS_OPTIONS = [
+    'Mobility - Windscreen', 'No excess', 'Mobility - Metered Taxis - R2000',
+    'Mobility - Metered Taxis - R5000', 'Mobility - Taxi with value more than R100 000',
+]
+BANKS = ['First National Bank', 'Standard Bank', 'ABSA Bank', 'Nedbank',
+         'Capitec Bank', 'RMB Private Bank', 'Investec Bank']
+COVER_GROUPS = {'Comprehensive - Taxi': 0.6, 'Motor Comprehensive': 0.38,
+                'Income Protector': 0.01, 'Standalone passenger liability': 0.01}
+SECTIONS = {'Motor Comprehensive': 0.55, 'Optional Extended Covers': 0.4,
+            'Taxi': 0.04, 'Income Protector': 0.01}
+CAPITAL_OUTSTANDING = [0, 119300, 250000, 5000, 49000, 100000]
+
+# Columns that are rarely filled in the real extract, with their missing rates
+SPARSE_COLUMNS = {
+    'CustomValueEstimate': 0.78, 'NewVehicle': 0.15, 'WrittenOff': 0.64,
+    'Rebuilt': 0.64, 'Converted': 0.64, 'Bank': 0.15, 'AccountType': 0.04,
+}
+
+# Per-process generator set up by the pool initializer
+_WORKER = {}
+
+
+def _zipf_weights(n: int, exponent: float) -> np.ndarray:
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _normalized(weights) -> np.ndarray:
+    weights = np.fromiter(weights, float)
+    return weights / weights.sum()
+
+
+def _init_worker(generator: 'SyntheticDataGenerator', part_dir: str):
+    _WORKER['generator'] = generator
+    _WORKER['part_dir'] = part_dir
+
+
+def _write_chunk(index: int) -> int:
+    """Generate and format one chunk into its part file (pool entry point)."""
+    generator = _WORKER['generator']
+    table = generator.raw_table(generator.chunk(index))
+    path = os.path.join(_WORKER['part_dir'], f"part-{index:06d}.txt")
+    pa_csv.write_csv(table, path, pa_csv.WriteOptions(
+        include_header=False, delimiter=RAW_SEPARATOR, quoting_style='none'
+    ))
+    return table.num_rows
+
+
+class SyntheticDataGenerator:
+    """Generates synthetic insurance transactions matching the raw schema.
+
+    ``chunk`` and ``frame`` return frames shaped like the parsed extract
+    (missing values as NaN, schema categoricals as ``category``, amounts
+    as ``float32``); ``write`` produces the pipe-delimited text file(s).
+    Zero amounts are written as ``0`` and stay zero in memory. When the
+    text is parsed they become NaN all the same: pandas matches a numeric
+    NA marker by value, so ``'.000000000000'`` also matches every ``0``.
+
+    Args:
+        rows: Number of transaction rows
+        seed: Random seed; the output is fully determined by it
+        claim_rate: Share of rows with a claim
+        missing_rate: Missing share of the commonly imputed columns
+            (gender, vehicle type, engine size, ...)
+        skew: Zipf exponent of the make, model, body type and cover
+            distributions (0 is uniform)
+        rows_per_policy: Average monthly rows per policy
+        chunksize: Rows per generated chunk
+        max_workers: Writer processes; defaults to the CPU count
+    """
+
+    def __init__(self, rows: int, seed: int = 0, claim_rate: float = 0.003,
+                 missing_rate: float = 0.01, skew: float = 1.1,
+                 rows_per_policy: int = 20, chunksize: int = DEFAULT_CHUNKSIZE,
+                 max_workers: Optional[int] = None):
+        if rows < 0:
+            raise ValueError("rows must be non-negative")
+        self.rows = rows
+        self.seed = seed
+        self.claim_rate = claim_rate
+        self.missing_rate = missing_rate
+        self.skew = skew
+        self.rows_per_policy = rows_per_policy
+        self.chunksize = chunksize
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.months = pd.date_range('2013-10-01', '2015-08-01', freq='MS')
+        self._policies = None
+
+    @classmethod
+    def from_config(cls, config_manager, **overrides) -> 'SyntheticDataGenerator':
+        """Build a generator from the ``synthetic`` config section."""
+        settings = {**(config_manager.get('synthetic', {}) or {}), **overrides}
+        return cls(**settings)
+
+    def __getstate__(self):
+        # Workers rebuild the policy table from the seed rather than unpickle it
+        return {**self.__dict__, '_policies': None}
+
+    @property
+    def n_chunks(self) -> int:
+        return -(-self.rows // self.chunksize) if self.rows else 0
+
+    def chunk(self, index: int) -> pd.DataFrame:
+        """Generate rows ``[index * chunksize, (index + 1) * chunksize)``."""
+        start = index * self.chunksize
+        n = min(self.chunksize, self.rows - start)
+        if n <= 0:
+            raise IndexError(f"Chunk {index} is out of range")
+        return self._generate(np.random.default_rng([self.seed, index + 1]), start, n)
+
+    def iter_chunks(self) -> Iterator[pd.DataFrame]:
+        """Generate the data chunk by chunk."""
+        for index in range(self.n_chunks):
+            yield self.chunk(index)
+
+    def frame(self) -> pd.DataFrame:
+        """Generate the whole dataset in memory."""
+        if not self.rows:
+            return self._generate(np.random.default_rng([self.seed, 1]), 0, 0)
+        # Chunks share their category lists, so concat keeps the dtypes
+        return pd.concat(list(self.iter_chunks()), ignore_index=True)
+
+    def write(self, path: Union[str, Path], partitions: int = 1) -> List[Path]:
+        """Write the data as pipe-delimited text.
+
+        Chunks are generated and written to part files in parallel, then
+        concatenated behind the header line. With several partitions
+        the chunks are split into consecutive ranges, one file each,
+        named ``<stem>-<nnn><suffix>`` next to ``path``.
+
+        Args:
+            path: Output file
+            partitions: Number of output files
+
+        Returns:
+            Paths of the written files
+        """
+        try:
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            partitions = max(1, min(partitions, self.n_chunks or 1))
+            if partitions == 1:
+                targets = [path]
+            else:
+                targets = [path.with_name(f"{path.stem}-{p:03d}{path.suffix}")
+                           for p in range(partitions)]
+            bounds = np.linspace(0, self.n_chunks, partitions + 1).round().astype(int)
+
+            with tempfile.TemporaryDirectory(dir=path.parent, prefix='.synthetic-') as part_dir:
+                workers = min(self.max_workers, max(1, self.n_chunks))
+                if workers > 1:
+                    with process_pool(
+                        max_workers=workers,
+                        initializer=_init_worker,
+                        initargs=(self, part_dir)
+                    ) as pool:
+                        list(pool.map(_write_chunk, range(self.n_chunks)))
+                else:
+                    _init_worker(self, part_dir)
+                    for index in range(self.n_chunks):
+                        _write_chunk(index)
+
+                header = (RAW_SEPARATOR.join(RAW_COLUMNS) + '\n').encode()
+                for target, first, last in zip(targets, bounds[:-1], bounds[1:]):
+                    tmp_path = target.with_name(target.name + '.tmp')
+                    with open(tmp_path, 'wb') as out:
+                        out.write(header)
+                        for index in range(first, last):
+                            with open(os.path.join(part_dir, f"part-{index:06d}.txt"), 'rb') as part:
+                                shutil.copyfileobj(part, out, COPY_BLOCK_SIZE)
+                    os.replace(tmp_path, target)
+            logger.info(
+                f"Wrote {self.rows:,} synthetic rows to {len(targets)} file(s)",
+                path=str(path)
+            )
+            return targets
+        except Exception as e:
+            logger.error(f"Synthetic data generation failed: {str(e)}")
+            raise
+
+    def raw_table(self, df: pd.DataFrame) -> pa.Table:
+        """Convert a generated chunk to the raw text layout.
+
+        Missing categoricals become ``' '``, missing outstanding capital
+        ``'.000000000000'``, months their ``YYYY-MM-DD 00:00:00`` text and
+        flags ``True``/``False``; missing numbers stay empty fields.
+        """
+        columns = {}
+        for col in RAW_COLUMNS:
+            series = df[col]
+            if col == 'TransactionMonth':
+                series = self._month_labels(series)
+            elif series.dtype == bool:
+                series = pd.Categorical.from_codes(series.to_numpy().astype(np.int8),
+                                                   categories=['False', 'True'])
+            elif col == 'CapitalOutstanding':
+                # Few distinct amounts: format the categories, not the rows
+                series = pd.Series(pd.Categorical(series))
+                series = series.cat.rename_categories(
+                    [f"{v:g}" for v in series.cat.categories]
+                )
+            if isinstance(series, pd.Categorical):
+                series = pd.Series(series)
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                marker = MISSING_AMOUNT if col == 'CapitalOutstanding' else MISSING_CATEGORY
+                codes = series.cat.codes.to_numpy()
+                categories = list(series.cat.categories.astype(str)) + [marker]
+                codes = np.where(codes < 0, len(categories) - 1, codes).astype(np.int32)
+                columns[col] = pa.DictionaryArray.from_arrays(codes, pa.array(categories))
+            else:
+                columns[col] = pa.array(series.to_numpy(), from_pandas=True)
+        return pa.table(columns)
+
+    def _month_labels(self, series: pd.Series) -> pd.Categorical:
+        """Format months through their category list instead of per row."""
+        labels = self.months.strftime('%Y-%m-%d %H:%M:%S')
+        return pd.Categorical.from_codes(self.months.get_indexer(series), categories=labels)
+
+    def _policy_table(self) -> dict:
+        """Per-policy attributes, identical in every process for a seed."""
+        if self._policies is not None:
+            return self._policies
+        rng = np.random.default_rng([self.seed, 0])
+        n = max(1, self.rows // max(1, self.rows_per_policy))
+        province_p = _normalized(PROVINCES.values())
+        # Every make has at least one model; popular makes have many
+        model_make = np.sort(np.concatenate([
+            np.arange(len(MAKES)),
+            rng.choice(len(MAKES), N_MODELS - len(MAKES), p=_zipf_weights(len(MAKES), self.skew))
+        ]))
+        postal_province = rng.choice(len(PROVINCES), N_POSTAL_CODES, p=province_p)
+        province = rng.choice(len(PROVINCES), n, p=province_p)
+        postal = np.empty(n, dtype=np.int64)
+        for p in range(len(PROVINCES)):
+            codes = np.flatnonzero(postal_province == p)
+            members = province == p
+            postal[members] = rng.choice(codes if codes.size else [p], members.sum())
+        self._policies = {
+            'n': n,
+            'province': province,
+            'postal': postal,
+            'model_make': model_make,
+            'model': rng.choice(N_MODELS, n, p=_zipf_weights(N_MODELS, self.skew * 0.8)),
+            'year': rng.integers(1987, 2016, n),
+            'sum_insured': rng.lognormal(11.5, 1.3, n),
+            'gender': rng.choice(3, n, p=[0.9, 0.085, 0.015]),
+            'marital': rng.choice(3, n, p=[0.98, 0.01, 0.01]),
+            'bank': rng.choice(len(BANKS), n, p=_zipf_weights(len(BANKS), 1.0)),
+            'vat': rng.random(n) < 0.005,
+            'tracking': rng.random(n) < 0.3,
+        }
+        return self._policies
+
+    def _generate(self, rng: np.random.Generator, start: int, n: int) -> pd.DataFrame:
+        """Draw ``n`` rows starting at row ``start``."""
+        pol = self._policy_table()
+        policy = rng.integers(0, pol['n'], n)
+        model = pol['model'][policy]
+        province = pol['province'][policy]
+        postal = pol['postal'][policy]
+        make = pol['model_make'][model]
+
+        def categorical(labels, codes=None, p=None, missing=0.0):
+            if codes is None:
+                codes = rng.choice(len(labels), size=n, p=p)
+            codes = np.asarray(codes, dtype=np.int32).copy()
+            if missing:
+                codes[rng.random(n) < missing] = -1
+            return pd.Categorical.from_codes(codes, categories=labels)
+
+        def numeric(values, missing=0.0, dtype=np.float32):
+            values = np.asarray(values, dtype=dtype)
+            if missing:
+                values[rng.random(n) < missing] = np.nan
+            return values
+
+        sum_insured = pol['sum_insured'][policy].astype(np.float32)
+        premium = (sum_insured * rng.gamma(2.0, 0.0005, n)).astype(np.float32)
+        premium[rng.random(n) < 0.4] = 0.0
+        claims = np.where(rng.random(n) < self.claim_rate,
+                          rng.lognormal(9.5, 1.4, n), 0.0).astype(np.float32)
+        cover_p = _zipf_weights(len(COVER_TYPES), self.skew)
+        year = pol['year'][policy]
+        intro_year = np.maximum(year - rng.integers(0, 4, n), 1980)
+        intro_labels = [f"{m}/{y}" for y in range(1980, 2016) for m in range(1, 13)]
+
+        df = pd.DataFrame({
+            'UnderwrittenCoverID': np.arange(start, start + n, dtype=np.int64),
+            'PolicyID': policy,
+            'TransactionMonth': self.months[rng.integers(0, len(self.months), n)],
+            'IsVATRegistered': pol['vat'][policy],
+            'Citizenship': categorical(['ZA', 'AF', 'ZW'], p=[0.9, 0.05, 0.05], missing=0.89),
+            'LegalType': categorical(['Individual', 'Close Corporation', 'Private company',
+                                      'Public company', 'Partnership', 'Sole proprietor'],
+                                     p=[0.9, 0.05, 0.025, 0.01, 0.01, 0.005]),
+            'Title': categorical(['Mr', 'Mrs', 'Ms', 'Miss', 'Dr'], p=[0.9, 0.07, 0.02, 0.005, 0.005]),
+            'Language': categorical(['English']),
+            'Bank': categorical(BANKS, pol['bank'][policy], missing=SPARSE_COLUMNS['Bank']),
+            'AccountType': categorical(['Current account', 'Savings account', 'Transmission account'],
+                                       p=[0.6, 0.39, 0.01], missing=SPARSE_COLUMNS['AccountType']),
+            'MaritalStatus': categorical(['Not specified', 'Single', 'Married'],
+                                         pol['marital'][policy], missing=self.missing_rate),
+            'Gender': categorical(['Not specified', 'Male', 'Female'],
+                                  pol['gender'][policy], missing=self.missing_rate),
+            'Country': categorical(['South Africa']),
+            'Province': categorical(list(PROVINCES), province, missing=self.missing_rate / 10),
+            'PostalCode': postal,
+            'MainCrestaZone': categorical([f'Cresta Zone {i}' for i in range(N_CRESTA_ZONES)],
+                                          postal % N_CRESTA_ZONES),
+            'SubCrestaZone': categorical([f'Sub Cresta {i}' for i in range(N_SUB_CRESTA_ZONES)],
+                                         postal % N_SUB_CRESTA_ZONES),
+            'ItemType': categorical(['Mobility - Motor']),
+            'mmcode': numeric(4_000_000 + model * 1000 + make, self.missing_rate, np.float64),
+            'VehicleType': categorical(list(VEHICLE_TYPES), p=_normalized(VEHICLE_TYPES.values()),
+                                       missing=self.missing_rate),
+            'RegistrationYear': year,
+            'make': categorical(MAKES, make, missing=self.missing_rate),
+            'Model': categorical([f'{MAKES[m]} MODEL {i}' for i, m in enumerate(pol['model_make'])],
+                                 model, missing=self.missing_rate),
+            'Cylinders': numeric(rng.choice([4, 6, 8], n, p=[0.9, 0.08, 0.02]), self.missing_rate),
+            'cubiccapacity': numeric(rng.choice([1300, 1600, 2000, 2500, 2700, 4000], n),
+                                     self.missing_rate),
+            'kilowatts': numeric(rng.integers(40, 300, n), self.missing_rate),
+            'bodytype': categorical(BODY_TYPES, p=_zipf_weights(len(BODY_TYPES), self.skew),
+                                    missing=self.missing_rate),
+            'NumberOfDoors': numeric(rng.choice([2, 4, 5], n, p=[0.05, 0.9, 0.05]),
+                                     self.missing_rate),
+            'VehicleIntroDate': categorical(
+                intro_labels, (intro_year - 1980) * 12 + rng.integers(0, 12, n),
+                missing=self.missing_rate
+            ),
+            'CustomValueEstimate': numeric(sum_insured * rng.uniform(0.8, 1.2, n),
+                                           SPARSE_COLUMNS['CustomValueEstimate']),
+            'AlarmImmobiliser': categorical(['Yes', 'No'], p=[0.99, 0.01]),
+            'TrackingDevice': categorical(['No', 'Yes'], pol['tracking'][policy]),
+            'CapitalOutstanding': numeric(
+                rng.choice(CAPITAL_OUTSTANDING, n, p=_zipf_weights(len(CAPITAL_OUTSTANDING), 2.0)),
+                self.missing_rate, np.float64
+            ),
+            'NewVehicle': categorical(['More than 6 months', 'Less than 6 months'],
+                                      p=[0.99, 0.01], missing=SPARSE_COLUMNS['NewVehicle']),
+            'WrittenOff': categorical(['No', 'Yes'], p=[0.999, 0.001],
+                                      missing=SPARSE_COLUMNS['WrittenOff']),
+            'Rebuilt': categorical(['No', 'Yes'], p=[0.999, 0.001],
+                                   missing=SPARSE_COLUMNS['Rebuilt']),
+            'Converted': categorical(['No', 'Yes'], p=[0.999, 0.001],
+                                     missing=SPARSE_COLUMNS['Converted']),
+            'CrossBorder': categorical(['No'], missing=0.999),
+            'NumberOfVehiclesInFleet': np.full(n, np.nan),
+            'SumInsured': sum_insured,
+            'TermFrequency': categorical(['Monthly', 'Annual'], p=[0.99, 0.01]),
+            'CalculatedPremiumPerTerm': (premium * rng.uniform(0.9, 1.1, n)).astype(np.float32),
+            'ExcessSelected': categorical(EXCESS_OPTIONS,
+                                          p=_zipf_weights(len(EXCESS_OPTIONS), self.skew)),
+            'CoverCategory': categorical(COVER_TYPES, p=cover_p),
+            'CoverType': categorical(COVER_TYPES, p=cover_p),
+            'CoverGroup': categorical(list(COVER_GROUPS), p=_normalized(COVER_GROUPS.values())),
+            'Section': categorical(list(SECTIONS), p=_normalized(SECTIONS.values())),
+            'Product': categorical(['Mobility Metered Taxis: Monthly',
+                                    'Mobility Commercial Cover: Monthly'], p=[0.6, 0.4]),
+            'StatutoryClass': categorical(['Commercial']),
+            'StatutoryRiskType': categorical(['IFRS Constant']),
+            'TotalPremium': premium,
+            'TotalClaims': claims,
+        })
+        return df
+
+
+def main(argv=None):
+    """Write a synthetic raw extract from the command line."""
+    parser = argparse.ArgumentParser(description="Generate synthetic raw insurance data")
+    parser.add_argument('output', help="Output file, e.g. data/raw/MachineLearningRating_v3.txt")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--partitions', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--claim-rate', type=float, default=0.003)
+    parser.add_argument('--missing-rate', type=float, default=0.01)
+    parser.add_argument('--skew', type=float, default=1.1)
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+    generator = SyntheticDataGenerator(
+        args.rows, seed=args.seed, claim_rate=args.claim_rate,
+        missing_rate=args.missing_rate, skew=args.skew,
+        chunksize=args.chunksize, max_workers=args.workers
+    )
+    generator.write(args.output, partitions=args.partitions)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,359 @@
+"""Point-in-time claim history features per policy.
+
+For every ``PolicyID`` and ``TransactionMonth`` the features summarise
+only the policy's earlier months, never the current one, so they carry
+no look-ahead into the claims they are used to predict:
+
+- ``ClaimsLast{w}M``: claims in the ``w`` months before the month
+- ``MonthsSinceLastClaim``: months since the latest earlier claim
+  (NaN when there is none)
+- ``CumulativePremium``: premium of all earlier months
+- ``PriorMonths``: number of earlier months with data
+
+Rows are reduced to policy-months and sorted once by policy and month;
+trailing windows are then differences of one cumulative sum, located
+with ``searchsorted`` on a combined policy/month key, and the latest
+earlier claim comes from a running maximum. No per-policy Python code
+runs, so the cost is that of a sort.
+
+``ClaimHistory.update`` carries per-policy totals and the claims of the
+last months across calls, so the features of a newly arrived month are
+computed without rereading the history.
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from .schema import resolve_column
+from ..utils.logger import get_logger
+from ..utils.profiling import profiled
+
+logger = get_logger(__name__)
+
+DEFAULT_WINDOWS = (3, 6, 12)
+STATE_VERSION = 1
+
+# Raw inputs of the history features, for column selection
+HISTORY_FEATURE_INPUTS = {
+    **{f"ClaimsLast{w}M": ['PolicyID', 'TransactionMonth', 'TotalClaims']
+       for w in DEFAULT_WINDOWS},
+    'MonthsSinceLastClaim': ['PolicyID', 'TransactionMonth', 'TotalClaims'],
+    'CumulativePremium': ['PolicyID', 'TransactionMonth', 'TotalPremium'],
+    'PriorMonths': ['PolicyID', 'TransactionMonth'],
+}
+
+
+def _month_index(values: pd.Series) -> np.ndarray:
+    """Months since 1970-01 as int64, with -1 for missing months."""
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        values = pd.to_datetime(values, errors='coerce')
+    months = values.to_numpy(dtype='datetime64[ns]').astype('datetime64[M]')
+    return np.where(np.isnat(months), -1, months.astype(np.int64))
+
+
+class ClaimHistory:
+    """Computes and incrementally extends per-policy claim history features.
+
+    Args:
+        windows: Trailing window lengths in months
+        policy_column: Policy identifier column
+        month_column: Transaction month column
+        claim_column: Claim count column; claim amounts above zero count
+            as one claim when it is absent
+        premium_column: Premium column
+        state_path: Directory of the carried state that ``update``
+            resumes from and saves to; kept in memory only when None
+    """
+
+    def __init__(self, windows: Iterable[int] = DEFAULT_WINDOWS,
+                 policy_column: str = 'PolicyID',
+                 month_column: str = 'TransactionMonth',
+                 claim_column: str = 'HasClaim',
+                 premium_column: str = 'TotalPremium',
+                 state_path: Optional[str] = None):
+        self.windows = sorted(set(int(w) for w in windows))
+        if not self.windows or self.windows[0] < 1:
+            raise ValueError("History windows must be positive month counts")
+        self.policy_column = policy_column
+        self.month_column = month_column
+        self.claim_column = claim_column
+        self.premium_column = premium_column
+        self.state_path = Path(state_path) if state_path else None
+        self.state_ = None
+
+    @classmethod
+    def from_config(cls, config_manager) -> 'ClaimHistory':
+        """Build from the ``data.history`` config section."""
+        settings = config_manager.get('data.history', {}) or {}
+        return cls(
+            windows=settings.get('windows', DEFAULT_WINDOWS),
+            state_path=settings.get('state_path')
+        )
+
+    @property
+    def feature_names(self) -> list:
+        return ([f"ClaimsLast{w}M" for w in self.windows]
+                + ['MonthsSinceLastClaim', 'CumulativePremium', 'PriorMonths'])
+
+    @profiled('history.transform')
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Compute the features over the full history, replacing any state.
+
+        The new state is kept in memory; call ``save_state`` to let later
+        ``update`` calls resume from it.
+
+        Args:
+            df: Frame with policy, month, claim and premium columns
+
+        Returns:
+            ``df`` with the history features added
+        """
+        self.state_ = self._empty_state()
+        return self._extend(df, persist=False)
+
+    @profiled('history.update')
+    def update(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Compute the features of months after those already seen.
+
+        Continues from the carried state (loaded from ``state_path`` on
+        first use and saved back after each update), so ``df`` only needs
+        the new months.
+
+        Args:
+            df: Rows of the new months
+
+        Returns:
+            ``df`` with the history features added
+
+        Raises:
+            ValueError: If ``df`` has a month not after the last one seen
+        """
+        if self.state_ is None:
+            self.state_ = self.load_state()
+        return self._extend(df)
+
+    def _extend(self, df: pd.DataFrame, persist: bool = True) -> pd.DataFrame:
+        try:
+            features = self._compute(df)
+            df = df.copy()
+            for name, values in features.items():
+                df[name] = values
+            if persist and self.state_path is not None:
+                self.save_state()
+            return df
+        except Exception as e:
+            logger.error(f"Claim history failed: {str(e)}")
+            raise
+
+    def _compute(self, df: pd.DataFrame) -> dict:
+        """Features of every row of ``df``, advancing the state past its months."""
+        state = self.state_
+        policy = df[self._resolve(self.policy_column, df.columns)].to_numpy()
+        month = _month_index(df[self._resolve(self.month_column, df.columns)])
+        claims = self._claims(df)
+        premium_col = resolve_column(self.premium_column, df.columns)
+        premium = (
+            pd.to_numeric(df[premium_col], errors='coerce').fillna(0.0).to_numpy(dtype=float)
+            if premium_col is not None else np.zeros(len(df))
+        )
+        valid = (month >= 0) & pd.notna(policy)
+        if valid.any() and state['last_month'] is not None \
+                and month[valid].min() <= state['last_month']:
+            raise ValueError(
+                f"History already covers months up to {self._month_label(state['last_month'])}; "
+                "use transform to recompute"
+            )
+
+        # One code space for the carried policies and the new ones
+        totals, tail = state['totals'], state['tail']
+        codes, uniques = pd.factorize(np.concatenate([
+            totals['policy'].to_numpy(), tail['policy'].to_numpy(), policy[valid]
+        ]))
+        n_totals, n_tail = len(totals), len(tail)
+        total_codes = codes[:n_totals]
+        tail_codes = codes[n_totals:n_totals + n_tail]
+        new_codes = codes[n_totals + n_tail:]
+
+        # Reduce the new rows to policy-months, keyed by policy then month
+        max_window = self.windows[-1]
+        months_all = np.concatenate([tail['month'].to_numpy(np.int64), month[valid]])
+        origin = (months_all.min() if len(months_all) else 0) - max_window
+        span = (months_all.max() if len(months_all) else 0) - origin + 1
+        new_keys, row_cell = np.unique(new_codes * span + (month[valid] - origin),
+                                       return_inverse=True)
+        cell_claims = np.bincount(row_cell, weights=claims[valid], minlength=len(new_keys))
+        cell_premium = np.bincount(row_cell, weights=premium[valid], minlength=len(new_keys))
+
+        # Carried months come first within a policy, so one stable sort merges them
+        tail_keys = tail_codes * span + (tail['month'].to_numpy(np.int64) - origin)
+        keys = np.concatenate([tail_keys, new_keys])
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        is_new = order >= n_tail
+        all_claims = np.concatenate([tail['claims'].to_numpy(float), cell_claims])[order]
+        all_premium = np.concatenate([np.zeros(n_tail), cell_premium])[order]
+        code = keys // span
+        month_sorted = keys % span + origin
+        n = len(keys)
+        position = np.arange(n)
+        starts = np.r_[True, code[1:] != code[:-1]] if n else np.zeros(0, dtype=bool)
+        group_start = np.maximum.accumulate(np.where(starts, position, 0)) if n else position
+
+        # Per-policy totals up to the carried last month
+        n_codes = len(uniques)
+        base_months = np.zeros(n_codes)
+        base_premium = np.zeros(n_codes)
+        base_last_claim = np.full(n_codes, np.nan)
+        base_months[total_codes] = totals['months'].to_numpy(float)
+        base_premium[total_codes] = totals['premium'].to_numpy(float)
+        base_last_claim[total_codes] = totals['last_claim'].to_numpy(float)
+
+        features = {}
+        # Exclusive prefix sums: [i] covers the sorted cells before i
+        claim_sum = np.r_[0.0, np.cumsum(all_claims)]
+        for w in self.windows:
+            lo = np.maximum(np.searchsorted(keys, keys - w, side='left'), group_start)
+            features[f"ClaimsLast{w}M"] = claim_sum[position] - claim_sum[lo]
+
+        last = np.maximum.accumulate(np.where(all_claims > 0, position, -1)) if n else position
+        previous = np.r_[-1, last[:-1]] if n else position
+        last_claim = np.where(previous >= group_start,
+                              month_sorted[np.maximum(previous, 0)], base_last_claim[code])
+        features['MonthsSinceLastClaim'] = month_sorted - last_claim
+
+        new_premium = np.r_[0.0, np.cumsum(np.where(is_new, all_premium, 0.0))]
+        new_months = np.r_[0, np.cumsum(is_new)]
+        features['CumulativePremium'] = (base_premium[code]
+                                         + new_premium[position] - new_premium[group_start])
+        features['PriorMonths'] = (base_months[code]
+                                   + new_months[position] - new_months[group_start])
+
+        self.state_ = self._advance(state, uniques, code, month_sorted, all_claims,
+                                    all_premium, is_new, base_months, base_premium,
+                                    base_last_claim, total_codes, max_window)
+
+        # Map policy-month cells back to the rows, in the input order
+        rank = np.empty(n, dtype=np.int64)
+        rank[order] = position
+        row_position = rank[n_tail + row_cell]
+        result = {}
+        for name, values in features.items():
+            column = np.full(len(df), np.nan)
+            column[valid] = values[row_position]
+            dtype = np.float64 if name == 'CumulativePremium' else np.float32
+            result[name] = column.astype(dtype)
+        return result
+
+    def _advance(self, state: dict, uniques, code, month_sorted, all_claims, all_premium,
+                 is_new, base_months, base_premium, base_last_claim, total_codes,
+                 max_window) -> dict:
+        """State after the new months: totals per policy and the recent cells."""
+        months = base_months + np.bincount(code, weights=is_new.astype(float),
+                                           minlength=len(uniques))
+        premium = base_premium + np.bincount(code, weights=np.where(is_new, all_premium, 0.0),
+                                             minlength=len(uniques))
+        claimed = all_claims > 0
+        last_claim = base_last_claim.copy()
+        np.fmax.at(last_claim, code[claimed], month_sorted[claimed].astype(float))
+        seen = np.zeros(len(uniques), dtype=bool)
+        seen[total_codes] = True
+        seen[code] = True
+
+        last_month = int(month_sorted.max()) if len(month_sorted) else state['last_month']
+        if state['last_month'] is not None and last_month is not None:
+            last_month = max(last_month, state['last_month'])
+        recent = month_sorted > (last_month - max_window) if last_month is not None else is_new
+        return {
+            'last_month': last_month,
+            'totals': pd.DataFrame({
+                'policy': uniques[seen],
+                'months': months[seen],
+                'premium': premium[seen],
+                'last_claim': last_claim[seen],
+            }),
+            'tail': pd.DataFrame({
+                'policy': uniques[code[recent]],
+                'month': month_sorted[recent].astype(np.int64),
+                'claims': all_claims[recent],
+            }),
+        }
+
+    def _claims(self, df: pd.DataFrame) -> np.ndarray:
+        """Claim count per row, from the claim column or positive claim amounts."""
+        column = resolve_column(self.claim_column, df.columns)
+        if column is not None:
+            values = pd.to_numeric(df[column], errors='coerce')
+        else:
+            amounts = pd.to_numeric(df[self._resolve('TotalClaims', df.columns)], errors='coerce')
+            values = (amounts > 0).astype(float)
+        return values.fillna(0.0).to_numpy(dtype=float)
+
+    def _empty_state(self) -> dict:
+        return {
+            'last_month': None,
+            'totals': pd.DataFrame({'policy': pd.Series(dtype='int64'), 'months': [],
+                                    'premium': [], 'last_claim': []}),
+            'tail': pd.DataFrame({'policy': pd.Series(dtype='int64'),
+                                  'month': pd.Series(dtype='int64'), 'claims': []}),
+        }
+
+    def save_state(self, path: Optional[str] = None) -> Path:
+        """Persist the carried state as Parquet files plus a JSON header.
+
+        The directory is written next to the target and renamed into
+        place, so an interrupted save keeps the previous state.
+        """
+        path = Path(path) if path else self.state_path
+        if path is None or self.state_ is None:
+            raise ValueError("No claim history state or path to save")
+        tmp_path = path.with_name(path.name + '.tmp')
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        tmp_path.mkdir(parents=True)
+        self.state_['totals'].to_parquet(tmp_path / 'totals.parquet', index=False)
+        self.state_['tail'].to_parquet(tmp_path / 'tail.parquet', index=False)
+        with open(tmp_path / 'state.json', 'w') as f:
+            json.dump({'version': STATE_VERSION, 'windows': self.windows,
+                       'last_month': self.state_['last_month']}, f)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+        logger.info(f"Saved claim history state through "
+                    f"{self._month_label(self.state_['last_month'])}: {path}")
+        return path
+
+    def load_state(self, path: Optional[str] = None) -> dict:
+        """Load a saved state, or an empty one if there is none.
+
+        Raises:
+            ValueError: If the state was saved with other windows or layout
+        """
+        path = Path(path) if path else self.state_path
+        if path is None or not (path / 'state.json').exists():
+            return self._empty_state()
+        with open(path / 'state.json') as f:
+            header = json.load(f)
+        if header.get('version') != STATE_VERSION or header.get('windows') != self.windows:
+            raise ValueError(f"Claim history state at {path} does not match; recompute it")
+        return {
+            'last_month': header['last_month'],
+            'totals': pd.read_parquet(path / 'totals.parquet'),
+            'tail': pd.read_parquet(path / 'tail.parquet'),
+        }
+
+    @staticmethod
+    def _month_label(month: Optional[int]) -> str:
+        if month is None:
+            return 'none'
+        return str(np.datetime64(int(month), 'M'))
+
+    @staticmethod
+    def _resolve(name: str, columns) -> str:
+        column = resolve_column(name, columns)
+        if column is None:
+            raise KeyError(f"Column not found: {name}")
+        return column
@@ -4,13 +4,37 @@ Includes functionality for loading raw data, creating derived features,
 and integrating with data version control systems.
 """
 
+import re
+import shutil
 import pandas as pd
 from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Union
+from .schema import (
+    RAW_NA_VALUES, RAW_SEPARATOR, RawSchema, RowFilter,
+    concat_chunks, filter_mask, resolve_column
+)
+from .storage import iter_parquet_dataset, read_parquet_dataset, write_parquet_part
+from .history import HISTORY_FEATURE_INPUTS
 from .versioning import DVCManager
 from ..utils.logger import get_logger
+from ..utils.profiling import profiled
 
 logger = get_logger(__name__)
 
+DEFAULT_CHUNKSIZE = 250_000
+# Bump when the cache layout or parsing logic changes
+CACHE_VERSION = 1
+
+# Raw inputs of the features built by create_derived_features
+DERIVED_FEATURE_INPUTS = {
+    'LossRatio': ['TotalClaims', 'TotalPremium'],
+    'VehicleAge': ['TransactionMonth', 'RegistrationYear'],
+    'HasClaim': ['TotalClaims'],
+    'ClaimSeverity': ['TotalClaims'],
+    'RiskCategory': ['TotalClaims', 'TotalPremium'],
+    **HISTORY_FEATURE_INPUTS,
+}
+
 class InsuranceDataLoader:
     """Handles loading and preprocessing of insurance data.
     
@@ -20,52 +44,314 @@ class InsuranceDataLoader:
     
     def __init__(self, config_manager):
         self.config = config_manager
-        self.dvc = DVCManager(
-            remote_path=self.config.get('dvc.remote_path')
-        )
+        self.dvc = DVCManager.from_config(self.config)
+        self.schema = RawSchema(self.config.get('data.schema'))
         
-    def load_raw_data(self) -> pd.DataFrame:
+    @profiled('load_raw_data')
+    def load_raw_data(self, chunksize: Optional[int] = None,
+                      use_cache: Optional[bool] = None,
+                      columns: Optional[Union[str, List[str]]] = None,
+                      filters: Optional[List[RowFilter]] = None) -> pd.DataFrame:
         """Load and version raw data using DVC.
         
+        The file is parsed with the explicit dtype schema from
+        ``data.schema``. When a chunk size is given (or ``data.chunksize``
+        is configured) the file is streamed in chunks and assembled into
+        a compact frame, keeping peak memory close to the final size.
+        
+        With the Parquet cache enabled the parsed chunks are also written
+        to ``data.cache_dir`` under a key derived from the file contents
+        and parse options; later loads of the same file read the cache
+        instead of re-parsing the text.
+        
+        Column projection and row filters are pushed down to the reader:
+        ``usecols`` plus per-chunk masks for the text file, scanner
+        projection and filter expressions for the Parquet cache.
+        
+        Args:
+            chunksize: Rows per chunk; overrides ``data.chunksize``
+            use_cache: Read through the Parquet cache; overrides
+                ``data.use_cache``
+            columns: Column names, ``'auto'`` to derive them from the
+                config (see ``required_columns``) or ``'all'``; defaults
+                to ``data.columns``
+            filters: Conjunctive ``(column, op, value)`` row filters,
+                e.g. ``[('Province', 'in', ['Gauteng'])]``; defaults to
+                ``data.filters``
+        
         Returns:
             Raw DataFrame with insurance data
             
         Raises:
             FileNotFoundError: If data file doesn't exist
+            KeyError: If a requested or filtered column doesn't exist
             pd.errors.EmptyDataError: For empty files
         """
         try:
-            raw_dir = Path(self.config.get('data.raw_dir', 'data/raw'))
-            raw_file = self.config.get('data.raw_file')
-            
-            if not raw_file:
-                raise ValueError("No raw_file specified in config")
-            
-            # Construct full path
-            data_path = raw_dir / raw_file
-            
-            # Verify file exists
-            if not data_path.exists():
-                available_files = list(raw_dir.glob('*'))
-                raise FileNotFoundError(
-                    f"Data file {data_path} not found. "
-                    f"Available files: {available_files}")
-                
+            chunksize = chunksize or self.config.get('data.chunksize')
+            if use_cache is None:
+                use_cache = self.config.get('data.use_cache', False)
+            data_path = self._resolve_raw_path()
+            header = self._read_header(data_path)
+            columns = self._select_columns(header, columns)
+            filters = self._select_filters(header, filters)
             logger.info(f"Loading data from: {data_path}")
             
-            df = pd.read_csv(
-                data_path,
-                sep='|',
-                parse_dates=['TransactionMonth'],
-                na_values=[' ', '.000000000000'],
-                low_memory=False
+            if use_cache:
+                df = self._load_cached(data_path, header, chunksize, columns, filters)
+            elif chunksize:
+                df = concat_chunks(
+                    self._iter_csv(data_path, header, chunksize, columns, filters)
+                )
+            else:
+                df = self._read_csv(data_path, header, columns, filters)
+            logger.info(
+                f"Loaded data with shape: {df.shape} "
+                f"({df.memory_usage(deep=True).sum() / 1e6:.1f} MB)"
             )
-            logger.info(f"Loaded data with shape: {df.shape}")
             return df
         except Exception as e:
             logger.error(f"Data loading failed: {str(e)}")
             raise
+    
+    def iter_raw_data(self, chunksize: Optional[int] = None,
+                      columns: Optional[Union[str, List[str]]] = None,
+                      filters: Optional[List[RowFilter]] = None,
+                      use_cache: Optional[bool] = None) -> Iterator[pd.DataFrame]:
+        """Stream the raw data file in dtype-pinned chunks.
+        
+        With the Parquet cache enabled the chunks are scanned from the
+        cache (building it first on a miss) instead of parsed from text.
+        
+        Args:
+            chunksize: Rows per chunk; defaults to ``data.chunksize``
+            columns: Column selection, as for ``load_raw_data``
+            filters: Row filters, as for ``load_raw_data``
+            use_cache: Read through the Parquet cache; overrides
+                ``data.use_cache``
+            
+        Yields:
+            DataFrame chunks parsed with the configured schema
             
+        Raises:
+            FileNotFoundError: If data file doesn't exist
+        """
+        chunksize = chunksize or self.config.get('data.chunksize', DEFAULT_CHUNKSIZE)
+        if use_cache is None:
+            use_cache = self.config.get('data.use_cache', False)
+        data_path = self._resolve_raw_path()
+        header = self._read_header(data_path)
+        columns = self._select_columns(header, columns)
+        filters = self._select_filters(header, filters)
+        
+        if use_cache:
+            cache_path = self._ensure_cache(data_path, header, chunksize)
+            yield from iter_parquet_dataset(
+                cache_path, columns=columns, filters=filters, batch_size=chunksize
+            )
+        else:
+            yield from self._iter_csv(data_path, header, chunksize, columns, filters)
+    
+    def required_columns(self, header: Optional[List[str]] = None) -> List[str]:
+        """Derive the raw columns the configured pipeline actually uses.
+        
+        Collects ``data.required_columns``, the model features and target,
+        the ``targeting.dimensions`` and every column named in
+        ``cleaning_strategies``, expands derived features into their raw
+        inputs and resolves the names against the file header.
+        
+        Args:
+            header: Raw file columns; read from the file when None
+            
+        Returns:
+            Needed raw columns in file order
+        """
+        if header is None:
+            header = self._read_header(self._resolve_raw_path())
+        
+        wanted = list(self.config.get('data.required_columns', []))
+        for key in ('model.features', 'model.categorical_features',
+                    'model.numeric_features'):
+            wanted.extend(self.config.get(key, []))
+        if self.config.get('model.target'):
+            wanted.append(self.config.get('model.target'))
+        wanted.extend(self.config.get('targeting.dimensions') or [])
+        strategies = self.config.get('cleaning_strategies', {})
+        wanted.extend(strategies.get('missing_values', {}))
+        for key in ('numeric_columns', 'outlier_columns', 'high_cardinality_cols'):
+            wanted.extend(strategies.get(key, []))
+        
+        needed, missing = set(), []
+        for name in wanted:
+            for col in DERIVED_FEATURE_INPUTS.get(name, [name]):
+                resolved = resolve_column(col, header)
+                if resolved is None:
+                    missing.append(col)
+                else:
+                    needed.add(resolved)
+        if missing:
+            logger.warning(f"Configured columns not in raw data: {sorted(set(missing))}")
+        return [col for col in header if col in needed]
+    
+    def _select_columns(self, header: List[str],
+                        columns: Optional[Union[str, List[str]]]) -> Optional[List[str]]:
+        """Resolve a column selection to raw column names (None means all)."""
+        if columns is None:
+            columns = self.config.get('data.columns')
+        if columns is None or columns == 'all':
+            return None
+        if columns == 'auto':
+            return self.required_columns(header)
+        
+        selected = []
+        for col in columns:
+            resolved = resolve_column(col, header)
+            if resolved is None:
+                raise KeyError(f"Column {col} not found in raw data")
+            selected.append(resolved)
+        return [col for col in header if col in selected]
+    
+    def _select_filters(self, header: List[str],
+                        filters: Optional[List[RowFilter]]) -> List[RowFilter]:
+        """Normalise explicit or configured row filters against the header."""
+        if filters is None:
+            filters = self.config.get('data.filters')
+        return self.schema.normalize_filters(filters, header)
+    
+    def _read_csv(self, data_path: Path, header: List[str],
+                  columns: Optional[List[str]],
+                  filters: List[RowFilter]) -> pd.DataFrame:
+        """Parse the whole raw file in one call."""
+        df = pd.read_csv(data_path, **self._read_options(header, columns, filters))
+        return self._apply_filters(df, columns, filters)
+    
+    def _iter_csv(self, data_path: Path, header: List[str], chunksize: int,
+                  columns: Optional[List[str]],
+                  filters: List[RowFilter]) -> Iterator[pd.DataFrame]:
+        """Parse the raw file in chunks, filtering each chunk as it arrives."""
+        reader = pd.read_csv(
+            data_path,
+            chunksize=chunksize or DEFAULT_CHUNKSIZE,
+            **self._read_options(header, columns, filters)
+        )
+        with reader:
+            for i, chunk in enumerate(reader):
+                logger.debug(f"Parsed chunk {i} with {len(chunk)} rows")
+                yield self._apply_filters(chunk, columns, filters)
+    
+    def _apply_filters(self, df: pd.DataFrame, columns: Optional[List[str]],
+                       filters: List[RowFilter]) -> pd.DataFrame:
+        """Apply row filters and drop columns that were read only to filter."""
+        if filters:
+            df = df.loc[filter_mask(df, filters)].reset_index(drop=True)
+        if columns is not None and len(columns) < df.shape[1]:
+            df = df[columns]
+        return df
+    
+    def _load_cached(self, data_path: Path, header: List[str],
+                     chunksize: Optional[int], columns: Optional[List[str]],
+                     filters: List[RowFilter]) -> pd.DataFrame:
+        """Read the raw data through the Parquet cache, building it on a miss."""
+        cache_path = self._ensure_cache(data_path, header, chunksize)
+        return read_parquet_dataset(cache_path, columns=columns, filters=filters)
+    
+    def _ensure_cache(self, data_path: Path, header: List[str],
+                      chunksize: Optional[int]) -> Path:
+        """Return the cache directory for the raw file, building it if needed."""
+        cache_path = self._cache_path(data_path, header)
+        if cache_path.exists():
+            logger.info(f"Reading cached raw data from: {cache_path}")
+        else:
+            self._build_cache(data_path, header, cache_path, chunksize)
+        return cache_path
+    
+    def _cache_path(self, data_path: Path, header: List[str]) -> Path:
+        """Locate the cache directory for the current file contents and schema."""
+        cache_dir = Path(self.config.get('data.cache_dir', 'data/cache'))
+        key = self._fingerprint(data_path, header)
+        return cache_dir / f"{data_path.stem}-{key}"
+    
+    def source_fingerprint(self) -> str:
+        """Fingerprint the raw file contents together with the parse schema.
+        
+        Returns:
+            Short hex key that changes whenever the file or schema changes
+        """
+        data_path = self._resolve_raw_path()
+        return self._fingerprint(data_path, self._read_header(data_path))
+    
+    def _fingerprint(self, data_path: Path, header: List[str]) -> str:
+        """Key the raw file by content hash and full-file parse options."""
+        options = self._read_options(header, None, [])
+        options['cache_version'] = CACHE_VERSION
+        return self.dvc.fingerprint(data_path, options)
+    
+    def _build_cache(self, data_path: Path, header: List[str], cache_path: Path,
+                     chunksize: Optional[int]):
+        """Parse the raw file chunk by chunk into a Parquet part directory.
+        
+        The cache always holds every column and row so any projection or
+        filter can be answered from it. Parts are written to a temporary
+        directory that is renamed into place once complete, so an
+        interrupted build is never read back. Caches of earlier versions
+        of the same file are removed; temporary directories of other
+        builds are left alone.
+        """
+        logger.info(f"Building parquet cache: {cache_path}")
+        tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        chunks = self._iter_csv(data_path, header, chunksize, None, [])
+        for i, chunk in enumerate(chunks):
+            write_parquet_part(chunk, tmp_path, i)
+        tmp_path.rename(cache_path)
+        
+        # Only finished caches of this file: '.tmp' builds may still be in
+        # progress, and files such as '<stem>-001' have caches of their own
+        key_length = len(cache_path.name) - len(data_path.stem) - 1
+        pattern = re.compile(re.escape(data_path.stem) + f"-[0-9a-f]{{{key_length}}}")
+        for stale in cache_path.parent.glob(f"{data_path.stem}-*"):
+            if stale != cache_path and pattern.fullmatch(stale.name):
+                shutil.rmtree(stale, ignore_errors=True)
+                logger.info(f"Removed stale cache: {stale}")
+    
+    def _resolve_raw_path(self) -> Path:
+        """Build and verify the path to the configured raw file."""
+        raw_dir = Path(self.config.get('data.raw_dir', 'data/raw'))
+        raw_file = self.config.get('data.raw_file')
+        
+        if not raw_file:
+            raise ValueError("No raw_file specified in config")
+        
+        # Construct full path
+        data_path = raw_dir / raw_file
+        
+        # Verify file exists
+        if not data_path.exists():
+            available_files = list(raw_dir.glob('*'))
+            raise FileNotFoundError(
+                f"Data file {data_path} not found. "
+                f"Available files: {available_files}")
+        return data_path
+    
+    def _read_header(self, data_path: Path) -> List[str]:
+        """Read the column names from the first line of the raw file."""
+        return list(pd.read_csv(data_path, sep=RAW_SEPARATOR, nrows=0).columns)
+    
+    def _read_options(self, header: List[str], columns: Optional[List[str]],
+                      filters: List[RowFilter]) -> dict:
+        """Build ``pd.read_csv`` arguments for a column selection."""
+        if columns is None:
+            usecols = header
+        else:
+            filter_cols = {col for col, _, _ in filters}
+            usecols = [col for col in header if col in columns or col in filter_cols]
+        options = self.schema.read_options(usecols)
+        options.update(sep=RAW_SEPARATOR, na_values=RAW_NA_VALUES, low_memory=False)
+        if columns is not None:
+            options['usecols'] = usecols
+        return options
+            
+    @profiled('create_derived_features')
     def create_derived_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Create business-specific derived features.
         
@@ -98,4 +384,19 @@ class InsuranceDataLoader:
             return df
         except KeyError as e:
             logger.error(f"Missing column for feature engineering: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+    
+    def iter_derived_features(self, chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """Create derived features chunk by chunk.
+        
+        Every derived feature is row-local, so a chunked stream yields the
+        same values as ``create_derived_features`` on the whole frame.
+        
+        Args:
+            chunks: Iterable of raw DataFrame chunks
+            
+        Yields:
+            Chunks with the derived features added
+        """
+        for chunk in chunks:
+            yield self.create_derived_features(chunk)
\ No newline at end of file
@@ -0,0 +1,174 @@
+"""Process-pool execution of the feature and cleaning stages.
+
+The frame is split into partitions (row blocks or the groups of a column
+such as Province), each partition is handed to a worker as an Arrow IPC
+file in shared memory, and the workers derive features and apply the
+fitted cleaner. Results come back the same way and are reassembled in
+the original row order, so the output matches the serial pipeline.
+"""
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from .cleaner import DataCleaner
+from .loader import InsuranceDataLoader
+from .schema import concat_chunks, resolve_column
+from ..utils.logger import get_logger
+from ..utils.processes import process_pool
+
+logger = get_logger(__name__)
+
+SHARED_MEMORY_DIR = '/dev/shm'
+
+# Per-process state set up once by the pool initializer
+_WORKER = {}
+
+
+def _init_worker(config_manager, strategy_config: dict, cleaner_state: dict):
+    """Build the loader and frozen cleaner once per worker process."""
+    _WORKER['loader'] = InsuranceDataLoader(config_manager)
+    cleaner = DataCleaner(strategy_config)
+    cleaner.state_ = cleaner_state
+    _WORKER['cleaner'] = cleaner
+
+
+def _process_partition(in_path: str, out_path: str) -> int:
+    """Derive features and clean one partition between two IPC files."""
+    df = _read_ipc(in_path)
+    df = _WORKER['loader'].create_derived_features(df)
+    df = _WORKER['cleaner'].transform(df, inplace=True)
+    _write_ipc(df, out_path)
+    return len(df)
+
+
+def _write_ipc(df: pd.DataFrame, path: str):
+    """Write a DataFrame as an Arrow IPC file."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def _read_ipc(path: str) -> pd.DataFrame:
+    """Read an Arrow IPC file through a memory map."""
+    with pa.memory_map(path) as source:
+        return pa.ipc.open_file(source).read_all().to_pandas()
+
+
+class ParallelPreprocessor:
+    """Runs feature derivation and cleaning across a process pool.
+
+    The cleaner is fitted once on the whole frame in the parent process;
+    workers only apply the frozen statistics, so partitioning does not
+    change the result.
+
+    Args:
+        config_manager: Configuration manager instance
+        cleaner: Cleaner to fit and apply
+        max_workers: Worker processes; defaults to ``pipeline.max_workers``
+            or the CPU count
+        partition_by: ``'rows'`` for contiguous row blocks or a column
+            name to partition by its values; defaults to
+            ``pipeline.partition_by``
+    """
+
+    def __init__(self, config_manager, cleaner: DataCleaner,
+                 max_workers: Optional[int] = None,
+                 partition_by: Optional[str] = None):
+        self.config = config_manager
+        self.cleaner = cleaner
+        self.max_workers = (
+            max_workers or self.config.get('pipeline.max_workers') or os.cpu_count()
+        )
+        self.partition_by = (
+            partition_by or self.config.get('pipeline.partition_by', 'rows')
+        )
+
+    def run(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Fit the cleaner on ``df`` and derive/clean it in parallel.
+
+        Args:
+            df: Raw DataFrame
+
+        Returns:
+            DataFrame with derived features, cleaned, in input row order
+        """
+        try:
+            self.cleaner.fit(df)
+            positions = self._partition(df)
+            scratch = tempfile.mkdtemp(
+                prefix='insurance-', dir=self._scratch_root()
+            )
+            try:
+                results = self._run_partitions(df, positions, Path(scratch))
+            finally:
+                shutil.rmtree(scratch, ignore_errors=True)
+
+            out = concat_chunks(results)
+            if self.partition_by != 'rows':
+                order = np.argsort(np.concatenate(positions), kind='stable')
+                out = out.take(order).reset_index(drop=True)
+            out.index = df.index
+            logger.info(
+                f"Parallel preprocessing finished: {len(positions)} partitions "
+                f"on {self.max_workers} workers"
+            )
+            return out
+        except Exception as e:
+            logger.error(f"Parallel preprocessing failed: {str(e)}")
+            raise
+
+    def _run_partitions(self, df: pd.DataFrame, positions: List[np.ndarray],
+                        scratch: Path) -> List[pd.DataFrame]:
+        """Hand partitions to the pool and read the results back in order."""
+        in_paths, out_paths = [], []
+        for i, rows in enumerate(positions):
+            in_path = scratch / f"in-{i:05d}.arrow"
+            _write_ipc(df.iloc[rows], str(in_path))
+            in_paths.append(str(in_path))
+            out_paths.append(str(scratch / f"out-{i:05d}.arrow"))
+
+        with process_pool(
+            max_workers=self.max_workers,
+            initializer=_init_worker,
+            initargs=(self.config, self.cleaner.strategies, self.cleaner.state_)
+        ) as pool:
+            list(pool.map(_process_partition, in_paths, out_paths))
+
+        results = []
+        for in_path, out_path in zip(in_paths, out_paths):
+            os.remove(in_path)
+            results.append(_read_ipc(out_path))
+            os.remove(out_path)
+        return results
+
+    def _partition(self, df: pd.DataFrame) -> List[np.ndarray]:
+        """Split row positions into row blocks or column-value groups."""
+        if self.partition_by == 'rows':
+            n_parts = max(1, min(self.max_workers, len(df)))
+            return [
+                block for block in np.array_split(np.arange(len(df)), n_parts)
+                if block.size
+            ]
+
+        col = resolve_column(self.partition_by, df.columns)
+        if col is None:
+            raise KeyError(f"Partition column {self.partition_by} not found")
+        codes, _ = pd.factorize(df[col], sort=True, use_na_sentinel=False)
+        order = np.argsort(codes, kind='stable')
+        bounds = np.flatnonzero(np.diff(codes[order])) + 1
+        return np.split(order, bounds)
+
+    def _scratch_root(self) -> Optional[str]:
+        """Prefer shared memory for the IPC hand-off when available."""
+        configured = self.config.get('pipeline.scratch_dir')
+        if configured:
+            return configured
+        return SHARED_MEMORY_DIR if os.path.isdir(SHARED_MEMORY_DIR) else None
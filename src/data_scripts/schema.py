@@ -0,0 +1,204 @@
+"""Column schema utilities for the raw insurance extract.
+
+Translates the ``data.schema`` section of the configuration into the
+dtype arguments understood by pandas readers, resolves configured column
+names against the columns actually present in a file, evaluates row
+filters and reassembles chunked reads into a single compact DataFrame.
+"""
+
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Options shared by every reader of the pipe-delimited raw file
+RAW_SEPARATOR = '|'
+RAW_NA_VALUES = [' ', '.000000000000']
+
+# Row filters are conjunctions of (column, op, value), as in pyarrow
+RowFilter = Tuple[str, str, object]
+FILTER_OPS = ('==', '=', '!=', '<', '<=', '>', '>=', 'in', 'not in')
+
+
+def resolve_column(name: str, columns: Iterable[str]) -> Optional[str]:
+    """Resolve a configured column name against available columns.
+
+    Exact matches win; otherwise a case-insensitive match is returned.
+
+    Args:
+        name: Column name as written in the configuration
+        columns: Columns available in the DataFrame or file
+
+    Returns:
+        Matching column name, or None if the column is absent
+    """
+    columns = list(columns)
+    if name in columns:
+        return name
+    lowered = name.lower()
+    for col in columns:
+        if col.lower() == lowered:
+            return col
+    return None
+
+
+class RawSchema:
+    """Explicit dtype schema for the raw pipe-delimited file.
+
+    The schema configuration maps dtype names to lists of columns, with
+    the special key ``date_columns`` listing columns to parse as dates::
+
+        schema:
+          date_columns: ["TransactionMonth"]
+          category: ["Province", "Gender"]
+          float32: ["TotalPremium", "TotalClaims"]
+
+    Args:
+        schema_config: ``data.schema`` section of the configuration
+    """
+
+    def __init__(self, schema_config: Optional[dict] = None):
+        schema_config = dict(schema_config or {})
+        self.date_columns = list(schema_config.pop('date_columns', []))
+        self.dtypes = {
+            col: dtype
+            for dtype, cols in schema_config.items()
+            for col in (cols or [])
+        }
+
+    def read_options(self, header: Iterable[str]) -> dict:
+        """Build ``pd.read_csv`` keyword arguments for a file header.
+
+        Columns declared in the schema but missing from the file are
+        dropped so extracts with fewer columns still parse.
+
+        Args:
+            header: Column names present in the file
+
+        Returns:
+            Dictionary with ``dtype`` and ``parse_dates`` entries
+        """
+        header = list(header)
+        dtype = {}
+        for col, col_dtype in self.dtypes.items():
+            resolved = resolve_column(col, header)
+            if resolved is not None:
+                dtype[resolved] = col_dtype
+        parse_dates = [
+            resolved for resolved in
+            (resolve_column(col, header) for col in self.date_columns)
+            if resolved is not None
+        ]
+        return {'dtype': dtype, 'parse_dates': parse_dates}
+
+    def normalize_filters(self, filters: Optional[Sequence[RowFilter]],
+                          header: Iterable[str]) -> List[RowFilter]:
+        """Validate row filters and align them with a file header.
+
+        Column names are resolved like configured columns and values on
+        date columns are converted to timestamps so they compare against
+        parsed dates in pandas and pyarrow alike.
+
+        Args:
+            filters: ``(column, op, value)`` tuples, e.g. from the config
+            header: Column names present in the file
+
+        Returns:
+            Normalised list of filter tuples
+
+        Raises:
+            KeyError: If a filter references an unknown column
+            ValueError: For unsupported operators
+        """
+        header = list(header)
+        date_columns = {resolve_column(col, header) for col in self.date_columns}
+        normalized = []
+        for col, op, value in filters or []:
+            resolved = resolve_column(col, header)
+            if resolved is None:
+                raise KeyError(f"Filter column {col} not found in data")
+            if op not in FILTER_OPS:
+                raise ValueError(f"Unsupported filter operator: {op}")
+            if resolved in date_columns:
+                if op in ('in', 'not in'):
+                    value = [pd.Timestamp(v) for v in value]
+                else:
+                    value = pd.Timestamp(value)
+            elif op in ('in', 'not in'):
+                value = list(value)
+            normalized.append((resolved, op, value))
+        return normalized
+
+
+def concat_chunks(chunks: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate DataFrame chunks without losing categorical dtypes.
+
+    Each chunk of a chunked read carries its own category set, and
+    ``pd.concat`` falls back to ``object`` when they differ. Categories
+    are unioned first so the assembled frame stays compact.
+
+    Args:
+        chunks: DataFrames sharing the same columns
+
+    Returns:
+        Single DataFrame with a fresh RangeIndex
+    """
+    chunks: List[pd.DataFrame] = list(chunks)
+    if not chunks:
+        return pd.DataFrame()
+    if len(chunks) == 1:
+        return chunks[0].reset_index(drop=True)
+
+    cat_cols = [
+        col for col, dtype in chunks[0].dtypes.items()
+        if isinstance(dtype, pd.CategoricalDtype)
+    ]
+    for col in cat_cols:
+        categories = chunks[0][col].cat.categories
+        for chunk in chunks[1:]:
+            categories = categories.union(chunk[col].cat.categories)
+        for chunk in chunks:
+            chunk[col] = chunk[col].cat.set_categories(categories)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def filter_mask(df: pd.DataFrame, filters: Sequence[RowFilter]) -> np.ndarray:
+    """Evaluate conjunctive row filters against a DataFrame.
+
+    Mirrors the semantics of pyarrow's ``filters`` argument so the same
+    filter list can be pushed down to CSV chunks and Parquet datasets.
+
+    Args:
+        df: DataFrame to filter
+        filters: ``(column, op, value)`` tuples that must all hold
+
+    Returns:
+        Boolean array selecting the matching rows
+
+    Raises:
+        ValueError: For unsupported operators
+    """
+    mask = np.ones(len(df), dtype=bool)
+    for col, op, value in filters:
+        series = df[col]
+        if op in ('==', '='):
+            cond = series == value
+        elif op == '!=':
+            # Missing values never compare unequal in pyarrow
+            cond = (series != value) & series.notna()
+        elif op == '<':
+            cond = series < value
+        elif op == '<=':
+            cond = series <= value
+        elif op == '>':
+            cond = series > value
+        elif op == '>=':
+            cond = series >= value
+        elif op == 'in':
+            cond = series.isin(value)
+        elif op == 'not in':
+            cond = ~series.isin(value)
+        else:
+            raise ValueError(f"Unsupported filter operator: {op}")
+        mask &= np.asarray(cond, dtype=bool)
+    return mask
@@ -0,0 +1,200 @@
+"""Parquet storage helpers for chunked insurance data.
+
+Chunks parsed from the raw file are written as individual Parquet parts
+inside a directory and read back as a single pyarrow dataset. Part
+schemas are normalised on write and unified on read, so chunks whose
+inferred dtypes differ (an all-null column, an integer column that gains
+a NaN) still form one consistent dataset.
+"""
+
+import shutil
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import fs
+
+PART_TEMPLATE = 'part-{:05d}.parquet'
+STAGING_SUFFIX = '.tmp'
+
+
+def to_arrow_table(df: pd.DataFrame) -> pa.Table:
+    """Convert a DataFrame chunk into a normalised Arrow table.
+
+    Dictionary indices are widened to int32 so parts with different
+    category counts share one type, and float columns that are entirely
+    missing become null-typed so they unify with any later type.
+
+    Args:
+        df: DataFrame chunk to convert
+
+    Returns:
+        Arrow table without the pandas index
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    fields, columns = [], []
+    for field, column in zip(table.schema, table.columns):
+        if pa.types.is_dictionary(field.type):
+            field = field.with_type(pa.dictionary(pa.int32(), field.type.value_type))
+            column = column.cast(field.type)
+        elif pa.types.is_floating(field.type) and column.null_count == len(column):
+            field = field.with_type(pa.null())
+            column = pa.nulls(len(column))
+        fields.append(field)
+        columns.append(column)
+    schema = pa.schema(fields, metadata=table.schema.metadata)
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def write_parquet_part(df: pd.DataFrame, directory: Union[str, Path],
+                       index: int) -> Path:
+    """Write one DataFrame chunk as a numbered part of a dataset.
+
+    Args:
+        df: DataFrame chunk to write
+        directory: Dataset directory
+        index: Sequence number of the part
+
+    Returns:
+        Path of the written part file
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / PART_TEMPLATE.format(index)
+    pq.write_table(to_arrow_table(df), path)
+    return path
+
+
+def write_parquet_stream(chunks: Iterable[pd.DataFrame],
+                         directory: Union[str, Path]) -> int:
+    """Write a stream of chunks as a part dataset, replacing any old one.
+
+    Parts go to a temporary sibling directory that is swapped in once
+    the stream is exhausted, so readers never see a half-written dataset.
+
+    Args:
+        chunks: DataFrame chunks to write, in order
+        directory: Dataset directory
+
+    Returns:
+        Total number of rows written
+    """
+    directory = Path(directory)
+    tmp_path = directory.with_name(directory.name + STAGING_SUFFIX)
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    tmp_path.mkdir(parents=True)
+    rows = 0
+    for i, chunk in enumerate(chunks):
+        write_parquet_part(chunk, tmp_path, i)
+        rows += len(chunk)
+    shutil.rmtree(directory, ignore_errors=True)
+    tmp_path.rename(directory)
+    return rows
+
+
+def dataset_parts(directory: Union[str, Path]) -> List[Path]:
+    """List the part files of a dataset directory in order.
+
+    Staging directories left behind by an interrupted
+    ``write_parquet_stream`` are skipped, so their rows are not read
+    twice.
+
+    Args:
+        directory: Dataset directory
+
+    Returns:
+        Sorted part file paths
+    """
+    directory = Path(directory)
+    parts = sorted(
+        part for part in directory.rglob('*.parquet')
+        if not any(p.endswith(STAGING_SUFFIX)
+                   for p in part.relative_to(directory).parent.parts)
+    )
+    if not parts:
+        raise FileNotFoundError(f"No parquet parts found in {directory}")
+    return parts
+
+
+def dataset_schema(directory: Union[str, Path]) -> pa.Schema:
+    """Unify the schemas of every part in a dataset directory.
+
+    Args:
+        directory: Dataset directory
+
+    Returns:
+        Schema that every part can be cast to
+    """
+    parts = dataset_parts(directory)
+    schema = pa.unify_schemas(
+        [pq.read_schema(part) for part in parts],
+        promote_options='permissive'
+    )
+    # Columns missing in every part read back as float64, as pandas infers
+    fields = [
+        field.with_type(pa.float64()) if pa.types.is_null(field.type) else field
+        for field in schema
+    ]
+    return pa.schema(fields, metadata=schema.metadata)
+
+
+def read_parquet_dataset(directory: Union[str, Path],
+                         columns: Optional[List[str]] = None,
+                         filters: Optional[List[tuple]] = None) -> pd.DataFrame:
+    """Read a part directory through a memory-mapped pyarrow dataset.
+
+    Column projection and row filters are pushed down to the scanner, so
+    only the requested columns are decoded and row groups whose
+    statistics cannot match are skipped.
+
+    Args:
+        directory: Dataset directory
+        columns: Columns to read; all columns when None
+        filters: Conjunctive ``(column, op, value)`` row filters
+
+    Returns:
+        DataFrame assembled from every part, in part order
+    """
+    dataset = _open_dataset(directory)
+    expression = pq.filters_to_expression(filters) if filters else None
+    table = dataset.to_table(columns=columns, filter=expression)
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def iter_parquet_dataset(directory: Union[str, Path],
+                         columns: Optional[List[str]] = None,
+                         filters: Optional[List[tuple]] = None,
+                         batch_size: int = 250_000) -> Iterator[pd.DataFrame]:
+    """Stream a part directory as DataFrame chunks.
+
+    Args:
+        directory: Dataset directory
+        columns: Columns to read; all columns when None
+        filters: Conjunctive ``(column, op, value)`` row filters
+        batch_size: Maximum rows per chunk
+
+    Yields:
+        DataFrame chunks in part order
+    """
+    dataset = _open_dataset(directory)
+    expression = pq.filters_to_expression(filters) if filters else None
+    scanner = dataset.scanner(
+        columns=columns, filter=expression, batch_size=batch_size
+    )
+    for batch in scanner.to_batches():
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+def _open_dataset(directory: Union[str, Path]) -> ds.Dataset:
+    """Open a part directory as a memory-mapped dataset with a unified schema."""
+    directory = Path(directory).resolve()
+    return ds.dataset(
+        [str(part) for part in dataset_parts(directory)],
+        schema=dataset_schema(directory),
+        format='parquet',
+        filesystem=fs.LocalFileSystem(use_mmap=True)
+    )
@@ -0,0 +1,47 @@
+"""Out-of-core preprocessing for insurance data.
+
+Runs feature derivation and cleaning over chunk streams so the full
+history never has to be held in memory: a first pass fits the cleaner
+on mergeable statistics, a second pass transforms each chunk and writes
+it straight to a Parquet part dataset.
+"""
+
+from pathlib import Path
+from typing import Optional, Union
+
+from .cleaner import DataCleaner
+from .loader import InsuranceDataLoader
+from .storage import write_parquet_stream
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def preprocess_out_of_core(loader: InsuranceDataLoader, cleaner: DataCleaner,
+                           output_dir: Union[str, Path],
+                           chunksize: Optional[int] = None) -> int:
+    """Derive features and clean the raw data chunk by chunk.
+
+    Args:
+        loader: Data loader providing the raw chunk stream
+        cleaner: Cleaner to fit on the stream and apply to each chunk
+        output_dir: Directory of the processed Parquet part dataset
+        chunksize: Rows per chunk; defaults to ``data.chunksize``
+
+    Returns:
+        Number of processed rows written
+    """
+    try:
+        logger.info("Fitting cleaner on raw data stream")
+        cleaner.fit_stream(loader.iter_raw_data(chunksize))
+
+        logger.info(f"Writing processed chunks to: {output_dir}")
+        chunks = cleaner.transform_stream(
+            loader.iter_derived_features(loader.iter_raw_data(chunksize))
+        )
+        rows = write_parquet_stream(chunks, output_dir)
+        logger.info(f"Out-of-core preprocessing wrote {rows} rows")
+        return rows
+    except Exception as e:
+        logger.error(f"Out-of-core preprocessing failed: {str(e)}")
+        raise
@@ -1,32 +1,385 @@
-"""Data version control utilities for the insurance analytics project."""
+"""Data version control utilities for the insurance analytics project.
 
+Files are fingerprinted with a two-level Merkle hash: fixed-size blocks
+are hashed in parallel threads straight from a memory map, and the file
+hash is the digest of the block digests. Block digests are kept in an
+on-disk index keyed by path and validated by inode, size and mtime, so
+checking an unchanged file only costs a ``stat``, and a file that only
+grew (a new month appended) rehashes just its tail.
+
+The remote is a content-addressed store of read-only objects named by
+that hash, so each distinct version is stored once. Checkouts reflink
+or hardlink the stored object rather than copying it where the
+filesystem allows. The ``snapshot`` and ``checkout`` CLI commands store
+the tracked files and restore them by hash.
+"""
+
+import hashlib
+import json
+import mmap
 import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterable, List, Optional
 
 # Use relative import since this is in the same package
 from ..utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+HASH_BLOCK_SIZE = 8 * 1024 * 1024
+# Bump when the hashing scheme or index layout changes
+INDEX_VERSION = 1
+LINK_TYPES = ('reflink', 'hardlink', 'copy')
+
+# Index entries of files modified this close to their hashing are not
+# trusted: a write within the same mtime tick would go unnoticed
+RACY_WINDOW_NS = 2_000_000_000
+
+# Linux ioctl sharing a file's extents with another (btrfs, XFS)
+_FICLONE = 0x40049409
+
+
+def _hash_blocks(path: Path, size: int, first_block: int, block_size: int,
+                 max_workers: int, stop_block: Optional[int] = None) -> List[str]:
+    """SHA-256 digests of the blocks from ``first_block`` up to ``stop_block``.
+
+    Blocks are hashed from a read-only memory map; hashlib releases the
+    GIL on large buffers, so threads hash blocks concurrently.
+    ``stop_block`` defaults to the end of the file.
+    """
+    n_blocks = -(-size // block_size)
+    if stop_block is not None:
+        n_blocks = min(n_blocks, stop_block)
+    if first_block >= n_blocks:
+        return []
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mm:
+        view = memoryview(mm)
+
+        def digest(block: int) -> str:
+            start = block * block_size
+            return hashlib.sha256(view[start:start + block_size]).hexdigest()
+
+        try:
+            blocks = range(first_block, n_blocks)
+            if max_workers <= 1 or len(blocks) == 1:
+                return [digest(block) for block in blocks]
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(blocks))) as pool:
+                return list(pool.map(digest, blocks))
+        finally:
+            view.release()
+
+
+def _merkle_root(block_digests: List[str], size: int, block_size: int) -> str:
+    """Combine block digests into the file hash."""
+    digest = hashlib.sha256(f"{size}:{block_size}:".encode())
+    for block_digest in block_digests:
+        digest.update(bytes.fromhex(block_digest))
+    return digest.hexdigest()
+
+
+def _reflink(source: Path, target: Path):
+    """Copy-on-write clone of ``source``; raises OSError where unsupported."""
+    try:
+        import fcntl
+    except ImportError as e:
+        raise OSError("reflinks are not supported on this platform") from e
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+
+
+def _copy(source: Path, target: Path):
+    shutil.copyfile(source, target)
+
+
+_LINKERS = {
+    'reflink': _reflink,
+    'hardlink': os.link,
+    'copy': _copy,
+}
+
 class DVCManager:
     """Manages Data Version Control operations for the project.
     
     Args:
         remote_path: Path to DVC remote storage
+        index_path: Hash index file; defaults to ``hash_index.json`` in
+            the remote
+        block_size: Bytes per hashed block. Changing it rehashes every file
+        max_workers: Hashing threads; defaults to the CPU count
+        link_types: Checkout methods to try in order, from ``LINK_TYPES``
     """
     
-    def __init__(self, remote_path: str):
+    def __init__(self, remote_path: str, index_path: Optional[str] = None,
+                 block_size: int = HASH_BLOCK_SIZE, max_workers: Optional[int] = None,
+                 link_types: Optional[Iterable[str]] = None):
         self.remote_path = Path(remote_path)
+        self.index_path = Path(index_path) if index_path else self.remote_path / 'hash_index.json'
+        self.block_size = block_size
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.link_types = tuple(link_types or LINK_TYPES)
+        unknown = set(self.link_types) - set(LINK_TYPES)
+        if unknown:
+            raise ValueError(f"Unknown link types: {sorted(unknown)}")
         self.initialized = False
+        self._index = None
+        self._dirty = set()
+        self._batch_depth = 0
+        self._lock = threading.Lock()
         self._check_dvc_ready()
     
+    @classmethod
+    def from_config(cls, config_manager) -> 'DVCManager':
+        """Build a manager from the ``dvc`` config section."""
+        block_size_mb = config_manager.get('dvc.block_size_mb')
+        return cls(
+            remote_path=config_manager.get('dvc.remote_path'),
+            index_path=config_manager.get('dvc.index_path'),
+            block_size=int(block_size_mb * 1024 * 1024) if block_size_mb else HASH_BLOCK_SIZE,
+            max_workers=config_manager.get('dvc.hash_workers'),
+            link_types=config_manager.get('dvc.link_types')
+        )
+    
     def _check_dvc_ready(self):
         """Verify DVC setup and remote configuration."""
         if not self.remote_path.exists():
             self.remote_path.mkdir(parents=True, exist_ok=True)
             logger.info(f"Created DVC remote: {self.remote_path}")
         self.initialized = True
-        
+    
     def get_versioned_path(self, file_path: str) -> Path:
         """Get path relative to data/raw directory."""
-        return (Path('data/raw') / file_path).resolve()
\ No newline at end of file
+        return (Path('data/raw') / file_path).resolve()
+    
+    def content_hash(self, file_path) -> str:
+        """Compute the Merkle hash of a file's contents.
+        
+        The hash index answers for files whose inode, size and mtime are
+        unchanged. A file that grew in place keeps the digests of its
+        complete blocks before the old end and hashes only the rest,
+        once its first and last complete old blocks hash as before; a
+        file truncated and rewritten in place fails that check and is
+        hashed in full, as are files replaced by a rename (new inode).
+        
+        Args:
+            file_path: File to hash
+        
+        Returns:
+            Hex digest of the file contents
+        """
+        path = Path(file_path).resolve()
+        with self._lock:
+            stat = path.stat()
+            index = self._load_index()
+            entry = index.get(str(path))
+            if self._is_current(entry, stat):
+                return entry['hash']
+            
+            first_block = 0
+            if self._is_appended(entry, stat):
+                first_block = self._retained_blocks(path, entry, stat)
+            hashed_at = time.time_ns()
+            start = time.perf_counter()
+            blocks = entry['blocks'][:first_block] if first_block else []
+            blocks += _hash_blocks(path, stat.st_size, first_block, self.block_size,
+                                   self.max_workers)
+            entry = {
+                'hash': _merkle_root(blocks, stat.st_size, self.block_size),
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'inode': stat.st_ino,
+                'device': stat.st_dev,
+                'block_size': self.block_size,
+                'hashed_at_ns': hashed_at,
+                'blocks': blocks,
+            }
+            index[str(path)] = entry
+            self._dirty.add(str(path))
+            if not self._batch_depth:
+                self._save_index()
+        logger.info(
+            f"Hashed {path.name}: {len(blocks) - first_block} of {len(blocks)} blocks "
+            f"in {time.perf_counter() - start:.3f}s"
+        )
+        return entry['hash']
+    
+    def fingerprint(self, file_path, options: Optional[dict] = None) -> str:
+        """Fingerprint a tracked file together with the options used to read it.
+        
+        Args:
+            file_path: Source data file
+            options: JSON-serialisable parse options that affect the result
+        
+        Returns:
+            Short hex key identifying this content/options combination
+        """
+        payload = json.dumps(
+            {'content': self.content_hash(file_path), 'options': options or {}},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+    
+    def object_path(self, digest: str) -> Path:
+        """Location of the stored object with hash ``digest``."""
+        return self.remote_path / 'objects' / digest[:2] / digest[2:]
+    
+    def add(self, file_path) -> str:
+        """Store a file's current contents in the remote.
+        
+        Contents already stored are not copied again. Objects are
+        read-only, so hardlinked checkouts cannot be edited in place.
+        
+        Args:
+            file_path: File to store
+        
+        Returns:
+            Content hash addressing the stored object
+        
+        Raises:
+            RuntimeError: If the file changed while it was being stored
+        """
+        path = Path(file_path).resolve()
+        digest = self.content_hash(path)
+        target = self.object_path(digest)
+        if target.exists():
+            logger.info(f"Already stored: {path.name} ({digest[:12]})")
+            return digest
+        
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        try:
+            before = path.stat()
+            self._link(path, tmp_path, [t for t in self.link_types if t != 'hardlink'])
+            after = path.stat()
+            if (before.st_size, before.st_mtime_ns) != (after.st_size, after.st_mtime_ns):
+                raise RuntimeError(f"{path} changed while it was being stored")
+            os.chmod(tmp_path, 0o444)
+            os.replace(tmp_path, target)
+        except Exception as e:
+            tmp_path.unlink(missing_ok=True)
+            logger.error(f"Storing {path} failed: {str(e)}")
+            raise
+        logger.info(f"Stored {path.name} as {digest[:12]}")
+        return digest
+    
+    def checkout(self, digest: str, target_path) -> str:
+        """Materialise a stored object at ``target_path``.
+        
+        Tries ``link_types`` in order; a hardlinked file shares the
+        read-only object, so replace it rather than editing it.
+        
+        Args:
+            digest: Content hash returned by ``add``
+            target_path: Destination file, replaced if it exists
+        
+        Returns:
+            Link type used
+        """
+        source = self.object_path(digest)
+        if not source.exists():
+            raise FileNotFoundError(f"Object {digest} is not in {self.remote_path}")
+        target = Path(target_path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+        link_type = self._link(source, tmp_path, self.link_types)
+        os.replace(tmp_path, target)
+        logger.info(f"Checked out {digest[:12]} to {target} ({link_type})")
+        return link_type
+    
+    @staticmethod
+    def _link(source: Path, target: Path, link_types: Iterable[str]) -> str:
+        """Create ``target`` from ``source`` with the first working link type."""
+        errors = []
+        for link_type in link_types:
+            target.unlink(missing_ok=True)
+            try:
+                _LINKERS[link_type](source, target)
+                return link_type
+            except OSError as e:
+                errors.append(f"{link_type}: {e}")
+        target.unlink(missing_ok=True)
+        raise OSError(f"Could not link {source} to {target} ({'; '.join(errors)})")
+    
+    def _is_current(self, entry: Optional[dict], stat: os.stat_result) -> bool:
+        """Whether an index entry still describes the file."""
+        return (
+            entry is not None
+            and entry['block_size'] == self.block_size
+            and (entry['inode'], entry['device']) == (stat.st_ino, stat.st_dev)
+            and (entry['size'], entry['mtime_ns']) == (stat.st_size, stat.st_mtime_ns)
+            and stat.st_mtime_ns < entry['hashed_at_ns'] - RACY_WINDOW_NS
+        )
+    
+    def _is_appended(self, entry: Optional[dict], stat: os.stat_result) -> bool:
+        """Whether the file grew in place since it was indexed."""
+        return (
+            entry is not None
+            and entry['block_size'] == self.block_size
+            and (entry['inode'], entry['device']) == (stat.st_ino, stat.st_dev)
+            and stat.st_size > entry['size']
+        )
+    
+    def _retained_blocks(self, path: Path, entry: dict, stat: os.stat_result) -> int:
+        """Complete old blocks of a grown file whose digests can be kept.
+
+        Rehashes the first and the last complete old block. A mismatch
+        means the file was rewritten rather than appended to, so none
+        are kept.
+        """
+        n_blocks = entry['size'] // self.block_size
+        for block in sorted({0, n_blocks - 1} if n_blocks else ()):
+            digest = _hash_blocks(path, stat.st_size, block, self.block_size, 1,
+                                  stop_block=block + 1)
+            if digest != [entry['blocks'][block]]:
+                logger.info(f"{path.name} was rewritten in place; hashing it in full")
+                return 0
+        return n_blocks
+    
+    def _load_index(self) -> dict:
+        if self._index is None:
+            self._index = self._read_index()
+        return self._index
+    
+    def _read_index(self) -> dict:
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return index.get('files', {}) if index.get('version') == INDEX_VERSION else {}
+    
+    @contextmanager
+    def batch(self):
+        """Defer hash index writes until the block exits.
+        
+        Every file hashed inside the block is written to the index in a
+        single rewrite at the end, instead of one rewrite per file.
+        Blocks may nest; the outermost one writes.
+        """
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if not self._batch_depth:
+                    self._save_index()
+    
+    def _save_index(self):
+        """Write the newly hashed entries, merged with other processes' writes."""
+        if not self._dirty:
+            return
+        files = self._read_index()
+        files.update({key: self._index[key] for key in self._dirty})
+        self._dirty.clear()
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_name(f"{self.index_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': INDEX_VERSION, 'files': files}, f)
+        os.replace(tmp_path, self.index_path)
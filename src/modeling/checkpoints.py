@@ -0,0 +1,41 @@
+"""Model checkpoint metadata shared by training, scoring and explanation.
+
+Every checkpoint ``<name>.joblib`` has a ``<name>.json`` sidecar holding
+the format version, the training key, test metrics and the encoder state
+the model was trained with. The module has no heavy imports so the
+scorer can read it without loading scikit-learn.
+"""
+
+import json
+from pathlib import Path
+from typing import Union
+
+# Bump when the sidecar layout changes; 2 added the encoder state
+CHECKPOINT_VERSION = 2
+
+
+def read_checkpoint_meta(checkpoint: Union[str, Path]) -> dict:
+    """Load the metadata of a checkpoint written by the current trainer.
+
+    Args:
+        checkpoint: Model checkpoint (``.joblib``) path
+
+    Returns:
+        Metadata dictionary, including the ``encoder`` state
+
+    Raises:
+        FileNotFoundError: If the checkpoint or its metadata is missing
+        ValueError: If the checkpoint predates the current format
+    """
+    checkpoint = Path(checkpoint)
+    meta_path = checkpoint.with_suffix('.json')
+    if not checkpoint.exists() or not meta_path.exists():
+        raise FileNotFoundError(f"Model checkpoint not found: {checkpoint}")
+    with open(meta_path) as f:
+        meta = json.load(f)
+    if meta.get('version') != CHECKPOINT_VERSION or 'encoder' not in meta:
+        raise ValueError(
+            f"Checkpoint {checkpoint} has format version {meta.get('version')}, "
+            f"expected {CHECKPOINT_VERSION}; retrain it with `train --force`"
+        )
+    return meta
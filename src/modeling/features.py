@@ -0,0 +1,153 @@
+"""Feature encoding for risk models.
+
+Builds a sparse float32 design matrix: one-hot indicators for the
+categorical features and standardized numeric features with median
+imputation. Column names from the config are resolved case-insensitively
+against the frame, so ``CubicCapacity`` finds ``cubiccapacity``.
+"""
+
+from typing import Iterable, List
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from ..data_scripts.schema import resolve_column
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class FeatureEncoder:
+    """One-hot and numeric feature encoder with JSON-serialisable state.
+
+    Categories unseen at fit time encode as all zeros; missing numeric
+    values take the fitted median.
+
+    Args:
+        categorical: Categorical feature names
+        numeric: Numeric feature names
+
+    Attributes:
+        feature_names_ (List[str]): Output column names after ``fit``
+    """
+
+    def __init__(self, categorical: Iterable[str] = (), numeric: Iterable[str] = ()):
+        self.categorical = list(categorical)
+        self.numeric = list(numeric)
+        self.columns_ = {}
+        self.categories_ = {}
+        self.medians_ = {}
+        self.means_ = {}
+        self.scales_ = {}
+        self.feature_names_: List[str] = []
+
+    def fit(self, df: pd.DataFrame) -> 'FeatureEncoder':
+        """Learn categories and numeric statistics.
+
+        Args:
+            df: Training frame
+
+        Returns:
+            The fitted encoder
+
+        Raises:
+            KeyError: If a feature is not in ``df``
+        """
+        self.columns_ = {name: self._resolve(name, df.columns)
+                         for name in self.categorical + self.numeric}
+        self.feature_names_ = []
+        for name in self.categorical:
+            values = df[self.columns_[name]].dropna().unique()
+            categories = sorted(str(v) for v in values)
+            self.categories_[name] = categories
+            self.feature_names_.extend(f"{name}={c}" for c in categories)
+        for name in self.numeric:
+            values = pd.to_numeric(df[self.columns_[name]], errors='coerce').astype(float)
+            median = values.median()
+            self.medians_[name] = 0.0 if np.isnan(median) else float(median)
+            filled = values.fillna(self.medians_[name])
+            self.means_[name] = float(filled.mean()) if len(filled) else 0.0
+            std = float(filled.std()) if len(filled) > 1 else 0.0
+            self.scales_[name] = std if std > 0 else 1.0
+            self.feature_names_.append(name)
+        logger.info(f"Fitted feature encoder with {len(self.feature_names_)} features")
+        return self
+
+    def transform(self, df: pd.DataFrame) -> sparse.csr_matrix:
+        """Encode a frame into a sparse float32 matrix.
+
+        Args:
+            df: Frame with the fitted features
+
+        Returns:
+            CSR matrix with one row per row of ``df``
+        """
+        if not self.feature_names_:
+            raise RuntimeError("FeatureEncoder must be fitted before transform")
+        blocks = []
+        n_rows = len(df)
+        for name in self.categorical:
+            col = self._resolve(name, df.columns)
+            categories = self.categories_[name]
+            codes = pd.Categorical(df[col].astype(str).where(df[col].notna()),
+                                   categories=categories).codes
+            rows = np.flatnonzero(codes >= 0)
+            blocks.append(sparse.csr_matrix(
+                (np.ones(rows.size, dtype=np.float32), (rows, codes[rows])),
+                shape=(n_rows, len(categories))
+            ))
+        if self.numeric:
+            dense = np.empty((n_rows, len(self.numeric)), dtype=np.float32)
+            for j, name in enumerate(self.numeric):
+                col = self._resolve(name, df.columns)
+                values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+                values = np.where(np.isnan(values), self.medians_[name], values)
+                dense[:, j] = (values - self.means_[name]) / self.scales_[name]
+            blocks.append(sparse.csr_matrix(dense))
+        return sparse.hstack(blocks, format='csr', dtype=np.float32)
+
+    def fit_transform(self, df: pd.DataFrame) -> sparse.csr_matrix:
+        """Fit on ``df`` and encode it."""
+        return self.fit(df).transform(df)
+
+    def to_dict(self) -> dict:
+        """Serialise the fitted state to JSON-compatible types."""
+        return {
+            'categorical': self.categorical,
+            'numeric': self.numeric,
+            'columns': self.columns_,
+            'categories': self.categories_,
+            'medians': self.medians_,
+            'means': self.means_,
+            'scales': self.scales_,
+            'feature_names': self.feature_names_,
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> 'FeatureEncoder':
+        """Rebuild an encoder serialised with ``to_dict``."""
+        encoder = cls(state['categorical'], state['numeric'])
+        encoder.columns_ = state['columns']
+        encoder.categories_ = state['categories']
+        encoder.medians_ = state['medians']
+        encoder.means_ = state['means']
+        encoder.scales_ = state['scales']
+        encoder.feature_names_ = state['feature_names']
+        return encoder
+
+    def input_columns(self, columns: Iterable[str]) -> List[str]:
+        """Resolve every feature to its column in ``columns``.
+
+        Raises:
+            KeyError: If a feature is not in ``columns``
+        """
+        return [self._resolve(name, columns) for name in self.categorical + self.numeric]
+
+    def _resolve(self, name: str, columns: Iterable[str]) -> str:
+        """Find a feature's column, preferring the one seen at fit time."""
+        known = self.columns_.get(name)
+        col = known if known in columns else resolve_column(name, columns)
+        if col is None:
+            raise KeyError(f"Feature column not found: {name}")
+        return col
@@ -0,0 +1,392 @@
+"""Frequency, severity and pure-premium GLMs fitted on compressed cells.
+
+With only categorical rating factors, every policy row in the same
+combination of levels shares one linear predictor, so the GLM likelihood
+depends on the rows only through per-cell sums. ``CompressedGLM``
+collapses the cleaned frame into those cells (exposure, claim count,
+claim amount and the squared amounts needed for the dispersion) and fits
+statsmodels' IRLS on a design with one row per cell:
+
+- frequency: Poisson claim counts with ``log(exposure)`` as offset
+- severity: Gamma mean claim amounts weighted by the claim count
+- pure premium: Tweedie claim amount per unit of exposure, weighted by
+  the exposure
+
+Coefficients, fitted means, the Pearson dispersion and standard errors
+equal those of the row-level fit; deviance and log-likelihood refer to
+the cells. Without an exposure column every row counts as one unit.
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+import statsmodels.api as sm
+
+from ..data_scripts.schema import resolve_column
+from ..utils.logger import get_logger
+from ..utils.profiling import profiled
+
+logger = get_logger(__name__)
+
+DEFAULT_MODELS = ['frequency', 'severity', 'pure_premium']
+MISSING_LEVEL = '(missing)'
+
+# Family of each model
+FAMILIES = {
+    'frequency': 'poisson',
+    'severity': 'gamma',
+    'pure_premium': 'tweedie',
+}
+
+
+def _family(name: str, var_power: float) -> sm.families.Family:
+    log = sm.families.links.Log()
+    if name == 'poisson':
+        return sm.families.Poisson(log)
+    if name == 'gamma':
+        return sm.families.Gamma(log)
+    if name == 'tweedie':
+        return sm.families.Tweedie(log, var_power=var_power)
+    raise ValueError(f"Unknown GLM family: {name}")
+
+
+def _variance_power(family: str, var_power: float) -> float:
+    return {'poisson': 1.0, 'gamma': 2.0}.get(family, var_power)
+
+
+def _as_levels(values: pd.Series) -> pd.Series:
+    """Categorical series of string levels with missing values as a level."""
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype('category')
+    values = values.cat.rename_categories([str(c) for c in values.cat.categories])
+    if values.isna().any():
+        values = values.cat.add_categories(MISSING_LEVEL).fillna(MISSING_LEVEL)
+    return values.cat.remove_unused_categories()
+
+
+class CompressedGLM:
+    """Fits pricing GLMs on categorical rating factors via cell compression.
+
+    Uses the ``model`` config section: ``categorical_features`` and the
+    ``glm`` block (``models``, ``tweedie_var_power``, ``exposure``,
+    ``claim_count``, ``claim_amount``, ``max_iter``, ``tol``).
+
+    Each factor is dummy coded against its level with the largest
+    exposure; levels unseen at fit time price at that base level. Levels
+    without claims are left out of a model's fit together with their
+    rows; their coefficient is NaN and they predict NaN.
+
+    Args:
+        features: Categorical rating factors
+        models: Models to fit, from ``DEFAULT_MODELS``
+        tweedie_var_power: Variance power of Tweedie models, in (1, 2)
+        exposure: Exposure column; None counts each row as one unit
+        claim_count: Column with the claim count of a row
+        claim_amount: Column with the (non-negative) claim amount of a row
+        max_iter: IRLS iteration limit
+        tol: IRLS convergence tolerance
+
+    Attributes:
+        levels_ (Dict[str, List[str]]): Levels per factor, base level first
+        results_ (dict): Fitted statsmodels results per model
+        coef_ (Dict[str, pd.DataFrame]): ``coef``, ``std_err`` and
+            ``p_value`` per design column (see ``coefficient_names``)
+    """
+
+    def __init__(self, features: Iterable[str],
+                 models: Optional[Iterable[str]] = None,
+                 tweedie_var_power: float = 1.5,
+                 exposure: Optional[str] = None,
+                 claim_count: str = 'HasClaim',
+                 claim_amount: str = 'ClaimSeverity',
+                 max_iter: int = 100, tol: float = 1e-8):
+        self.features = list(features)
+        if not self.features:
+            raise ValueError("CompressedGLM needs at least one categorical feature")
+        self.models = list(models or DEFAULT_MODELS)
+        unknown = set(self.models) - set(DEFAULT_MODELS)
+        if unknown:
+            raise ValueError(f"Unknown GLM models: {sorted(unknown)}")
+        if not 1 < tweedie_var_power < 2:
+            raise ValueError("tweedie_var_power must be between 1 and 2")
+        self.tweedie_var_power = tweedie_var_power
+        self.exposure = exposure
+        self.claim_count = claim_count
+        self.claim_amount = claim_amount
+        self.max_iter = max_iter
+        self.tol = tol
+        self.levels_: Dict[str, List[str]] = {}
+        self.results_ = {}
+        self.coef_: Dict[str, pd.DataFrame] = {}
+        self.n_cells_ = 0
+        self.n_rows_ = 0
+        self.n_fitted_: Dict[str, dict] = {}
+
+    @classmethod
+    def from_config(cls, config_manager) -> 'CompressedGLM':
+        """Build the GLMs from the ``model`` config section."""
+        settings = config_manager.get('model.glm', {}) or {}
+        return cls(
+            config_manager.get('model.categorical_features', []),
+            models=settings.get('models'),
+            tweedie_var_power=settings.get('tweedie_var_power', 1.5),
+            exposure=settings.get('exposure'),
+            claim_count=settings.get('claim_count', 'HasClaim'),
+            claim_amount=settings.get('claim_amount', 'ClaimSeverity'),
+            max_iter=settings.get('max_iter', 100),
+            tol=settings.get('tol', 1e-8)
+        )
+
+    @profiled('glm.compress')
+    def compress(self, df: pd.DataFrame, aggregate: bool = True) -> pd.DataFrame:
+        """Collapse rows into cells of identical factor levels.
+
+        Args:
+            df: Cleaned DataFrame with the claim columns
+            aggregate: Sum rows into cells; False keeps one cell per row,
+                which gives the row-level fit
+
+        Returns:
+            One row per cell with the factor levels, ``rows``,
+            ``exposure``, ``claims``, ``amount`` and the sums of squares
+            behind the row-level dispersion: ``severity_sq`` (squared
+            amount per claim, times claims) and ``rate_sq`` (squared
+            amount per exposure, times exposure)
+        """
+        columns = {name: self._resolve(name, df.columns) for name in self.features}
+        count = pd.to_numeric(df[self._resolve(self.claim_count, df.columns)], errors='coerce')
+        amount = pd.to_numeric(df[self._resolve(self.claim_amount, df.columns)], errors='coerce')
+        if self.exposure:
+            exposure = pd.to_numeric(df[self._resolve(self.exposure, df.columns)], errors='coerce')
+        else:
+            exposure = pd.Series(1.0, index=df.index)
+
+        frame = pd.DataFrame({name: _as_levels(df[col]) for name, col in columns.items()})
+        amount = amount.fillna(0.0).clip(lower=0.0).astype(float)
+        count = count.fillna(0.0).astype(float)
+        frame['rows'] = 1
+        frame['exposure'] = exposure.astype(float)
+        frame['claims'] = count
+        frame['amount'] = amount
+        frame['severity_sq'] = (amount ** 2 / count).where(count > 0, 0.0)
+        frame['rate_sq'] = amount ** 2 / frame['exposure']
+
+        # Rows without positive exposure carry no information
+        valid = frame['exposure'] > 0
+        if not valid.all():
+            logger.warning(f"Dropping {int((~valid).sum())} rows without positive exposure")
+            frame = frame[valid]
+        if not aggregate:
+            return frame.reset_index(drop=True)
+        cells = frame.groupby(self.features, observed=True, sort=False).sum().reset_index()
+        logger.info(f"Compressed {len(frame)} rows into {len(cells)} cells")
+        return cells
+
+    @profiled('glm.fit')
+    def fit(self, df: pd.DataFrame, aggregate: bool = True) -> 'CompressedGLM':
+        """Compress the data and fit every configured model.
+
+        Args:
+            df: Cleaned DataFrame with the rating factors and claim columns
+            aggregate: Fit on cells (True) or on the individual rows
+
+        Returns:
+            The fitted model set
+        """
+        try:
+            cells = self.compress(df, aggregate=aggregate)
+            self.levels_ = {}
+            for name in self.features:
+                exposure = cells.groupby(name, observed=True)['exposure'].sum()
+                base = exposure.idxmax()
+                self.levels_[name] = [base] + [level for level in exposure.index if level != base]
+            X = self._design(cells)
+            self.n_cells_ = len(cells)
+            self.n_rows_ = int(cells['rows'].sum())
+            self.results_, self.coef_, self.n_fitted_ = {}, {}, {}
+            for name in self.models:
+                (self.results_[name], self.coef_[name],
+                 self.n_fitted_[name]) = self._fit_model(name, cells, X)
+            return self
+        except Exception as e:
+            logger.error(f"GLM fitting failed: {str(e)}")
+            raise
+
+    def _fit_model(self, name: str, cells: pd.DataFrame, X: np.ndarray):
+        """Fit one model on the cells, with the row-level dispersion.
+
+        A level without any claim in the fitted cells sends its
+        coefficient to minus infinity. Its cells are dropped together
+        with its design column, which is the limit of the full fit: the
+        other coefficients are those the row-level fit converges to. The
+        level's coefficient is NaN, so it is not priced.
+
+        Returns:
+            The statsmodels result, the coefficient table over every
+            design column, and the ``observations`` (claims for
+            severity, rows otherwise) and ``claims`` actually fitted
+        """
+        family_name = FAMILIES[name]
+        family = _family(family_name, self.tweedie_var_power)
+        subset = cells[cells['claims'] > 0] if name == 'severity' else cells
+        X = X[subset.index]
+        positive = (subset['amount'] if name != 'frequency' else subset['claims']).to_numpy() > 0
+        # Dropping cells can leave another level without claims, so repeat
+        rows = np.ones(len(subset), dtype=bool)
+        while True:
+            keep = X[rows & positive].any(axis=0)
+            keep[0] = True
+            fitted = rows & ~X[:, ~keep].any(axis=1)
+            if (fitted == rows).all():
+                break
+            rows = fitted
+        if not keep.all():
+            dropped = [n for n, k in zip(self.coefficient_names(), keep) if not k]
+            # Severity is fitted per claim, so its observations are claims
+            unit = 'claims' if name == 'severity' else 'rows'
+            logger.warning(f"GLM {name}: no claims for {dropped}; "
+                           f"left out with their {int(subset[unit][~rows].sum())} {unit}")
+            subset, X = subset[rows], X[rows]
+        claims = float(subset['claims'].sum())
+        n_obs = claims if name == 'severity' else int(subset['rows'].sum())
+
+        if name == 'frequency':
+            # Poisson counts with a log-exposure offset; the dispersion is fixed at 1
+            model = sm.GLM(subset['claims'].to_numpy(), X[:, keep], family=family,
+                           exposure=subset['exposure'].to_numpy())
+            result = model.fit(maxiter=self.max_iter, tol=self.tol)
+        else:
+            if name == 'severity':
+                weight, total_sq = subset['claims'], subset['severity_sq']
+            else:
+                weight, total_sq = subset['exposure'], subset['rate_sq']
+            weight = weight.to_numpy()
+            model = sm.GLM(subset['amount'].to_numpy() / weight, X[:, keep],
+                           family=family, var_weights=weight)
+            result = model.fit(maxiter=self.max_iter, tol=self.tol)
+
+            # Cells hide the spread within them, so the Pearson dispersion is
+            # rebuilt from the summed squares as if every row were fitted
+            mu = result.mu
+            power = _variance_power(family_name, self.tweedie_var_power)
+            chi2 = np.sum(
+                (total_sq.to_numpy() - 2 * mu * subset['amount'].to_numpy() + mu ** 2 * weight)
+                / mu ** power
+            )
+            scale = float(chi2 / (n_obs - np.linalg.matrix_rank(model.exog)))
+            result = model.fit(start_params=result.params, maxiter=self.max_iter,
+                               tol=self.tol, scale=scale)
+        logger.info("GLM fitted", model=name, family=family_name, cells=len(subset),
+                    iterations=result.fit_history['iteration'],
+                    converged=bool(result.converged), scale=float(result.scale))
+
+        coef = pd.DataFrame(
+            {'coef': np.nan, 'std_err': np.nan, 'p_value': np.nan},
+            index=self.coefficient_names()
+        )
+        coef.loc[keep, 'coef'] = result.params
+        coef.loc[keep, 'std_err'] = result.bse
+        coef.loc[keep, 'p_value'] = result.pvalues
+        return result, coef, {'observations': n_obs, 'claims': claims}
+
+    def _design(self, cells: pd.DataFrame) -> np.ndarray:
+        """Intercept plus one dummy column per non-base level."""
+        X = np.zeros((len(cells), 1 + sum(len(v) - 1 for v in self.levels_.values())))
+        X[:, 0] = 1.0
+        offset = 1
+        for name, levels in self.levels_.items():
+            codes = pd.Categorical(cells[name], categories=levels).codes
+            rows = np.flatnonzero(codes > 0)
+            X[rows, offset + codes[rows] - 1] = 1.0
+            offset += len(levels) - 1
+        return X
+
+    def coefficient_names(self) -> List[str]:
+        """Names of the design columns, in parameter order."""
+        names = ['Intercept']
+        for name, levels in self.levels_.items():
+            names.extend(f"{name}={level}" for level in levels[1:])
+        return names
+
+    def relativities(self, model: str) -> pd.DataFrame:
+        """Multiplicative relativity of every factor level.
+
+        Args:
+            model: Fitted model name
+
+        Returns:
+            Frame with ``feature``, ``level``, ``coef``, ``std_err``,
+            ``p_value`` and ``relativity``; base levels have relativity 1,
+            levels left out of the fit NaN, and the intercept row holds
+            the base rate
+        """
+        coef = self._coef(model)
+        rows = [{'feature': 'Intercept', 'level': None, **coef.iloc[0].to_dict()}]
+        position = 1
+        for name, levels in self.levels_.items():
+            rows.append({'feature': name, 'level': levels[0], 'coef': 0.0,
+                         'std_err': np.nan, 'p_value': np.nan})
+            for level in levels[1:]:
+                rows.append({'feature': name, 'level': level, **coef.iloc[position].to_dict()})
+                position += 1
+        table = pd.DataFrame(rows)
+        table['relativity'] = np.exp(table['coef'])
+        return table
+
+    def summary(self) -> pd.DataFrame:
+        """Fit statistics per model.
+
+        ``observations`` counts what each model was fitted on: claims
+        for severity, rows for the others, after leaving out the levels
+        without claims. ``claims`` is the claim count in the same fit.
+        """
+        return pd.DataFrame([{
+            'model': name,
+            'family': FAMILIES[name],
+            'cells': int(result.nobs),
+            'parameters': int(result.df_model) + 1,
+            'observations': self.n_fitted_[name]['observations'],
+            'claims': self.n_fitted_[name]['claims'],
+            'scale': float(result.scale),
+            'iterations': result.fit_history['iteration'],
+            'converged': bool(result.converged),
+        } for name, result in self.results_.items()])
+
+    def predict(self, df: pd.DataFrame, model: str) -> np.ndarray:
+        """Expected value per unit of exposure for each row.
+
+        Frequency predicts claims, severity the mean claim amount and
+        pure premium the claim amount per unit of exposure.
+
+        Args:
+            df: Frame with the rating factors
+            model: Fitted model name
+
+        Returns:
+            Predicted means, one per row of ``df``; NaN for levels left
+            out of the fit for lack of claims
+        """
+        params = self._coef(model)['coef'].to_numpy()
+        eta = np.full(len(df), params[0])
+        position = 1
+        for name, levels in self.levels_.items():
+            column = self._resolve(name, df.columns)
+            codes = pd.Categorical(_as_levels(df[column]), categories=levels).codes
+            # Base and unseen levels (code -1) both index the trailing zero
+            coef = np.concatenate([[0.0], params[position:position + len(levels) - 1], [0.0]])
+            eta += coef[codes]
+            position += len(levels) - 1
+        return np.exp(eta)
+
+    def _coef(self, model: str) -> pd.DataFrame:
+        if model not in self.coef_:
+            raise KeyError(f"GLM not fitted: {model}")
+        return self.coef_[model]
+
+    @staticmethod
+    def _resolve(name: str, columns) -> str:
+        column = resolve_column(name, columns)
+        if column is None:
+            raise KeyError(f"Column not found: {name}")
+        return column
@@ -0,0 +1,255 @@
+"""SHAP explanations for trained risk models on a stratified sample.
+
+Explaining every policy row is rarely needed for global importances, so
+rows are drawn from a stratified sample (by province and risk category by
+default) within a configurable budget. The sample is split into chunks
+that are explained across a process pool: TreeSHAP for tree models
+(XGBoost's built-in implementation, ``shap.TreeExplainer`` for sklearn
+forests) and the exact closed form for linear models. SHAP values are
+cached on disk keyed by the model checkpoint hash and a fingerprint of
+the sampled data, so re-plotting does not recompute them.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Iterable, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from .checkpoints import read_checkpoint_meta
+from .features import FeatureEncoder
+from ..data_scripts.schema import resolve_column
+from ..utils.logger import get_logger
+from ..utils.processes import process_pool
+
+logger = get_logger(__name__)
+
+DEFAULT_STRATIFY_BY = ['Province', 'RiskCategory']
+HASH_BLOCK_SIZE = 8 * 1024 * 1024
+# Bump when the way SHAP values are computed changes
+CACHE_VERSION = 2
+
+# Per-process model and explainer set up once by the pool initializer
+_WORKER = {}
+
+
+def _init_worker(checkpoint: str, background_mean: np.ndarray):
+    """Load the model and build its explainer once per worker."""
+    _WORKER['explain'] = _make_explainer(joblib.load(checkpoint), background_mean)
+
+
+def _explain_chunk(X: np.ndarray) -> np.ndarray:
+    """Explain one chunk of rows (process pool entry point)."""
+    return _WORKER['explain'](X)
+
+
+def _make_explainer(model, background_mean: np.ndarray):
+    """Callable mapping a CSR feature matrix to ``(n, features + 1)`` values.
+
+    The last column holds the expected value, so every row sums to the
+    model prediction. XGBoost gets the CSR matrix itself: it was trained
+    on CSR, where an absent entry means missing rather than zero.
+    """
+    if hasattr(model, 'get_booster'):
+        from xgboost import DMatrix
+        booster = model.get_booster()
+        best = getattr(model, 'best_iteration', None)
+        iteration_range = (0, best + 1) if best is not None else (0, 0)
+        # XGBoost's native TreeSHAP already appends the bias column
+        return lambda X: booster.predict(
+            DMatrix(X), pred_contribs=True, iteration_range=iteration_range
+        )
+    if hasattr(model, 'coef_'):
+        coef = np.ravel(model.coef_)
+        expected = float(np.ravel(model.intercept_)[0] + background_mean @ coef)
+        return lambda X: np.column_stack([
+            (X.toarray() - background_mean) * coef, np.full(X.shape[0], expected)
+        ])
+    import shap
+    explainer = shap.TreeExplainer(model)
+    expected = float(np.ravel(explainer.expected_value)[0])
+    return lambda X: np.column_stack([
+        explainer.shap_values(X.toarray(), check_additivity=False),
+        np.full(X.shape[0], expected)
+    ])
+
+
+def stratified_sample(df: pd.DataFrame, size: int,
+                      stratify_by: Optional[Iterable[str]] = None,
+                      random_state: int = 0) -> np.ndarray:
+    """Draw row positions proportionally from every stratum.
+
+    Each stratum keeps at least one row while the budget allows, so small
+    provinces or extreme risk categories are not lost to sampling. The
+    rest of the budget is split in proportion to stratum size with
+    largest-remainder rounding, so exactly ``size`` rows are drawn.
+
+    Args:
+        df: Frame to sample
+        size: Row budget
+        stratify_by: Columns defining the strata; missing ones are ignored
+        random_state: Sampling seed
+
+    Returns:
+        Sorted row positions
+    """
+    if size >= len(df):
+        return np.arange(len(df))
+    columns = [resolve_column(c, df.columns) for c in stratify_by or []]
+    columns = [c for c in columns if c is not None]
+    rng = np.random.default_rng(random_state)
+    if not columns:
+        return np.sort(rng.choice(len(df), size, replace=False))
+
+    strata = df.groupby(columns, observed=True, dropna=False, sort=False).ngroup().to_numpy()
+    counts = np.bincount(strata)
+    if len(counts) >= size:
+        # More strata than budget: one row from each of the largest strata
+        quota = np.zeros(len(counts), dtype=np.int64)
+        quota[np.argsort(-counts, kind='stable')[:size]] = 1
+    else:
+        # Strata too small for a proportional row get one; the others
+        # share the rest of the budget, until no more fall below one
+        forced = np.zeros(len(counts), dtype=bool)
+        while True:
+            budget = size - forced.sum()
+            share = np.where(forced, 0.0, counts * budget / counts[~forced].sum())
+            newly = ~forced & (share < 1)
+            if not newly.any():
+                break
+            forced |= newly
+        quota = np.floor(share).astype(np.int64)
+        remainder = share - quota
+        quota[np.argsort(-remainder, kind='stable')[:budget - quota.sum()]] += 1
+        quota[forced] = 1
+    # Random order within each stratum, then take each stratum's quota
+    order = np.lexsort((rng.random(len(df)), strata))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    rank = np.arange(len(df)) - starts[strata[order]]
+    return np.sort(order[rank < quota[strata[order]]])
+
+
+class ShapExplainer:
+    """Computes and caches SHAP values for a checkpointed model.
+
+    Uses the ``model.interpretability`` config section: ``models``,
+    ``top_n_features``, ``sample_size``, ``stratify_by``, ``chunk_size``,
+    ``max_workers``, ``cache_dir`` and ``random_state``.
+
+    Args:
+        config_manager: Configuration manager instance
+    """
+
+    def __init__(self, config_manager):
+        self.config = config_manager
+        settings = self.config.get('model.interpretability', {}) or {}
+        self.save_dir = Path(self.config.get('model.save_dir', 'models'))
+        self.models = settings.get('models', ['xgboost'])
+        self.top_n = settings.get('top_n_features', 10)
+        self.sample_size = settings.get('sample_size', 5000)
+        self.stratify_by = settings.get('stratify_by', DEFAULT_STRATIFY_BY)
+        self.chunk_size = settings.get('chunk_size', 1000)
+        self.max_workers = settings.get('max_workers')
+        self.cache_dir = Path(settings.get('cache_dir') or self.save_dir / 'shap')
+        self.random_state = settings.get('random_state', 0)
+
+    def explain(self, model_name: str, df: pd.DataFrame) -> dict:
+        """SHAP values for a stratified sample of ``df``.
+
+        Args:
+            model_name: Checkpoint name in ``model.save_dir``
+            df: Cleaned DataFrame with derived features
+
+        Returns:
+            Dictionary with ``values`` (rows x features), ``base_values``,
+            ``feature_names``, ``rows`` (sampled positions in ``df``) and
+            ``importance`` (mean absolute SHAP per feature, descending)
+        """
+        try:
+            checkpoint = self.save_dir / f"{model_name}.joblib"
+            encoder = FeatureEncoder.from_dict(read_checkpoint_meta(checkpoint)['encoder'])
+            rows = stratified_sample(df, self.sample_size, self.stratify_by,
+                                     self.random_state)
+            sample = df.iloc[rows]
+            key = self._cache_key(checkpoint, sample[encoder.input_columns(df.columns)])
+            cache_path = self.cache_dir / f"{model_name}-{key}.npz"
+
+            if cache_path.exists():
+                logger.info(f"Using cached SHAP values: {cache_path}")
+                with np.load(cache_path, allow_pickle=False) as cached:
+                    contributions = cached['contributions']
+            else:
+                X = encoder.transform(sample)
+                contributions = self._compute(checkpoint, X)
+                self._store(cache_path, model_name, contributions)
+
+            values = contributions[:, :-1]
+            importance = pd.Series(
+                np.abs(values).mean(axis=0), index=encoder.feature_names_, name='importance'
+            ).sort_values(ascending=False)
+            return {
+                'values': values,
+                'base_values': contributions[:, -1],
+                'feature_names': encoder.feature_names_,
+                'rows': rows,
+                'importance': importance,
+            }
+        except Exception as e:
+            logger.error(f"SHAP explanation failed: {str(e)}")
+            raise
+
+    def global_importance(self, model_name: str, df: pd.DataFrame) -> pd.DataFrame:
+        """Top features by mean absolute SHAP value.
+
+        Returns:
+            Frame with ``feature`` and ``importance`` columns
+        """
+        importance = self.explain(model_name, df)['importance'].head(self.top_n)
+        return importance.rename_axis('feature').reset_index()
+
+    def _compute(self, checkpoint: Path, X: sparse.csr_matrix) -> np.ndarray:
+        """Explain the sample in chunks, across processes when configured."""
+        background = np.asarray(X.mean(axis=0)).ravel()
+        chunks = [X[i:i + self.chunk_size] for i in range(0, X.shape[0], self.chunk_size)]
+        if not self.max_workers or self.max_workers == 1 or len(chunks) == 1:
+            explain = _make_explainer(joblib.load(checkpoint), background)
+            parts = [explain(chunk) for chunk in chunks]
+        else:
+            with process_pool(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(str(checkpoint), background)
+            ) as pool:
+                parts = list(pool.map(_explain_chunk, chunks))
+        logger.info(f"Computed SHAP values for {X.shape[0]} rows in {len(chunks)} chunks")
+        return np.vstack(parts) if parts else np.empty((0, X.shape[1] + 1))
+
+    def _cache_key(self, checkpoint: Path, sample: pd.DataFrame) -> str:
+        """Hash the model file, the sampled inputs and the sampling settings."""
+        digest = hashlib.sha256()
+        with open(checkpoint, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+        digest.update(pd.util.hash_pandas_object(sample, index=False).to_numpy().tobytes())
+        digest.update(json.dumps({
+            'version': CACHE_VERSION,
+            'columns': list(sample.columns),
+            'sample_size': self.sample_size,
+            'stratify_by': self.stratify_by,
+            'random_state': self.random_state,
+        }, sort_keys=True).encode())
+        return digest.hexdigest()[:16]
+
+    def _store(self, cache_path: Path, model_name: str, contributions: np.ndarray):
+        """Write SHAP values and drop this model's older cache entries."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        for stale in self.cache_dir.glob(f"{model_name}-*.npz"):
+            stale.unlink()
+        # np.savez appends .npz unless the name already ends with it
+        tmp_path = cache_path.with_name(cache_path.stem + '.tmp.npz')
+        np.savez(tmp_path, contributions=contributions)
+        tmp_path.replace(cache_path)
@@ -0,0 +1,304 @@
+"""Parallel, resumable training of claim risk models.
+
+The encoded train/test matrices are built once and cached on disk, keyed
+by a fingerprint of the input data and the feature configuration. The
+candidate models then train concurrently in a process pool; each worker
+loads the cached matrices from disk, gets a share of the ``n_jobs``
+budget, and checkpoints its fitted model to ``save_dir`` together with a
+metadata file holding its metrics and encoder state. A
+rerun reuses every checkpoint whose key still matches, so a crashed run
+resumes with the models that had not finished.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import as_completed
+from pathlib import Path
+from typing import Dict, List
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import train_test_split
+
+from .checkpoints import CHECKPOINT_VERSION
+from .features import FeatureEncoder
+from ..data_scripts.schema import resolve_column
+from ..utils.logger import get_logger
+from ..utils.processes import process_pool
+from ..utils.profiling import profiled
+
+logger = get_logger(__name__)
+
+DEFAULT_CANDIDATES = ['linear', 'random_forest', 'xgboost']
+FEATURE_CACHE_DIR = 'features'
+# Bump when the cached matrices are built differently; 2 kept claim-free rows
+MATRIX_VERSION = 2
+
+
+def _build_model(name: str, params: dict, n_jobs: int, random_state: int):
+    """Instantiate a candidate model."""
+    if name == 'linear':
+        return LinearRegression(**params)
+    if name == 'random_forest':
+        return RandomForestRegressor(
+            **{'n_estimators': 200, 'min_samples_leaf': 5, **params},
+            n_jobs=n_jobs, random_state=random_state
+        )
+    if name == 'xgboost':
+        from xgboost import XGBRegressor
+        return XGBRegressor(
+            **{'n_estimators': 1000, 'learning_rate': 0.05, 'max_depth': 6,
+               'early_stopping_rounds': 50, **params},
+            tree_method='hist', n_jobs=n_jobs, random_state=random_state
+        )
+    raise ValueError(f"Unknown model candidate: {name}")
+
+
+def _train_candidate(name: str, params: dict, n_jobs: int, random_state: int,
+                     matrix_dir: str, checkpoint: str, key: str) -> dict:
+    """Fit one candidate on the cached matrices and checkpoint it.
+
+    Runs in a worker process.
+    """
+    matrix_dir = Path(matrix_dir)
+    X_train = sparse.load_npz(matrix_dir / 'X_train.npz')
+    X_test = sparse.load_npz(matrix_dir / 'X_test.npz')
+    y_train = np.load(matrix_dir / 'y_train.npy')
+    y_test = np.load(matrix_dir / 'y_test.npy')
+
+    params = dict(params)
+    validation_fraction = params.pop('validation_fraction', 0.1)
+    model = _build_model(name, params, n_jobs, random_state)
+    fit_info = {}
+    if name == 'xgboost':
+        # Early stopping watches a slice of the training data, never the test set
+        X_fit, X_val, y_fit, y_val = train_test_split(
+            X_train, y_train, test_size=validation_fraction, random_state=random_state
+        )
+        model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+        fit_info['best_iteration'] = int(model.best_iteration)
+    else:
+        model.fit(X_train, y_train)
+
+    predictions = model.predict(X_test)
+    metrics = {
+        'rmse': float(np.sqrt(mean_squared_error(y_test, predictions))),
+        'mae': float(mean_absolute_error(y_test, predictions)),
+        'r2': float(r2_score(y_test, predictions)),
+    }
+    checkpoint = Path(checkpoint)
+    tmp_path = checkpoint.with_suffix('.tmp')
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, checkpoint)
+    with open(matrix_dir / 'encoder.json') as f:
+        encoder_state = json.load(f)
+    meta = {
+        'version': CHECKPOINT_VERSION, 'key': key, 'metrics': metrics,
+        'encoder': encoder_state, **fit_info
+    }
+    # The metadata file marks the checkpoint complete
+    meta_tmp = checkpoint.with_suffix('.json.tmp')
+    with open(meta_tmp, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(meta_tmp, checkpoint.with_suffix('.json'))
+    return meta
+
+
+class RiskModelTrainer:
+    """Trains and evaluates the configured claim risk models.
+
+    Uses the ``model`` config section: ``features``/``categorical_features``/
+    ``numeric_features``, ``target``, ``test_size``, ``save_dir`` and the
+    optional ``candidates``, ``params``, ``n_jobs`` and ``random_state``.
+
+    Args:
+        config_manager: Configuration manager instance
+    """
+
+    def __init__(self, config_manager):
+        self.config = config_manager
+        self.save_dir = Path(self.config.get('model.save_dir', 'models'))
+        self.target = self.config.get('model.target', 'TotalClaims')
+        self.test_size = self.config.get('model.test_size', 0.3)
+        self.random_state = self.config.get('model.random_state', 42)
+        self.candidates = self.config.get('model.candidates') or DEFAULT_CANDIDATES
+        self.params = self.config.get('model.params') or {}
+        self.n_jobs = self.config.get('model.n_jobs') or os.cpu_count() or 1
+        self.categorical = self.config.get('model.categorical_features', [])
+        self.numeric = self.config.get('model.numeric_features', [])
+
+    @profiled('model.train')
+    def train_models(self, df: pd.DataFrame) -> Dict[str, dict]:
+        """Train every candidate, resuming from valid checkpoints.
+
+        Args:
+            df: Cleaned DataFrame with derived features
+
+        Returns:
+            Per-model dictionary with ``metrics``, ``model_path`` and
+            ``resumed``, plus ``feature_names`` under ``'_features'``
+        """
+        try:
+            matrix_dir, encoder = self.build_feature_matrix(df)
+            results, pending = {}, []
+            for name in self.candidates:
+                key = self._model_key(name, matrix_dir.name)
+                meta = self._read_checkpoint(name, key)
+                if meta is not None:
+                    logger.info(f"Resuming from checkpoint: {name}")
+                    results[name] = self._result(name, meta, resumed=True)
+                else:
+                    pending.append((name, key))
+
+            errors = {}
+            if pending:
+                budget = self._job_budget([name for name, _ in pending])
+                with process_pool(max_workers=len(pending)) as pool:
+                    futures = {
+                        pool.submit(
+                            _train_candidate, name, self.params.get(name, {}),
+                            budget[name], self.random_state, str(matrix_dir),
+                            str(self._checkpoint_path(name)), key
+                        ): name
+                        for name, key in pending
+                    }
+                    for future in as_completed(futures):
+                        name = futures[future]
+                        try:
+                            meta = future.result()
+                        except Exception as e:
+                            # Keep the other candidates' checkpoints
+                            logger.error(f"Training {name} failed: {str(e)}")
+                            errors[name] = e
+                            continue
+                        logger.info("Model trained", model=name, **meta['metrics'])
+                        results[name] = self._result(name, meta, resumed=False)
+            if errors:
+                raise RuntimeError(f"Model training failed for: {sorted(errors)}")
+
+            results['_features'] = {'feature_names': encoder.feature_names_}
+            return results
+        except Exception as e:
+            logger.error(f"Model training failed: {str(e)}")
+            raise
+
+    @profiled('model.feature_matrix')
+    def build_feature_matrix(self, df: pd.DataFrame):
+        """Encode and split the data once, caching the matrices on disk.
+
+        Args:
+            df: Cleaned DataFrame with derived features
+
+        Returns:
+            Tuple of the cache directory and the fitted encoder
+        """
+        target = resolve_column(self.target, df.columns)
+        if target is None:
+            raise KeyError(f"Target column not found: {self.target}")
+        encoder = FeatureEncoder(self.categorical, self.numeric)
+        used = encoder.input_columns(df.columns)
+        key = self._data_key(df[list(dict.fromkeys(used + [target]))])
+        matrix_dir = self.save_dir / FEATURE_CACHE_DIR / key
+
+        if (matrix_dir / 'encoder.json').exists():
+            logger.info(f"Using cached feature matrices: {matrix_dir}")
+            with open(matrix_dir / 'encoder.json') as f:
+                return matrix_dir, FeatureEncoder.from_dict(json.load(f))
+
+        # The raw file's NA markers also match zero, so a missing claim
+        # amount means no claim; dropping those rows would leave claimants only
+        y = pd.to_numeric(df[target], errors='coerce').fillna(0.0).to_numpy(dtype=np.float32)
+        train_rows, test_rows = train_test_split(
+            np.arange(len(df)), test_size=self.test_size, random_state=self.random_state
+        )
+        # Fit on the training rows only so the test set stays unseen
+        encoder.fit(df.iloc[train_rows])
+        X = encoder.transform(df)
+
+        tmp_dir = matrix_dir.with_name(matrix_dir.name + '.tmp')
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+        sparse.save_npz(tmp_dir / 'X_train.npz', X[train_rows])
+        sparse.save_npz(tmp_dir / 'X_test.npz', X[test_rows])
+        np.save(tmp_dir / 'y_train.npy', y[train_rows])
+        np.save(tmp_dir / 'y_test.npy', y[test_rows])
+        with open(tmp_dir / 'encoder.json', 'w') as f:
+            json.dump(encoder.to_dict(), f, indent=2)
+        if matrix_dir.exists():
+            # os.replace cannot overwrite a non-empty directory
+            shutil.rmtree(matrix_dir)
+        os.replace(tmp_dir, matrix_dir)
+        for stale in matrix_dir.parent.iterdir():
+            if stale != matrix_dir:
+                shutil.rmtree(stale, ignore_errors=True)
+        logger.info(
+            f"Cached feature matrices at {matrix_dir}: "
+            f"{len(train_rows)} train / {len(test_rows)} test rows, {X.shape[1]} features"
+        )
+        return matrix_dir, encoder
+
+    def _job_budget(self, names: List[str]) -> Dict[str, int]:
+        """Split the ``n_jobs`` budget across concurrently training models.
+
+        The linear model is single-threaded; the tree ensembles share the
+        remaining cores.
+        """
+        budget = {name: 1 for name in names}
+        threaded = [name for name in names if name != 'linear']
+        if threaded:
+            share = max(1, (self.n_jobs - (len(names) - len(threaded))) // len(threaded))
+            for name in threaded:
+                budget[name] = share
+        return budget
+
+    def _data_key(self, df: pd.DataFrame) -> str:
+        """Fingerprint the model inputs together with the split settings."""
+        digest = hashlib.sha256()
+        digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+        digest.update(json.dumps({
+            'version': MATRIX_VERSION,
+            'columns': list(df.columns),
+            'categorical': self.categorical,
+            'numeric': self.numeric,
+            'test_size': self.test_size,
+            'random_state': self.random_state,
+        }, sort_keys=True).encode())
+        return digest.hexdigest()[:16]
+
+    def _model_key(self, name: str, data_key: str) -> str:
+        """Checkpoint key of a candidate: data, parameters and seed."""
+        payload = json.dumps({
+            'data': data_key,
+            'params': self.params.get(name, {}),
+            'random_state': self.random_state,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+    def _checkpoint_path(self, name: str) -> Path:
+        self.save_dir.mkdir(parents=True, exist_ok=True)
+        return self.save_dir / f"{name}.joblib"
+
+    def _read_checkpoint(self, name: str, key: str):
+        """Checkpoint metadata if it is complete and matches ``key``."""
+        meta_path = self._checkpoint_path(name).with_suffix('.json')
+        if not meta_path.exists() or not self._checkpoint_path(name).exists():
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get('version') != CHECKPOINT_VERSION or meta.get('key') != key:
+            return None
+        return meta
+
+    def _result(self, name: str, meta: dict, resumed: bool) -> dict:
+        return {
+            'metrics': meta['metrics'],
+            'model_path': str(self._checkpoint_path(name)),
+            'resumed': resumed,
+        }
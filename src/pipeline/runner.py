@@ -0,0 +1,354 @@
+"""Stage graph runner with cached intermediate artifacts.
+
+A pipeline is declared as stages, each naming its upstream stages and
+the configuration sections it depends on. Every stage gets a cache key
+derived from its code, its configuration sections and the keys of its
+upstream stages (plus an optional fingerprint of external inputs such as
+the raw file), so keys are known before anything runs. A stage's code
+is its function plus every module of the package it imports, directly
+or transitively, so editing the cleaner or the trainer invalidates the
+stages that use them. Stages whose
+artifacts are cached under their key are skipped, and stages whose inputs
+are ready run concurrently.
+"""
+
+import ast
+import functools
+import hashlib
+import inspect
+import json
+import shutil
+import sys
+import textwrap
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+import joblib
+import pandas as pd
+
+from ..data_scripts.storage import read_parquet_dataset, write_parquet_stream
+from ..utils.logger import get_logger
+from ..utils.profiling import profiled
+
+logger = get_logger(__name__)
+
+FRAME_ARTIFACT = 'frame'
+OBJECT_ARTIFACT = 'object.joblib'
+META_FILE = 'meta.json'
+
+
+def _imported_modules(tree: ast.AST, package: str) -> Set[str]:
+    """Absolute names of the modules imported anywhere in ``tree``.
+
+    ``from x import y`` also yields ``x.y``, which only matters when
+    ``y`` is a submodule; names that are not modules are dropped later.
+    """
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ''
+            if node.level:
+                parent = package.rsplit('.', node.level - 1)[0] if node.level > 1 else package
+                base = f"{parent}.{base}" if base else parent
+            names.add(base)
+            names.update(f"{base}.{alias.name}" for alias in node.names)
+    return names
+
+
+def _module_file(name: str) -> Optional[Path]:
+    """Source file of a module in a loaded top-level package, without importing it."""
+    top = sys.modules.get(name.split('.')[0])
+    if top is None or not getattr(top, '__path__', None):
+        return None
+    path = Path(list(top.__path__)[0]).joinpath(*name.split('.')[1:])
+    for candidate in (path.with_suffix('.py'), path / '__init__.py'):
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def _module_imports(name: str) -> tuple:
+    """Source of a package module and the modules of that package it imports."""
+    path = _module_file(name)
+    source = path.read_text()
+    package = name if path.name == '__init__.py' else name.rpartition('.')[0]
+    top = name.split('.')[0]
+    imported = _imported_modules(ast.parse(source), package)
+    return source, tuple(sorted(
+        m for m in imported if m.split('.')[0] == top and _module_file(m) is not None
+    ))
+
+
+def _dependency_sources(func: Callable, source: str) -> List[str]:
+    """Sources of the package modules ``func`` depends on.
+
+    Starts from the imports inside the function (stages import lazily)
+    and the module-level imports of its defining module, then follows
+    every import of those modules within the package.
+    """
+    module = getattr(func, '__module__', None) or ''
+    path = _module_file(module)
+    if path is None:
+        return []
+    package = module if path.name == '__init__.py' else module.rpartition('.')[0]
+    module_tree = ast.parse(_module_imports(module)[0])
+    module_level = [
+        node for node in module_tree.body
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+    ]
+    roots = _imported_modules(ast.Module(body=module_level, type_ignores=[]), package)
+    try:
+        roots |= _imported_modules(ast.parse(textwrap.dedent(source)), package)
+    except SyntaxError:
+        pass
+    top = module.split('.')[0]
+    seen, stack = {module}, sorted(roots)
+    while stack:
+        name = stack.pop()
+        if name in seen or name.split('.')[0] != top or _module_file(name) is None:
+            continue
+        seen.add(name)
+        stack.extend(_module_imports(name)[1])
+    return [_module_imports(name)[0] for name in sorted(seen)]
+
+
+class Stage:
+    """A named pipeline step.
+
+    Args:
+        name: Unique stage name
+        func: Callable receiving the outputs of ``inputs`` positionally
+        inputs: Names of upstream stages
+        config_keys: Dot-separated config sections the stage depends on
+        fingerprint: Optional callable fingerprinting external inputs
+            (e.g. the raw data file) that the cache key must track
+        cache: Whether the output is persisted and reused
+        version: Manual cache-busting tag for behaviour changes the
+            code hash cannot see
+    """
+
+    def __init__(self, name: str, func: Callable, inputs: Iterable[str] = (),
+                 config_keys: Iterable[str] = (),
+                 fingerprint: Optional[Callable[[], str]] = None,
+                 cache: bool = True, version: str = '1'):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.config_keys = list(config_keys)
+        self.fingerprint = fingerprint
+        self.cache = cache
+        self.version = version
+
+    def code_hash(self) -> str:
+        """Hash the stage function's source and the modules it depends on.
+
+        Falls back to the function's name when its source is unavailable.
+        """
+        try:
+            source = inspect.getsource(self.func)
+        except (OSError, TypeError):
+            source = getattr(self.func, '__qualname__', repr(self.func))
+        digest = hashlib.sha256(source.encode())
+        for module_source in _dependency_sources(self.func, source):
+            digest.update(module_source.encode())
+        return digest.hexdigest()[:16]
+
+
+class StageRunner:
+    """Executes a stage graph, skipping stages with cached artifacts.
+
+    DataFrame outputs are cached as Parquet part datasets, anything else
+    with joblib, under ``<cache_dir>/<stage>/<key>``.
+
+    Args:
+        config_manager: Configuration manager instance
+        cache_dir: Artifact directory; defaults to ``pipeline.stage_cache_dir``
+        max_workers: Concurrent stages; defaults to ``pipeline.stage_workers``
+        use_cache: Reuse cached artifacts; defaults to ``pipeline.stage_cache``
+    """
+
+    def __init__(self, config_manager, cache_dir: Optional[str] = None,
+                 max_workers: Optional[int] = None,
+                 use_cache: Optional[bool] = None):
+        self.config = config_manager
+        self.cache_dir = Path(
+            cache_dir or self.config.get('pipeline.stage_cache_dir', 'data/cache/stages')
+        )
+        self.max_workers = max_workers or self.config.get('pipeline.stage_workers', 2)
+        self.use_cache = (
+            self.config.get('pipeline.stage_cache', True) if use_cache is None else use_cache
+        )
+        self.stages: Dict[str, Stage] = {}
+
+    def add(self, stage: Stage) -> 'StageRunner':
+        """Register a stage; upstream stages must be added first.
+
+        Raises:
+            ValueError: On duplicate names or unknown inputs
+        """
+        if stage.name in self.stages:
+            raise ValueError(f"Duplicate stage: {stage.name}")
+        unknown = [name for name in stage.inputs if name not in self.stages]
+        if unknown:
+            raise ValueError(f"Stage {stage.name} has unknown inputs: {unknown}")
+        self.stages[stage.name] = stage
+        return self
+
+    def run(self, targets: Optional[List[str]] = None,
+            force: Iterable[str] = ()) -> Dict[str, object]:
+        """Run the stages needed for ``targets`` (all stages by default).
+
+        Args:
+            targets: Stages whose outputs are wanted; defaults to the
+                stages nothing else depends on
+            force: Stages to re-run even when cached; their downstream
+                stages re-run too, because their keys are unchanged but
+                their inputs may not be
+
+        Returns:
+            Outputs of the target stages keyed by stage name
+        """
+        targets = targets or self._sinks()
+        needed = self._ancestors(targets)
+        keys = self._keys(needed)
+        forced = self._descendants(set(force), needed)
+        to_run = self._plan(targets, keys, forced)
+        for name in needed:
+            if name not in to_run and self._is_cached(name, keys[name]):
+                logger.info("Stage cached, skipping", stage=name, key=keys[name])
+
+        outputs: Dict[str, object] = {}
+        pending = set(to_run)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                for name in sorted(pending):
+                    stage = self.stages[name]
+                    if any(dep in pending or dep in running.values() for dep in stage.inputs):
+                        continue
+                    args = [self._output(dep, keys, outputs) for dep in stage.inputs]
+                    logger.info("Running stage", stage=name, key=keys[name])
+                    func = profiled(f"stage.{name}")(stage.func)
+                    running[pool.submit(func, *args)] = name
+                    pending.discard(name)
+                if not running:
+                    raise RuntimeError(f"Stage graph cannot make progress: {sorted(pending)}")
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    outputs[name] = future.result()
+                    if self.stages[name].cache:
+                        self._store(name, keys[name], outputs[name])
+                    logger.info("Stage finished", stage=name)
+
+        return {name: self._output(name, keys, outputs) for name in targets}
+
+    def _output(self, name: str, keys: Dict[str, str], outputs: Dict[str, object]):
+        """Fetch a stage output from memory or, lazily, from the cache."""
+        if name not in outputs:
+            outputs[name] = self._load(name, keys[name])
+        return outputs[name]
+
+    def _keys(self, names: List[str]) -> Dict[str, str]:
+        """Compute cache keys in topological order."""
+        keys = {}
+        for name in names:
+            stage = self.stages[name]
+            payload = {
+                'stage': name,
+                'version': stage.version,
+                'code': stage.code_hash(),
+                'config': {key: self.config.get(key) for key in stage.config_keys},
+                'inputs': {dep: keys[dep] for dep in stage.inputs},
+                'fingerprint': stage.fingerprint() if stage.fingerprint else None,
+            }
+            encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+            keys[name] = hashlib.sha256(encoded).hexdigest()[:16]
+        return keys
+
+    def _plan(self, targets: List[str], keys: Dict[str, str], forced: set) -> List[str]:
+        """Stages that must execute, in topological order.
+
+        A stage runs when it is forced or has no cached artifact; its
+        upstream stages then run only if they are not cached either, so
+        uncached stages feeding a cached one are never executed.
+        """
+        to_run = set()
+        stack = list(targets)
+        while stack:
+            name = stack.pop()
+            if name in to_run:
+                continue
+            if name in forced or not self._is_cached(name, keys[name]):
+                to_run.add(name)
+                stack.extend(self.stages[name].inputs)
+        return [name for name in self.stages if name in to_run]
+
+    def _sinks(self) -> List[str]:
+        """Stages that no other stage consumes."""
+        consumed = {dep for stage in self.stages.values() for dep in stage.inputs}
+        return [name for name in self.stages if name not in consumed]
+
+    def _ancestors(self, targets: List[str]) -> List[str]:
+        """Stages needed for the targets, in registration (topological) order."""
+        needed = set()
+        stack = list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in self.stages:
+                raise KeyError(f"Unknown stage: {name}")
+            if name not in needed:
+                needed.add(name)
+                stack.extend(self.stages[name].inputs)
+        return [name for name in self.stages if name in needed]
+
+    def _descendants(self, roots: set, names: List[str]) -> set:
+        """Stages among ``names`` downstream of (or equal to) the roots."""
+        affected = set(roots)
+        for name in names:
+            if any(dep in affected for dep in self.stages[name].inputs):
+                affected.add(name)
+        return affected
+
+    def _artifact_dir(self, name: str, key: str) -> Path:
+        return self.cache_dir / name / key
+
+    def _is_cached(self, name: str, key: str) -> bool:
+        return (
+            self.use_cache
+            and self.stages[name].cache
+            and (self._artifact_dir(name, key) / META_FILE).exists()
+        )
+
+    def _store(self, name: str, key: str, output):
+        """Persist a stage output and drop artifacts of older keys."""
+        stage_dir = self.cache_dir / name
+        artifact_dir = self._artifact_dir(name, key)
+        shutil.rmtree(artifact_dir, ignore_errors=True)
+        artifact_dir.mkdir(parents=True)
+        if isinstance(output, pd.DataFrame):
+            write_parquet_stream([output], artifact_dir / FRAME_ARTIFACT)
+            kind = FRAME_ARTIFACT
+        else:
+            joblib.dump(output, artifact_dir / OBJECT_ARTIFACT)
+            kind = OBJECT_ARTIFACT
+        # The metadata file marks the artifact complete
+        with open(artifact_dir / META_FILE, 'w') as f:
+            json.dump({'stage': name, 'key': key, 'kind': kind}, f)
+        for stale in stage_dir.iterdir():
+            if stale != artifact_dir:
+                shutil.rmtree(stale, ignore_errors=True)
+
+    def _load(self, name: str, key: str):
+        """Load a cached stage output."""
+        artifact_dir = self._artifact_dir(name, key)
+        with open(artifact_dir / META_FILE) as f:
+            kind = json.load(f)['kind']
+        logger.info("Loading cached artifact", stage=name, key=key)
+        if kind == FRAME_ARTIFACT:
+            return read_parquet_dataset(artifact_dir / FRAME_ARTIFACT)
+        return joblib.load(artifact_dir / OBJECT_ARTIFACT)
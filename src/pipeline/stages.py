@@ -0,0 +1,250 @@
+"""Stage graph of the insurance analytics pipeline.
+
+Declares the load/clean, EDA, hypothesis testing, modeling and reporting
+stages for ``StageRunner``. Stage implementations import their heavy
+dependencies (plotting, statistics, model libraries) when they run, so
+building the graph, and any command that only needs the data stages,
+never pays for them.
+"""
+
+from typing import Optional
+
+import joblib
+
+from .runner import Stage, StageRunner
+from ..data_scripts.cleaner import DataCleaner
+from ..data_scripts.loader import InsuranceDataLoader
+from ..data_scripts.storage import read_parquet_dataset, write_parquet_stream
+from ..utils.dtypes import DtypeOptimizer
+
+
+def build_pipeline(config, executor: Optional[str] = None,
+                   workers: Optional[int] = None,
+                   partition_by: Optional[str] = None,
+                   incremental: Optional[bool] = None,
+                   use_cache: Optional[bool] = None) -> StageRunner:
+    """Declare the pipeline stages and their dependencies.
+    
+    Serial runs use separate load, derive and clean stages; the process,
+    out-of-core and incremental modes replace them with a single clean
+    stage. EDA, hypothesis testing and modeling all depend only on the
+    cleaned frame, so they run concurrently.
+    
+    Args:
+        config: Configuration manager instance
+        executor: ``'serial'`` or ``'process'``; overrides ``pipeline.executor``
+        workers: Worker processes for the process executor
+        partition_by: ``'rows'`` or a column for the process executor
+        incremental: Use the month-partitioned store; overrides
+            ``data.incremental.enabled``
+        use_cache: Reuse cached stage artifacts; overrides
+            ``pipeline.stage_cache``
+    
+    Returns:
+        Runner with every stage registered
+    """
+    runner = StageRunner(config, use_cache=use_cache)
+    loader = InsuranceDataLoader(config)
+    cleaner = DataCleaner(config.get('cleaning_strategies'))
+    executor = executor or config.get('pipeline.executor', 'serial')
+    incremental = (
+        config.get('data.incremental.enabled', False) if incremental is None else incremental
+    )
+    out_of_core = config.get('data.out_of_core', False)
+    processed_path = config.get('data.processed_path')
+    
+    def optimize(df):
+        # Downcast after cleaning: median fills may not fit narrowed ints
+        if config.get('data.dtype_optimizer.enabled', True):
+            df = DtypeOptimizer.from_config(config).optimize(df, inplace=True)
+        return df
+    
+    # === DATA PIPELINE ===
+    if incremental:
+        def clean_stage():
+            # Append new/changed months to the month-partitioned store
+            store_path = config.get('data.incremental.store_path')
+            from ..data_scripts.incremental import IncrementalIngestor
+            IncrementalIngestor(config, loader, cleaner).run()
+            return optimize(read_parquet_dataset(store_path))
+        # The ingestor tracks its own partitions, so the stage always runs
+        runner.add(Stage('clean', clean_stage, cache=False))
+    elif out_of_core:
+        def clean_stage():
+            # Stream chunks through derivation and cleaning straight to disk
+            from ..data_scripts.streaming import preprocess_out_of_core
+            preprocess_out_of_core(loader, cleaner, processed_path)
+            cleaner.save_state()
+            print(f"Saved cleaned data to {processed_path}")
+            return optimize(read_parquet_dataset(processed_path))
+        runner.add(Stage(
+            'clean', clean_stage,
+            config_keys=['data', 'cleaning_strategies'],
+            fingerprint=loader.source_fingerprint
+        ))
+    elif executor == 'process':
+        def clean_stage():
+            from ..data_scripts.parallel import ParallelPreprocessor
+            df = ParallelPreprocessor(
+                config, cleaner,
+                max_workers=workers,
+                partition_by=partition_by
+            ).run(loader.load_raw_data())
+            cleaner.save_state()
+            df = optimize(df)
+            write_parquet_stream([df], processed_path)
+            print(f"Saved cleaned data to {processed_path}")
+            return df
+        runner.add(Stage(
+            'clean', clean_stage,
+            config_keys=['data', 'cleaning_strategies'],
+            fingerprint=loader.source_fingerprint
+        ))
+    else:
+        # The loader keeps its own Parquet cache and derivation is cheap,
+        # so only the cleaned frame is cached as a stage artifact
+        runner.add(Stage(
+            'load', lambda: loader.load_raw_data(),
+            config_keys=['data'],
+            fingerprint=loader.source_fingerprint,
+            cache=False
+        ))
+        runner.add(Stage(
+            'derive', lambda df: loader.create_derived_features(df),
+            inputs=['load'],
+            cache=False
+        ))
+        
+        def clean_stage(df):
+            df = cleaner.clean(df, inplace=True)
+            cleaner.save_state()
+            df = optimize(df)
+            write_parquet_stream([df], processed_path)
+            print(f"Saved cleaned data to {processed_path}")
+            return df
+        runner.add(Stage(
+            'clean', clean_stage,
+            inputs=['derive'],
+            config_keys=['cleaning_strategies', 'data.dtype_optimizer']
+        ))
+    
+    # === ANALYSIS PIPELINE ===
+    def eda_stage(df):
+        from ..analysis.aggregation import RiskCube
+        from ..analysis.eda import InsuranceEDA
+        from ..utils.visualization import Visualizer
+        with Visualizer.from_config(config) as visualizer:
+            eda = InsuranceEDA(visualizer)
+            cube_path = config.get('reports.risk_cube_path')
+            # The incremental ingestor keeps the persisted cube up to date
+            cube = RiskCube.load(cube_path) if incremental and cube_path else None
+            # Figures render in the background while the quality report runs
+            eda.analyze_risk_factors(df, config.get('reports.figures_path'), cube=cube)
+            eda_report = eda.generate_quality_report(df)
+            if cube_path and cube is None:
+                eda.cube_.save(cube_path)
+        return eda_report
+    runner.add(Stage(
+        'eda', eda_stage,
+        inputs=['clean'],
+        config_keys=['reports.figures_path', 'reports.figures', 'reports.risk_cube_path']
+    ))
+    
+    def hypothesis_stage(df):
+        from ..analysis.hypothesis import HypothesisTester
+        tester = HypothesisTester.from_config(config)
+        results = {
+            'provincial': tester.test_provincial_risk(df),
+            'gender': tester.test_gender_risk(df),
+        }
+        joblib.dump(results, config.get('reports.hypothesis_results_path'))
+        return results
+    runner.add(Stage(
+        'hypothesis', hypothesis_stage,
+        inputs=['clean'],
+        config_keys=['hypothesis', 'reports.hypothesis_results_path']
+    ))
+    
+    def targeting_stage(df):
+        from ..analysis.targeting import SegmentTargeter
+        return SegmentTargeter.from_config(config).run(
+            df, config.get('reports.low_risk_segments_path')
+        )
+    runner.add(Stage(
+        'targeting', targeting_stage,
+        inputs=['clean'],
+        config_keys=['targeting', 'reports.low_risk_segments_path']
+    ))
+    
+    # === MODELING PIPELINE ===
+    model_input = 'clean'
+    if config.get('data.history.enabled', False):
+        def history_stage(df):
+            from ..data_scripts.history import ClaimHistory
+            return ClaimHistory.from_config(config).transform(df)
+        runner.add(Stage(
+            'history', history_stage,
+            inputs=['clean'],
+            config_keys=['data.history']
+        ))
+        model_input = 'history'
+    
+    def model_stage(df):
+        from ..modeling.trainer import RiskModelTrainer
+        trainer = RiskModelTrainer(config)
+        return trainer.train_models(df)
+    runner.add(Stage(
+        'model', model_stage,
+        inputs=[model_input],
+        config_keys=['model']
+    ))
+    
+    if config.get('model.glm.enabled', False):
+        def glm_stage(df):
+            from ..modeling.glm import CompressedGLM
+            glm = CompressedGLM.from_config(config).fit(df)
+            results = {
+                'summary': glm.summary(),
+                'relativities': {name: glm.relativities(name) for name in glm.models},
+            }
+            joblib.dump(results, config.get('reports.glm_results_path'))
+            return results
+        runner.add(Stage(
+            'glm', glm_stage,
+            inputs=['clean'],
+            config_keys=['model.glm', 'model.categorical_features', 'reports.glm_results_path']
+        ))
+    
+    if config.get('model.interpretability.enabled', False):
+        def interpret_stage(df, model_results):
+            from ..modeling.interpretability import ShapExplainer
+            from ..utils.visualization import Visualizer
+            explainer = ShapExplainer(config)
+            importances = {}
+            with Visualizer.from_config(config) as visualizer:
+                for name in explainer.models:
+                    if name not in model_results:
+                        continue
+                    importances[name] = explainer.global_importance(name, df)
+                    visualizer.plot_feature_importance(
+                        importances[name], config.get('reports.figures_path'), name
+                    )
+            return importances
+        runner.add(Stage(
+            'interpret', interpret_stage,
+            inputs=[model_input, 'model'],
+            config_keys=['model.interpretability', 'reports.figures_path', 'reports.figures']
+        ))
+    
+    def report_stage(eda_report, model_results):
+        joblib.dump(
+            {'eda': eda_report, 'models': model_results},
+            config.get('reports.final_results_path')
+        )
+    runner.add(Stage(
+        'report', report_stage,
+        inputs=['eda', 'model'],
+        config_keys=['reports.final_results_path'],
+        cache=False
+    ))
+    return runner
@@ -0,0 +1,144 @@
+"""Memory-compact dtype optimization for working DataFrames.
+
+Provides a DtypeOptimizer that downcasts each column to the narrowest
+dtype that preserves its values and reports per-column memory savings.
+"""
+
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+# Candidate integer widths, narrowest first
+_INT_DTYPES = [
+    (np.int8, 'Int8'),
+    (np.int16, 'Int16'),
+    (np.int32, 'Int32'),
+]
+
+
+class DtypeOptimizer:
+    """Downcasts DataFrame columns to compact dtypes.
+
+    Rules, applied per column:
+    - Low-cardinality strings become ``category``
+    - Integer-valued columns (flags, years, codes) become the smallest
+      integer dtype that holds them; nullable ``Int*`` when values are
+      missing, plain NumPy integers otherwise
+    - ``float64`` becomes ``float32`` when every value round-trips within
+      ``float_rtol``
+
+    Args:
+        category_threshold: Maximum ratio of distinct values to rows for
+            a string column to become categorical
+        float_rtol: Relative tolerance for accepting float32
+        exclude: Columns to leave untouched
+
+    Attributes:
+        report_ (pd.DataFrame): Per-column dtypes and memory before/after
+            the last ``optimize`` call
+    """
+
+    def __init__(self, category_threshold: float = 0.5, float_rtol: float = 1e-6,
+                 exclude: Optional[Iterable[str]] = None):
+        self.category_threshold = category_threshold
+        self.float_rtol = float_rtol
+        self.exclude = set(exclude or [])
+        self.report_ = None
+
+    @classmethod
+    def from_config(cls, config_manager) -> 'DtypeOptimizer':
+        """Build an optimizer from the ``data.dtype_optimizer`` section."""
+        settings = config_manager.get('data.dtype_optimizer', {}) or {}
+        return cls(
+            category_threshold=settings.get('category_threshold', 0.5),
+            float_rtol=settings.get('float_rtol', 1e-6),
+            exclude=settings.get('exclude')
+        )
+
+    def optimize(self, df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+        """Downcast every eligible column of a DataFrame.
+
+        Args:
+            df: DataFrame to optimize
+            inplace: Replace columns of ``df`` instead of a copy
+
+        Returns:
+            DataFrame with compact dtypes
+        """
+        if not inplace:
+            df = df.copy(deep=False)
+        rows = []
+        for col in df.columns:
+            series = df[col]
+            before = series.memory_usage(index=False, deep=True)
+            target = None if col in self.exclude else self._target_dtype(series)
+            if target is not None:
+                df[col] = series.astype(target)
+            after = df[col].memory_usage(index=False, deep=True)
+            rows.append({
+                'column': col,
+                'before_dtype': str(series.dtype),
+                'after_dtype': str(df[col].dtype),
+                'before_mb': before / 1e6,
+                'after_mb': after / 1e6,
+            })
+
+        self.report_ = pd.DataFrame(rows).set_index('column')
+        for col, row in self.report_.iterrows():
+            if row['before_dtype'] != row['after_dtype']:
+                logger.debug(
+                    "Downcast column",
+                    column=col,
+                    before_dtype=row['before_dtype'],
+                    after_dtype=row['after_dtype'],
+                    before_mb=round(row['before_mb'], 3),
+                    after_mb=round(row['after_mb'], 3)
+                )
+        logger.info(
+            "Optimized dtypes",
+            columns_changed=int((self.report_['before_dtype'] != self.report_['after_dtype']).sum()),
+            before_mb=round(self.report_['before_mb'].sum(), 2),
+            after_mb=round(self.report_['after_mb'].sum(), 2)
+        )
+        return df
+
+    def _target_dtype(self, series: pd.Series):
+        """Pick a narrower dtype for a column, or None to keep it."""
+        dtype = series.dtype
+        if isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(dtype):
+            return None
+        if pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+            if len(series) and series.nunique() / len(series) <= self.category_threshold:
+                return 'category'
+            return None
+        if pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_float_dtype(dtype):
+            values = series.to_numpy(dtype=float, na_value=np.nan)
+            present = values[~np.isnan(values)]
+            if not present.size:
+                return None
+            if np.all(np.mod(present, 1) == 0):
+                return self._integer_dtype(present, has_missing=present.size < values.size,
+                                           current=dtype)
+            if dtype == np.float64:
+                narrowed = present.astype(np.float32)
+                if np.allclose(narrowed, present, rtol=self.float_rtol, atol=0):
+                    return np.float32
+        return None
+
+    @staticmethod
+    def _integer_dtype(values: np.ndarray, has_missing: bool, current):
+        """Smallest integer dtype holding ``values``, if narrower than ``current``."""
+        low, high = values.min(), values.max()
+        for numpy_dtype, nullable in _INT_DTYPES:
+            info = np.iinfo(numpy_dtype)
+            if info.min <= low and high <= info.max:
+                # Nullable integers carry a one-byte mask per value
+                size = np.dtype(numpy_dtype).itemsize + (1 if has_missing else 0)
+                if size >= pd.api.types.pandas_dtype(current).itemsize:
+                    return None
+                return nullable if has_missing else numpy_dtype
+        return None
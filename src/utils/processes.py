@@ -0,0 +1,39 @@
+"""Process pools that are safe to start from pipeline stage threads.
+
+Stages run concurrently in a thread pool, and several of them fan work
+out to processes. Forking a process while other threads hold locks
+(logging, allocator, BLAS) can leave the child deadlocked, so pools
+start their workers with ``forkserver`` where the platform has it and
+``spawn`` otherwise. Workers then import their modules afresh instead
+of inheriting the parent's memory, so tasks, initializers and their
+arguments must be picklable module-level objects.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+
+START_METHOD = (
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+)
+
+
+def process_pool(max_workers: Optional[int] = None,
+                 initializer: Optional[Callable] = None,
+                 initargs: tuple = ()) -> ProcessPoolExecutor:
+    """Create a process pool whose workers are not forked from threads.
+
+    Args:
+        max_workers: Worker processes; defaults to the CPU count
+        initializer: Called once in every worker
+        initargs: Arguments for ``initializer``
+
+    Returns:
+        Process pool using ``START_METHOD``
+    """
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context(START_METHOD),
+        initializer=initializer,
+        initargs=initargs
+    )
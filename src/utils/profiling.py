@@ -0,0 +1,258 @@
+"""Lightweight profiling of pipeline steps.
+
+``profiled`` works as a decorator or a context manager. Each profiled
+span records wall time, process CPU time, the peak RSS of the process,
+the RSS change over the span and its row count, logs them as one
+structured event and keeps them for a JSON run report (``write_report``).
+
+With allocation tracing enabled (``configure(trace_allocations=True)``)
+spans also record the peak of Python-tracked allocations above their
+starting point. Tracing slows allocation-heavy code, so it is off by default.
+Spans share the process-wide counters: CPU time and RSS include
+concurrently running threads, and nested spans reset the tracemalloc
+peak of their parent.
+"""
+
+import functools
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, List, Optional, Union
+
+import pandas as pd
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+# ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+_MAXRSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+_SETTINGS = {'enabled': True, 'tracemalloc': False}
+_RECORDS: List[dict] = []
+_LOCK = threading.Lock()
+
+
+def configure(enabled: bool = True, trace_allocations: bool = False):
+    """Switch profiling and allocation tracing on or off.
+
+    Args:
+        enabled: Record spans; profiled code runs unchanged when False
+        trace_allocations: Track Python allocation peaks with tracemalloc
+    """
+    _SETTINGS['enabled'] = enabled
+    _SETTINGS['tracemalloc'] = enabled and trace_allocations
+    if _SETTINGS['tracemalloc'] and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not _SETTINGS['tracemalloc'] and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def configure_from(config_manager):
+    """Apply the ``profiling`` config section."""
+    settings = config_manager.get('profiling', {}) or {}
+    configure(enabled=settings.get('enabled', True),
+              trace_allocations=settings.get('tracemalloc', False))
+
+
+def records() -> List[dict]:
+    """Spans recorded so far, in completion order."""
+    with _LOCK:
+        return list(_RECORDS)
+
+
+def reset():
+    """Forget all recorded spans."""
+    with _LOCK:
+        _RECORDS.clear()
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _MAXRSS_UNIT / 1e6
+
+
+def _current_rss_mb() -> Optional[float]:
+    """Resident set size from /proc (None where unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE') / 1e6
+
+
+def _count_rows(value) -> Optional[int]:
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return len(value)
+    return None
+
+
+class profiled:
+    """Profile a block or every call of a function.
+
+    As a decorator the row count defaults to the length of the returned
+    DataFrame, else of the first DataFrame argument. In a ``with`` block
+    set ``span.rows`` (or pass ``rows``) and add fields to ``span.extra``.
+
+    Args:
+        name: Span name; defaults to the function's qualified name
+        rows: Row count, or a callable mapping the result to one
+        **extra: Additional fields for the log event and report
+
+    Example:
+        >>> @profiled('load_raw_data')
+        ... def load(): ...
+        >>> with profiled('clean.winsorize', rows=len(df)) as span:
+        ...     ...
+    """
+
+    def __init__(self, name: Optional[str] = None,
+                 rows: Union[int, Callable, None] = None, **extra):
+        self.name = name
+        self.rows = rows
+        self.extra = extra
+        self.record = None
+
+    def __call__(self, func: Callable) -> Callable:
+        name = self.name or func.__qualname__
+        rows = self.rows
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _SETTINGS['enabled']:
+                return func(*args, **kwargs)
+            span = profiled(name, **self.extra)
+            with span:
+                result = func(*args, **kwargs)
+                if callable(rows):
+                    span.rows = rows(result)
+                elif rows is not None:
+                    span.rows = rows
+                else:
+                    span.rows = _count_rows(result)
+                    if span.rows is None:
+                        span.rows = next(
+                            (len(a) for a in args if isinstance(a, pd.DataFrame)), None
+                        )
+            return result
+        return wrapper
+
+    def __enter__(self) -> 'profiled':
+        if not _SETTINGS['enabled']:
+            return self
+        self._traced = _SETTINGS['tracemalloc'] and tracemalloc.is_tracing()
+        if self._traced:
+            self._traced_start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self._rss_start = _current_rss_mb()
+        self._cpu_start = time.process_time()
+        self._wall_start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not _SETTINGS['enabled']:
+            return False
+        wall = time.perf_counter() - self._wall_start
+        cpu = time.process_time() - self._cpu_start
+        rss = _current_rss_mb()
+        record = {
+            'name': self.name,
+            'wall_s': round(wall, 6),
+            'cpu_s': round(cpu, 6),
+            'peak_rss_mb': round(_peak_rss_mb(), 3),
+        }
+        if rss is not None and self._rss_start is not None:
+            record['rss_delta_mb'] = round(rss - self._rss_start, 3)
+        if self._traced and tracemalloc.is_tracing():
+            peak = tracemalloc.get_traced_memory()[1]
+            record['traced_peak_mb'] = round((peak - self._traced_start) / 1e6, 3)
+        rows = self.rows if isinstance(self.rows, int) else None
+        if rows is not None:
+            record['rows'] = rows
+            record['rows_per_s'] = round(rows / wall, 1) if wall > 0 else None
+        record.update(self.extra)
+        if exc_type is not None:
+            record['error'] = exc_type.__name__
+        record['thread'] = threading.current_thread().name
+        self.record = record
+        with _LOCK:
+            _RECORDS.append(record)
+        logger.info("Profiled", **{('span' if k == 'name' else k): v
+                                   for k, v in record.items()})
+        return False
+
+
+def summarize(spans: Optional[List[dict]] = None) -> pd.DataFrame:
+    """Totals per span name: calls, wall/CPU seconds, rows and throughput."""
+    spans = records() if spans is None else spans
+    if not spans:
+        return pd.DataFrame(columns=['name', 'calls', 'wall_s', 'cpu_s', 'rows',
+                                     'rows_per_s', 'peak_rss_mb'])
+    frame = pd.DataFrame(spans)
+    if 'rows' not in frame:
+        frame['rows'] = pd.NA
+    summary = frame.groupby('name', sort=False).agg(
+        calls=('wall_s', 'size'),
+        wall_s=('wall_s', 'sum'),
+        cpu_s=('cpu_s', 'sum'),
+        rows=('rows', 'sum'),
+        peak_rss_mb=('peak_rss_mb', 'max'),
+    ).reset_index()
+    summary['rows_per_s'] = (summary['rows'] / summary['wall_s']).where(summary['rows'] > 0)
+    return summary
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+            check=True, timeout=5
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_metadata() -> dict:
+    """Environment of the current run: commit, interpreter, host."""
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def write_report(path: str, **metadata) -> Path:
+    """Write the recorded spans and their per-name totals as JSON.
+
+    Args:
+        path: Report file
+        **metadata: Extra run fields (e.g. config path, stages)
+
+    Returns:
+        Path of the written report
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    spans = records()
+    summary = summarize(spans).astype(object)
+    report = {
+        'run': {**run_metadata(), **metadata},
+        'summary': summary.where(summary.notna(), None).to_dict(orient='records'),
+        'spans': spans,
+    }
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+    logger.info(f"Saved profiling report: {path}")
+    return path
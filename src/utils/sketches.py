@@ -0,0 +1,274 @@
+"""Mergeable summary sketches for streaming statistics.
+
+Sketches consume data chunk by chunk, can be merged with sketches built
+on other chunks or workers, and answer queries without holding the data.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class QuantileSketch:
+    """Mergeable approximate quantile sketch (KLL-style compactors).
+
+    Items live in levels of compactors; an item at level ``h`` stands for
+    ``2**h`` input values. When a level overflows it is sorted and every
+    other item is promoted to the next level. Rank error shrinks as
+    ``k`` grows; the default keeps it around 0.1% of the count.
+
+    Args:
+        k: Capacity of the top compactor
+        seed: Seed for the compaction offsets, for reproducible results
+    """
+
+    def __init__(self, k: int = 2000, seed: int = 0):
+        self.k = k
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values) -> 'QuantileSketch':
+        """Add an array of values; NaNs are ignored.
+
+        Args:
+            values: Array-like of numbers
+
+        Returns:
+            The updated sketch
+        """
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if values.size:
+            self.count += values.size
+            self.min = min(self.min, values.min())
+            self.max = max(self.max, values.max())
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+        return self
+
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        """Fold another sketch into this one.
+
+        Args:
+            other: Sketch built on a different part of the data
+
+        Returns:
+            The merged sketch
+        """
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def value_at_rank(self, rank: float) -> float:
+        """Approximate the value with the given 0-based rank.
+
+        Args:
+            rank: Rank in ``[0, count)``
+
+        Returns:
+            Approximate order statistic, or NaN for an empty sketch
+        """
+        if not self.count:
+            return np.nan
+        items, weights = self._weighted_items()
+        cumulative = np.cumsum(weights)
+        idx = np.searchsorted(cumulative, rank, side='right')
+        value = items[min(idx, items.size - 1)]
+        return float(np.clip(value, self.min, self.max))
+
+    def quantile(self, q: float) -> float:
+        """Approximate the ``q`` quantile.
+
+        Args:
+            q: Quantile in ``[0, 1]``
+
+        Returns:
+            Approximate quantile, or NaN for an empty sketch
+        """
+        if q <= 0:
+            return float(self.min) if self.count else np.nan
+        if q >= 1:
+            return float(self.max) if self.count else np.nan
+        return self.value_at_rank(q * (self.count - 1))
+
+    def to_dict(self) -> dict:
+        """Serialise the sketch to JSON-compatible types."""
+        return {
+            'k': self.k,
+            'count': self.count,
+            'min': float(self.min),
+            'max': float(self.max),
+            'levels': [level.tolist() for level in self.levels],
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> 'QuantileSketch':
+        """Rebuild a sketch serialised with ``to_dict``."""
+        sketch = cls(k=state['k'])
+        sketch.count = state['count']
+        sketch.min = state['min']
+        sketch.max = state['max']
+        sketch.levels = [np.asarray(level, dtype=float) for level in state['levels']]
+        return sketch
+
+    def _capacity(self, level: int) -> int:
+        """Capacity of a level; lower levels get geometrically less room."""
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        """Compact overflowing levels until every level fits."""
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if items.size > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item out stays behind so weights are conserved
+                keep = items[:items.size % 2]
+                pairs = items[items.size % 2:]
+                promoted = pairs[self._rng.integers(2)::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def _weighted_items(self):
+        """All retained items, sorted, with their weights."""
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([
+            np.full(level.size, 2.0 ** h) for h, level in enumerate(self.levels)
+        ])
+        order = np.argsort(items, kind='stable')
+        return items[order], weights[order]
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """Vectorised ``int.bit_length`` for unsigned 64-bit integers."""
+    values = values.copy()
+    length = np.zeros(values.shape, dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        wide = values >= np.uint64(1 << shift)
+        length += shift * wide
+        values = np.where(wide, values >> np.uint64(shift), values)
+    return length + (values > 0)
+
+
+class HyperLogLog:
+    """Mergeable distinct-count sketch.
+
+    Each value is hashed; the top ``precision`` bits pick a register and
+    the register keeps the longest run of leading zeros seen in the
+    remaining bits. Merging takes the register-wise maximum, so sketches
+    of disjoint or overlapping parts roll up to the sketch of their union.
+    Relative error is about ``1.04 / sqrt(2**precision)``.
+
+    The static helpers work on ``(register, rank)`` arrays so callers can
+    keep many sparse sketches in one table and merge them with a groupby.
+
+    Args:
+        precision: Number of register index bits (4 to 18)
+    """
+
+    def __init__(self, precision: int = 14):
+        if not 4 <= precision <= 18:
+            raise ValueError(f"precision must be between 4 and 18, got {precision}")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @staticmethod
+    def hash_values(values, precision: int = 14):
+        """Map values to their register index and rank.
+
+        Missing values are dropped, matching ``nunique``.
+
+        Args:
+            values: Array-like of hashable values
+            precision: Number of register index bits
+
+        Returns:
+            Tuple of register indices (uint32) and ranks (uint8)
+        """
+        values = pd.Series(values)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Hash each category once and look the codes up
+            codes = values.cat.codes.to_numpy()
+            category_hashes = pd.util.hash_array(values.cat.categories.to_numpy())
+            hashes = category_hashes[codes[codes >= 0]]
+        else:
+            values = values[values.notna()]
+            hashes = pd.util.hash_array(values.to_numpy())
+        tail_bits = 64 - precision
+        index = (hashes >> np.uint64(tail_bits)).astype(np.uint32)
+        tail = hashes & np.uint64((1 << tail_bits) - 1)
+        rank = (tail_bits - _bit_length(tail) + 1).astype(np.uint8)
+        return index, rank
+
+    @staticmethod
+    def estimate_from(harmonic_sum, nonzero, precision: int = 14) -> np.ndarray:
+        """Cardinality estimates from register summaries.
+
+        Vectorised over many sketches at once.
+
+        Args:
+            harmonic_sum: Sum of ``2**-rank`` over the non-empty registers
+            nonzero: Number of non-empty registers
+            precision: Number of register index bits
+
+        Returns:
+            Array of estimated distinct counts
+        """
+        m = float(1 << precision)
+        harmonic_sum = np.asarray(harmonic_sum, dtype=float)
+        zeros = m - np.asarray(nonzero, dtype=float)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / (harmonic_sum + zeros)
+        # Linear counting is far more accurate while registers are sparse
+        with np.errstate(divide='ignore'):
+            linear = m * np.log(m / np.maximum(zeros, 1))
+        return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+    def update(self, values) -> 'HyperLogLog':
+        """Add an array of values.
+
+        Args:
+            values: Array-like of hashable values
+
+        Returns:
+            The updated sketch
+        """
+        index, rank = self.hash_values(values, self.precision)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        """Fold another sketch of the same precision into this one."""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> float:
+        """Approximate number of distinct values seen."""
+        present = self.registers[self.registers > 0]
+        harmonic_sum = np.exp2(-present.astype(float)).sum()
+        return float(self.estimate_from(harmonic_sum, present.size, self.precision))
+
+    def to_dict(self) -> dict:
+        """Serialise the sketch to JSON-compatible types."""
+        return {'precision': self.precision, 'registers': self.registers.tolist()}
+
+    @classmethod
+    def from_dict(cls, state: dict) -> 'HyperLogLog':
+        """Rebuild a sketch serialised with ``to_dict``."""
+        sketch = cls(precision=state['precision'])
+        sketch.registers = np.asarray(state['registers'], dtype=np.uint8)
+        return sketch
@@ -2,112 +2,353 @@
 
 Provides standardized plotting functions for risk analysis and
 model interpretability.
+
+Figures are drawn on standalone matplotlib ``Figure`` objects through the
+object-oriented API, so pyplot's global state is never touched and
+rendering can run in a process pool while the analysis continues. A
+figure is skipped when a hash of its aggregated input data and render
+settings matches the one recorded when it was last written.
 """
 
-import seaborn as sns
-import matplotlib.pyplot as plt
-import pandas as pd
+import hashlib
+import json
 import os
+from concurrent.futures import Future
+from typing import List, Optional
+
+import matplotlib as mpl
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from matplotlib.figure import Figure
 from ..utils.logger import get_logger
+from ..utils.processes import process_pool
 
 logger = get_logger(__name__)
 
+FIGURE_FORMATS = ('png', 'svg')
+
+# Bump when a renderer's drawing changes so cached figures are redrawn
+RENDER_VERSION = 1
+
+
+def _draw_provincial_risk(fig: Figure, data: pd.DataFrame):
+    """Average loss ratio by province, coloured by claim frequency."""
+    ax = fig.subplots()
+    data = data.sort_values('AvgLossRatio', ascending=False)
+
+    sns.barplot(
+        x='Province',
+        y='AvgLossRatio',
+        data=data,
+        hue='ClaimFrequency',
+        dodge=False,
+        ax=ax
+    )
+
+    ax.set_title('Provincial Risk Profile')
+    ax.set_xlabel('Province')
+    ax.set_ylabel('Average Loss Ratio')
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.legend(title='Claim Frequency')
+
+
+def _draw_vehicle_risk(fig: Figure, data: pd.DataFrame):
+    """Top 10 vehicle makes by average claim amount."""
+    ax = fig.subplots()
+    data = data.sort_values('AvgClaim', ascending=False).head(10)
+
+    sns.barplot(
+        x='make',
+        y='AvgClaim',
+        data=data,
+        hue='make',
+        palette='rocket',
+        legend=False,
+        ax=ax
+    )
+
+    # Add policy counts
+    for i, row in enumerate(data.itertuples()):
+        ax.text(i, row.AvgClaim + 500,
+               f'Policies: {row.Policies}',
+               ha='center')
+
+    ax.set_title('Top 10 Risky Vehicle Makes')
+    ax.set_xlabel('Vehicle Make')
+    ax.set_ylabel('Average Claim Amount (ZAR)')
+    ax.tick_params(axis='x', labelrotation=30)
+
+
+def _draw_temporal_trends(fig: Figure, data: pd.DataFrame):
+    """Monthly premium and claims totals above the loss ratio and claim count."""
+    ax_totals, ax_ratio = fig.subplots(2, 1, sharex=True)
+    months = pd.to_datetime(data['TransactionMonth'])
+
+    ax_totals.plot(months, data['TotalPremium'], marker='o', label='Total Premium')
+    ax_totals.plot(months, data['TotalClaims'], marker='o', label='Total Claims')
+    ax_totals.set_title('Monthly Premium and Claims')
+    ax_totals.set_ylabel('Amount (ZAR)')
+    ax_totals.legend(loc='upper left')
+
+    # Claim counts as bars behind the loss ratio line
+    ax_counts = ax_ratio.twinx()
+    ax_counts.bar(months, data['ClaimCount'], width=20, color='grey', alpha=0.3)
+    ax_counts.set_ylabel('Claim Count')
+    ax_counts.grid(False)
+    ax_ratio.set_zorder(ax_counts.get_zorder() + 1)
+    ax_ratio.patch.set_visible(False)
+
+    # Months without premium have an undefined loss ratio
+    loss_ratio = data['LossRatio'].replace([np.inf, -np.inf], np.nan)
+    ax_ratio.plot(months, loss_ratio, marker='o', color='C3')
+    ax_ratio.set_ylabel('Loss Ratio')
+    ax_ratio.set_xlabel('Transaction Month')
+    fig.autofmt_xdate()
+
+
+def _draw_feature_importance(fig: Figure, data: pd.DataFrame, model_name: str):
+    """Mean absolute SHAP value per feature."""
+    ax = fig.subplots()
+    data = data.sort_values('importance', ascending=False)
+
+    sns.barplot(
+        x='importance',
+        y='feature',
+        data=data,
+        color=sns.color_palette()[0],
+        ax=ax
+    )
+
+    ax.set_title(f'Feature Importance ({model_name})')
+    ax.set_xlabel('Mean |SHAP value|')
+    ax.set_ylabel('Feature')
+
+
+# Renderer and figure size per plot kind
+RENDERERS = {
+    'provincial_risk': (_draw_provincial_risk, (12, 8)),
+    'vehicle_risk': (_draw_vehicle_risk, (14, 8)),
+    'temporal_trends': (_draw_temporal_trends, (14, 10)),
+    'feature_importance': (_draw_feature_importance, (10, 8)),
+}
+
+
+def _key_path(path: str) -> str:
+    """Sidecar file holding the input hash of a rendered figure."""
+    directory, filename = os.path.split(path)
+    return os.path.join(directory, f".{filename}.key")
+
+
+def _render(kind: str, data: pd.DataFrame, options: dict, path: str,
+            dpi: int, fmt: str, rc: dict, key: str) -> str:
+    """Draw one figure and write it atomically (process pool entry point)."""
+    draw, figsize = RENDERERS[kind]
+    tmp_path = f"{path}.tmp"
+    with mpl.rc_context(rc):
+        fig = Figure(figsize=figsize)
+        draw(fig, data, **options)
+        fig.tight_layout()
+        fig.savefig(tmp_path, dpi=dpi, format=fmt)
+    os.replace(tmp_path, path)
+    # Written last, so an interrupted render is redrawn next time
+    with open(_key_path(path), 'w') as f:
+        f.write(key)
+    return path
+
+
 class Visualizer:
     """Creates publication-quality visualizations.
-    
+
+    Plot methods return the figure path. With ``max_workers`` set they
+    return as soon as the figure is queued; call ``wait`` (or use the
+    visualizer as a context manager) to block until every figure is
+    written.
+
     Args:
         style_config: Dictionary of matplotlib/seaborn style parameters
+        dpi: Resolution of raster figures
+        fmt: Output format, ``'png'`` or ``'svg'``
+        max_workers: Render processes; figures render in the calling
+            process when None or 0
+        cache: Skip figures whose input data and settings are unchanged
     """
-    
-    def __init__(self, style_config=None):
+
+    def __init__(self, style_config=None, dpi: int = 300, fmt: str = 'png',
+                 max_workers: Optional[int] = None, cache: bool = True):
         self.style = style_config or {
             'context': 'paper',
             'palette': 'colorblind',
             'font_scale': 1.2
         }
-        self._apply_style()
-        
-    def _apply_style(self):
-        """Apply consistent visualization style."""
-        sns.set_theme(
-            context=self.style['context'],
-            palette=self.style['palette'],
-            font_scale=self.style['font_scale']
+        if fmt not in FIGURE_FORMATS:
+            raise ValueError(f"Unsupported figure format: {fmt}")
+        self.dpi = dpi
+        self.fmt = fmt
+        self.max_workers = max_workers
+        self.cache = cache
+        self._rc = self._style_rc()
+        self._pool = None
+        self._pending: List[Future] = []
+
+    @classmethod
+    def from_config(cls, config_manager, style_config=None) -> 'Visualizer':
+        """Build a visualizer from the ``reports.figures`` config section."""
+        settings = config_manager.get('reports.figures', {}) or {}
+        return cls(
+            style_config,
+            dpi=settings.get('dpi', 300),
+            fmt=settings.get('format', 'png'),
+            max_workers=settings.get('max_workers'),
+            cache=settings.get('cache', True)
         )
-        plt.rcParams['figure.dpi'] = 300
-        plt.rcParams['savefig.bbox'] = 'tight'
-        plt.rcParams['font.family'] = 'DejaVu Sans'
-        
-    def plot_provincial_risk(self, data: pd.DataFrame, output_dir: str):
+
+    def _style_rc(self) -> dict:
+        """Consistent visualization style as rc parameters.
+
+        Applied per figure through ``rc_context`` rather than set globally.
+        """
+        rc = dict(sns.axes_style('darkgrid'))
+        rc.update(sns.plotting_context(
+            self.style['context'], font_scale=self.style['font_scale']
+        ))
+        rc['axes.prop_cycle'] = mpl.cycler(color=sns.color_palette(self.style['palette']))
+        rc['savefig.bbox'] = 'tight'
+        rc['font.family'] = 'DejaVu Sans'
+        return rc
+
+    def plot_provincial_risk(self, data: pd.DataFrame, output_dir: str) -> str:
         """Create provincial risk profile visualization.
-        
+
         Shows average loss ratio and claim frequency by province.
-        
+
         Args:
             data: Aggregated provincial risk data
             output_dir: Directory to save plot
         """
-        plt.figure(figsize=(12, 8))
-        data = data.sort_values('AvgLossRatio', ascending=False)
-        
-        ax = sns.barplot(
-            x='Province', 
-            y='AvgLossRatio', 
-            data=data,
-            hue='ClaimFrequency',
-            dodge=False
-        )
-        
-        plt.title('Provincial Risk Profile')
-        plt.xlabel('Province')
-        plt.ylabel('Average Loss Ratio')
-        plt.xticks(rotation=45)
-        plt.legend(title='Claim Frequency')
-        
-        self._save_plot('provincial_risk.png', output_dir)
-        
-    def plot_vehicle_risk(self, data: pd.DataFrame, output_dir: str):
+        return self._submit('provincial_risk', data, output_dir, 'provincial_risk')
+
+    def plot_vehicle_risk(self, data: pd.DataFrame, output_dir: str) -> str:
         """Create vehicle risk visualization.
-        
+
         Shows top 10 riskiest vehicle makes by average claim amount.
-        
+
         Args:
             data: Aggregated vehicle risk data
             output_dir: Directory to save plot
         """
-        plt.figure(figsize=(14, 8))
-        data = data.sort_values('AvgClaim', ascending=False).head(10)
-        
-        ax = sns.barplot(
-            x='make', 
-            y='AvgClaim', 
-            data=data,
-            palette='rocket'
-        )
-        
-        # Add policy counts
-        for i, row in enumerate(data.itertuples()):
-            ax.text(i, row.AvgClaim + 500, 
-                   f'Policies: {row.Policies}', 
-                   ha='center')
-        
-        plt.title('Top 10 Risky Vehicle Makes')
-        plt.xlabel('Vehicle Make')
-        plt.ylabel('Average Claim Amount (ZAR)')
-        plt.xticks(rotation=30)
-        
-        self._save_plot('vehicle_risk.png', output_dir)
-        
-    def _save_plot(self, filename: str, output_dir: str):
-        """Save plot to specified directory.
-        
+        return self._submit('vehicle_risk', data, output_dir, 'vehicle_risk')
+
+    def plot_temporal_trends(self, data: pd.DataFrame, output_dir: str) -> str:
+        """Create monthly trend visualization.
+
+        Shows premium and claims totals, the loss ratio and the claim
+        count per transaction month.
+
         Args:
-            filename: Output filename
+            data: Monthly data with ``TransactionMonth``, ``TotalPremium``,
+                ``TotalClaims``, ``ClaimCount`` and ``LossRatio``
+            output_dir: Directory to save plot
+        """
+        return self._submit('temporal_trends', data, output_dir, 'temporal_trends')
+
+    def plot_feature_importance(self, data: pd.DataFrame, output_dir: str,
+                                model_name: str = 'model') -> str:
+        """Create SHAP feature importance visualization.
+
+        Args:
+            data: Frame with ``feature`` and ``importance`` (mean |SHAP|)
+            output_dir: Directory to save plot
+            model_name: Model name for the title and filename
+        """
+        return self._submit('feature_importance', data, output_dir,
+                            f'shap_importance_{model_name}', model_name=model_name)
+
+    def wait(self) -> List[str]:
+        """Block until every queued figure is written.
+
+        Returns:
+            Paths of the figures rendered since the last call
+
+        Raises:
+            Exception: The first rendering error, after all figures finish
+        """
+        pending, self._pending = self._pending, []
+        paths, errors = [], []
+        for future in pending:
+            try:
+                paths.append(future.result())
+                logger.info(f"Saved visualization: {paths[-1]}")
+            except Exception as e:
+                logger.error(f"Rendering visualization failed: {str(e)}")
+                errors.append(e)
+        if errors:
+            raise errors[0]
+        return paths
+
+    def close(self):
+        """Wait for queued figures and shut down the render processes."""
+        try:
+            self.wait()
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def __enter__(self) -> 'Visualizer':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _submit(self, kind: str, data: pd.DataFrame, output_dir: str,
+                stem: str, **options) -> str:
+        """Render a figure now or queue it, unless it is up to date.
+
+        Args:
+            kind: Renderer name in ``RENDERERS``
+            data: Aggregated data to plot
             output_dir: Target directory
+            stem: Output filename without extension
+            **options: Extra renderer arguments
         """
+        path = os.path.join(output_dir, f"{stem}.{self.fmt}")
+        key = self._figure_key(kind, data, options)
+        if self.cache and os.path.exists(path) and self._stored_key(path) == key:
+            logger.info(f"Visualization unchanged, skipped: {path}")
+            return path
+
         os.makedirs(output_dir, exist_ok=True)
-        path = os.path.join(output_dir, filename)
-        plt.tight_layout()
-        plt.savefig(path)
-        plt.close()
-        logger.info(f"Saved visualization: {path}")
\ No newline at end of file
+        args = (kind, data, options, path, self.dpi, self.fmt, self._rc, key)
+        if not self.max_workers:
+            _render(*args)
+            logger.info(f"Saved visualization: {path}")
+            return path
+        if self._pool is None:
+            # Created from stage threads, so the workers must not be forked
+            self._pool = process_pool(max_workers=self.max_workers)
+        self._pending.append(self._pool.submit(_render, *args))
+        return path
+
+    def _figure_key(self, kind: str, data: pd.DataFrame, options: dict) -> str:
+        """Hash the plotted data together with everything affecting the image."""
+        digest = hashlib.sha256()
+        digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+        digest.update(json.dumps({
+            'kind': kind,
+            'version': RENDER_VERSION,
+            'columns': [str(c) for c in data.columns],
+            'options': options,
+            'style': self.style,
+            'dpi': self.dpi,
+            'format': self.fmt,
+        }, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _stored_key(path: str) -> Optional[str]:
+        try:
+            with open(_key_path(path)) as f:
+                return f.read().strip()
+        except OSError:
+            return None
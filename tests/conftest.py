@@ -0,0 +1,80 @@
+"""Shared fixtures for the test suite."""
+
+import copy
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+CONFIG_PATH = ROOT / 'config' / 'settings.yml'
+
+
+@pytest.fixture(scope='session')
+def config(tmp_path_factory):
+    """Repository configuration whose persistent state stays under a temp dir."""
+    from src.utils.config import ConfigManager
+    config = ConfigManager(str(CONFIG_PATH))
+    scratch = tmp_path_factory.mktemp('state')
+    config.config['dvc']['remote_path'] = str(scratch / 'dvc')
+    config.config['data']['cache_dir'] = str(scratch / 'cache')
+    config.config['data']['history']['state_path'] = None
+    return config
+
+
+@pytest.fixture
+def raw_config(config, tmp_path):
+    """Configuration reading a generated raw file, with caches under ``tmp_path``."""
+    from src.data_scripts.generator import SyntheticDataGenerator
+    SyntheticDataGenerator(3_000, seed=11, claim_rate=0.05).write(tmp_path / 'raw' / 'raw.txt')
+    cfg = copy.deepcopy(config)
+    cfg.config['data'].update(raw_dir=str(tmp_path / 'raw'), raw_file='raw.txt',
+                              cache_dir=str(tmp_path / 'cache'))
+    cfg.config['dvc'] = {'remote_path': str(tmp_path / 'dvc')}
+    return cfg
+
+
+@pytest.fixture(scope='session')
+def synthetic_frame(config):
+    """Derived synthetic extract, small enough for every test to share."""
+    from src.data_scripts.generator import SyntheticDataGenerator
+    from src.data_scripts.loader import InsuranceDataLoader
+    df = SyntheticDataGenerator(20_000, seed=7, claim_rate=0.02).frame()
+    return InsuranceDataLoader(config).create_derived_features(df)
+
+
+@pytest.fixture(scope='session')
+def model_frame(config, synthetic_frame):
+    """Synthetic extract with the claim history features the models use.
+
+    The history keeps its state in memory: ``config`` has no ``state_path``.
+    """
+    from src.data_scripts.history import ClaimHistory
+    return ClaimHistory.from_config(config).transform(synthetic_frame)
+
+
+@pytest.fixture
+def model_config(config, tmp_path):
+    """Configuration writing models and feature matrices under ``tmp_path``."""
+    cfg = copy.deepcopy(config)
+    cfg.config['model']['save_dir'] = str(tmp_path / 'models')
+    return cfg
+
+
+@pytest.fixture(scope='session')
+def trained_xgboost(config, model_frame, tmp_path_factory):
+    """A small XGBoost checkpoint trained by the trainer, with its config."""
+    from src.modeling.trainer import RiskModelTrainer
+    cfg = copy.deepcopy(config)
+    cfg.config['model'].update(
+        save_dir=str(tmp_path_factory.mktemp('models')),
+        candidates=['xgboost'],
+        params={'xgboost': {'n_estimators': 40, 'max_depth': 4}},
+        n_jobs=1,
+    )
+    trainer = RiskModelTrainer(cfg)
+    trainer.train_models(model_frame)
+    return cfg, trainer
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analysis.aggregation import MONTH_DIMENSION, RiskCube
+
+DIMENSIONS = ['Province', 'make', 'VehicleType']
+SUMS = {'Rows': None, 'TotalPremium': 'TotalPremium', 'TotalClaims': 'TotalClaims',
+        'ClaimCount': 'HasClaim', 'LossRatioSum': 'LossRatio', 'SeveritySum': 'ClaimSeverity'}
+
+
+@pytest.fixture(scope='module')
+def frame(synthetic_frame):
+    df = synthetic_frame.copy()
+    df[MONTH_DIMENSION] = df['TransactionMonth'].dt.to_period('M').dt.to_timestamp()
+    return df
+
+
+def _groupby_sums(df, dimensions):
+    df = df.astype({source: np.float64 for source in SUMS.values() if source})
+    if not dimensions:
+        grouped = df.assign(_all=0).groupby('_all')
+    else:
+        grouped = df.groupby(dimensions, observed=True, sort=True)
+    expected = pd.DataFrame({
+        measure: grouped.size() if source is None else grouped[source].sum().astype(float)
+        for measure, source in SUMS.items()
+    })
+    return expected.reset_index(drop=not dimensions)
+
+
+@pytest.mark.parametrize('dimensions', [[], ['Province'], ['make', 'VehicleType'],
+                                        [MONTH_DIMENSION], ['Province', MONTH_DIMENSION]])
+def test_rollups_match_groupby_sums(frame, dimensions):
+    cube = RiskCube.from_frame(frame, DIMENSIONS)
+    view = cube.rollup(dimensions)
+    expected = _groupby_sums(frame, dimensions)
+    assert len(view) == len(expected)
+    for col in dimensions:
+        assert view[col].astype(object).tolist() == expected[col].astype(object).tolist()
+    for measure in SUMS:
+        np.testing.assert_allclose(view[measure].to_numpy(dtype=float),
+                                   expected[measure].to_numpy(dtype=float), rtol=1e-9)
+    np.testing.assert_allclose(view['LossRatio'], view['TotalClaims'] / view['TotalPremium'])
+
+
+@pytest.mark.parametrize('precision', [14, 10])
+@pytest.mark.parametrize('dimensions', [[], ['Province'], ['make'], [MONTH_DIMENSION]])
+def test_distinct_counts_are_within_the_hll_error(frame, precision, dimensions):
+    cube = RiskCube.from_frame(frame, DIMENSIONS, policy_column='UnderwrittenCoverID',
+                               precision=precision)
+    view = cube.rollup(dimensions)
+    if dimensions:
+        exact = frame.groupby(dimensions, observed=True, sort=True)['UnderwrittenCoverID'].nunique()
+    else:
+        exact = pd.Series([frame['UnderwrittenCoverID'].nunique()])
+    # Three standard errors of the HyperLogLog estimate
+    bound = 3 * 1.04 / np.sqrt(2 ** precision)
+    np.testing.assert_allclose(view['Policies'], exact.to_numpy(), rtol=bound, atol=2)
+
+
+def _assert_same_cube(cube, expected):
+    assert cube.dimensions == expected.dimensions
+    a, b = cube.cells, expected.cells
+    assert len(a) == len(b)
+    for col in cube.dimensions:
+        assert a[col].astype(object).tolist() == b[col].astype(object).tolist(), col
+    measures = [c for c in b.columns if c not in cube.dimensions]
+    np.testing.assert_allclose(a[measures].to_numpy(dtype=float),
+                               b[measures].to_numpy(dtype=float), rtol=1e-12)
+    pd.testing.assert_frame_equal(cube.registers, expected.registers)
+
+
+def test_replacing_a_month_matches_a_rebuilt_cube(frame):
+    last = frame[MONTH_DIMENSION].max()
+    history, latest = frame[frame[MONTH_DIMENSION] < last], frame[frame[MONTH_DIMENSION] == last]
+    # The month was first ingested with wrong premiums and a missing row
+    first_version = latest.iloc[1:].assign(TotalPremium=latest['TotalPremium'].iloc[1:] * 2)
+    cube = RiskCube.from_frame(history, DIMENSIONS).merge(
+        RiskCube.from_frame(first_version, DIMENSIONS)
+    )
+    merged = cube.merge(RiskCube.from_frame(latest, DIMENSIONS), replace_months=True)
+    _assert_same_cube(merged, RiskCube.from_frame(frame, DIMENSIONS))
+
+
+def test_slice_matches_a_cube_of_the_selected_rows(frame):
+    cube = RiskCube.from_frame(frame, DIMENSIONS)
+    result = cube.slice(by=['VehicleType'], Province='Gauteng', make=['TOYOTA', 'NISSAN'],
+                        months=('2014-01', '2014-06'))
+
+    selected = frame[(frame['Province'] == 'Gauteng')
+                     & frame['make'].isin(['TOYOTA', 'NISSAN'])
+                     & frame[MONTH_DIMENSION].between('2014-01-01', '2014-06-01')]
+    assert len(selected)
+    expected = RiskCube.from_frame(selected, DIMENSIONS).rollup(['VehicleType'])
+    pd.testing.assert_frame_equal(result, expected, check_categorical=False)
+
+
+def test_save_and_load_round_trip(frame, tmp_path):
+    cube = RiskCube.from_frame(frame, DIMENSIONS)
+    cube.save(tmp_path / 'cube')
+    # Saving again replaces the previous cube
+    cube.save(tmp_path / 'cube')
+    loaded = RiskCube.load(tmp_path / 'cube')
+    assert loaded.precision == cube.precision
+    _assert_same_cube(loaded, cube)
+    pd.testing.assert_frame_equal(loaded.rollup(['Province', MONTH_DIMENSION]),
+                                  cube.rollup(['Province', MONTH_DIMENSION]),
+                                  check_categorical=False)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['cube']
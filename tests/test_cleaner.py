@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+
+from src.data_scripts.cleaner import DataCleaner
+
+
+def test_fractional_statistics_are_not_truncated_on_integer_columns():
+    cleaner = DataCleaner({'numeric_columns': ['count']})
+    df = pd.DataFrame({'count': np.array([0, 1, 2, 3, 4, 0], dtype=np.int64)})
+    cleaned = cleaner.fit_transform(df)
+    assert cleaned['count'].tolist() == [2.5, 1, 2, 3, 4, 2.5]
+
+
+def test_fractional_winsorize_bounds_are_not_truncated():
+    cleaner = DataCleaner({'outlier_columns': ['size']})
+    cleaner.state_ = {
+        'fill_values': {}, 'numeric_medians': {},
+        'winsorize_bounds': {'size': [1.5, 3.5]}, 'top_categories': {},
+    }
+    df = pd.DataFrame({'size': np.array([1, 2, 3, 4], dtype=np.int32)})
+    assert cleaner.transform(df)['size'].tolist() == [1.5, 2, 3, 3.5]
+
+
+def test_integral_statistics_keep_the_integer_dtype():
+    cleaner = DataCleaner({'numeric_columns': ['count']})
+    df = pd.DataFrame({'count': np.array([0, 1, 2, 3], dtype=np.int64)})
+    cleaned = cleaner.fit_transform(df)
+    assert cleaned['count'].dtype == np.int64
+    assert cleaned['count'].tolist() == [2, 1, 2, 3]
@@ -0,0 +1,86 @@
+import copy
+import json
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+import yaml
+from typer.testing import CliRunner
+
+from src.cli import app
+
+HEAVY_MODULES = ('matplotlib', 'seaborn', 'scipy', 'sklearn', 'xgboost', 'shap', 'statsmodels')
+
+COMMANDS = ['run', 'load', 'snapshot', 'checkout', 'clean', 'eda', 'test', 'target',
+            'train', 'glm', 'score']
+
+runner = CliRunner()
+
+
+def _write_config(cfg, tmp_path) -> str:
+    """Dump a configuration to a YAML file the CLI can load."""
+    cfg = copy.deepcopy(cfg)
+    cfg.config['profiling']['report_path'] = str(tmp_path / 'profile.json')
+    path = tmp_path / 'settings.yml'
+    path.write_text(yaml.safe_dump(cfg.config))
+    return str(path)
+
+
+@pytest.mark.parametrize('module', ['src.cli', 'src.pipeline.stages'])
+def test_import_loads_no_heavy_modules(module):
+    # A fresh interpreter, since the test session has imported them already
+    check = (f"import sys, {module}; "
+             f"print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', check], check=True,
+                            capture_output=True, text=True)
+    assert result.stdout.split() == []
+
+
+@pytest.mark.parametrize('command', COMMANDS)
+def test_every_command_has_help(command):
+    result = runner.invoke(app, [command, '--help'])
+    assert result.exit_code == 0, result.output
+    assert 'Usage' in result.output
+
+
+def test_load_writes_the_profile_report(raw_config, tmp_path):
+    config = _write_config(raw_config, tmp_path)
+    result = runner.invoke(app, ['load', '--config', config, '--no-cache'])
+    assert result.exit_code == 0, result.output
+    assert 'Loaded 3,000 rows' in result.output
+    assert json.loads((tmp_path / 'profile.json').read_text())['run']['command'] == 'load'
+
+
+def test_snapshot_and_checkout_round_trip(raw_config, tmp_path):
+    config = _write_config(raw_config, tmp_path)
+    raw = tmp_path / 'raw' / 'raw.txt'
+    original = raw.read_bytes()
+    result = runner.invoke(app, ['snapshot', str(raw), '--config', config])
+    assert result.exit_code == 0, result.output
+    digest = result.output.split()[-2]
+
+    raw.write_bytes(b'overwritten\n')
+    result = runner.invoke(app, ['checkout', digest, str(raw), '--config', config])
+    assert result.exit_code == 0, result.output
+    assert raw.read_bytes() == original
+
+
+def test_score_prices_a_quotes_file(trained_xgboost, tmp_path):
+    cfg, _ = trained_xgboost
+    config = _write_config(cfg, tmp_path)
+    quotes = tmp_path / 'quotes.jsonl'
+    pd.DataFrame([{'Province': 'Gauteng', 'Gender': 'Male', 'SumInsured': 100000.0,
+                   'RegistrationYear': 2010, 'TransactionMonth': '2015-03-01'}] * 3
+                 ).to_json(quotes, orient='records', lines=True)
+
+    output = tmp_path / 'premiums.csv'
+    result = runner.invoke(app, ['score', str(quotes), '--config', config, '-o', str(output)])
+    assert result.exit_code == 0, result.output
+    premiums = pd.read_csv(output)
+    assert len(premiums) == 3 and (premiums['premium'] > 0).all()
+
+
+def test_score_requires_quotes_or_serve():
+    result = runner.invoke(app, ['score'])
+    assert result.exit_code != 0
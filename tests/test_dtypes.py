@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from src.utils.dtypes import DtypeOptimizer
+
+
+def _frame():
+    n = 1000
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'year': rng.integers(1990, 2015, n).astype(np.int64),
+        'flag': rng.integers(0, 2, n).astype(float),
+        'doors': np.where(rng.random(n) < 0.1, np.nan, rng.integers(2, 6, n)),
+        'policy': pd.array(np.where(rng.random(n) < 0.1, None, rng.integers(0, 40_000, n)),
+                           dtype='Int64'),
+        'premium': rng.integers(0, 4000, n) / 4,
+        'ratio': rng.random(n),
+        'big': rng.integers(0, 2 ** 40, n).astype(np.int64),
+        'province': rng.choice(['Gauteng', 'Limpopo', None], n),
+        'vin': [f"V{i:06d}" for i in range(n)],
+    })
+
+
+def test_values_round_trip_in_narrower_dtypes():
+    df = _frame()
+    optimized = DtypeOptimizer().optimize(df)
+    assert optimized.dtypes.to_dict() == {
+        'year': np.int16, 'flag': np.int8, 'doors': 'Int8', 'policy': 'Int32',
+        'premium': np.float32, 'ratio': np.float32, 'big': np.int64,
+        'province': 'category', 'vin': object,
+    }
+    # Only float32 narrowing may move values, within float_rtol
+    for col in df.columns.drop('ratio'):
+        restored = optimized[col].astype(object).where(optimized[col].notna(), None)
+        original = df[col].astype(object).where(df[col].notna(), None)
+        assert restored.tolist() == original.tolist(), col
+    np.testing.assert_allclose(optimized['ratio'], df['ratio'], rtol=1e-6, atol=0)
+    assert df['year'].dtype == np.int64
+
+    exact = DtypeOptimizer(float_rtol=0).optimize(df)
+    assert exact['ratio'].dtype == np.float64 and exact['premium'].dtype == np.float32
+
+
+def test_missing_integers_become_nullable():
+    df = pd.DataFrame({'count': [1.0, np.nan, 3.0], 'full': [1.0, 2.0, 3.0]})
+    optimized = DtypeOptimizer().optimize(df)
+    assert optimized['count'].dtype == 'Int8'
+    assert optimized['count'].isna().tolist() == [False, True, False]
+    assert optimized['full'].dtype == np.int8
+
+
+def test_fractional_values_stay_floating():
+    df = pd.DataFrame({'exact': [0.5, 1.25, np.nan], 'inexact': [0.1, 0.2, 0.3]})
+    optimized = DtypeOptimizer(float_rtol=0).optimize(df)
+    assert optimized['exact'].dtype == np.float32
+    assert optimized['inexact'].dtype == np.float64
+    assert DtypeOptimizer().optimize(df)['inexact'].dtype == np.float32
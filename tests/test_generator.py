@@ -0,0 +1,10 @@
+from src.data_scripts.generator import SyntheticDataGenerator
+
+
+def test_output_does_not_depend_on_the_worker_count(tmp_path):
+    outputs = []
+    for workers in (1, 2):
+        path = tmp_path / str(workers) / 'raw.txt'
+        SyntheticDataGenerator(6_000, seed=4, chunksize=2_000, max_workers=workers).write(path)
+        outputs.append(path.read_bytes())
+    assert outputs[0] == outputs[1]
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.modeling.glm import CompressedGLM
+
+FEATURES = ['Province', 'Gender', 'VehicleType']
+
+
+@pytest.fixture(scope='module')
+def glm_frame(synthetic_frame):
+    """Synthetic extract with a rating level that has no claims."""
+    df = synthetic_frame[FEATURES + ['HasClaim', 'ClaimSeverity']].copy()
+    df['Province'] = df['Province'].astype(str)
+    no_claims = df.index[df['HasClaim'] == 0][:300]
+    df.loc[no_claims, 'Province'] = 'Nowhere'
+    return df
+
+
+def test_cell_fit_matches_row_fit(glm_frame):
+    cells = CompressedGLM(FEATURES).fit(glm_frame)
+    rows = CompressedGLM(FEATURES).fit(glm_frame, aggregate=False)
+    assert cells.n_cells_ < rows.n_cells_
+    for name in cells.models:
+        a, b = cells.coef_[name], rows.coef_[name]
+        np.testing.assert_allclose(a['coef'], b['coef'], rtol=1e-6, atol=1e-8)
+        np.testing.assert_allclose(a['std_err'], b['std_err'], rtol=1e-5)
+        assert cells.results_[name].scale == pytest.approx(rows.results_[name].scale, rel=1e-6)
+
+
+def test_level_without_claims_is_left_out(glm_frame):
+    glm = CompressedGLM(FEATURES, models=['frequency', 'pure_premium']).fit(glm_frame)
+    without = glm_frame[glm_frame['Province'] != 'Nowhere']
+    reference = CompressedGLM(FEATURES, models=['frequency', 'pure_premium']).fit(without)
+
+    for name in glm.models:
+        coef = glm.coef_[name]['coef']
+        assert np.isnan(coef['Province=Nowhere'])
+        np.testing.assert_allclose(
+            coef.drop('Province=Nowhere'), reference.coef_[name]['coef'], rtol=1e-6, atol=1e-8
+        )
+        # Every row at a left-out level, and only those, is not priced
+        excluded = np.zeros(len(glm_frame), dtype=bool)
+        for column in coef.index[coef.isna()]:
+            feature, level = column.split('=', 1)
+            excluded |= (glm_frame[feature].astype(str) == level).to_numpy()
+        assert excluded.any()
+        np.testing.assert_array_equal(np.isnan(glm.predict(glm_frame, name)), excluded)
+
+    relativities = glm.relativities('frequency').set_index(['feature', 'level'])
+    assert np.isnan(relativities.loc[('Province', 'Nowhere'), 'relativity'])
+
+
+def test_summary_counts_what_each_model_was_fitted_on(glm_frame):
+    glm = CompressedGLM(FEATURES).fit(glm_frame)
+    summary = glm.summary().set_index('model')
+    coef = glm.coef_['frequency']['coef']
+    excluded = np.zeros(len(glm_frame), dtype=bool)
+    for column in coef.index[coef.isna()]:
+        feature, level = column.split('=', 1)
+        excluded |= (glm_frame[feature].astype(str) == level).to_numpy()
+
+    claimed = glm_frame['HasClaim'].to_numpy() > 0
+    assert summary.loc['frequency', 'observations'] == (~excluded).sum()
+    assert summary.loc['frequency', 'claims'] == claimed[~excluded].sum()
+    assert summary.loc['severity', 'observations'] == claimed.sum()
+    assert glm.n_rows_ == len(glm_frame)
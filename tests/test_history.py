@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_scripts.history import ClaimHistory
+
+WINDOWS = (1, 3, 6)
+
+
+@pytest.fixture(scope='module')
+def transactions():
+    """Several rows per policy-month, gaps between months and unsorted rows."""
+    rng = np.random.default_rng(3)
+    n = 4000
+    month = pd.Timestamp('2014-01-01') + pd.to_timedelta(
+        rng.integers(0, 24, n) * 31, unit='D'
+    )
+    df = pd.DataFrame({
+        'PolicyID': rng.integers(0, 150, n),
+        'TransactionMonth': month.to_period('M').to_timestamp(),
+        'HasClaim': (rng.random(n) < 0.08).astype(float),
+        'TotalPremium': rng.gamma(2.0, 50.0, n).round(2),
+    })
+    return df.sample(frac=1.0, random_state=0).reset_index(drop=True)
+
+
+def _naive(df: pd.DataFrame) -> pd.DataFrame:
+    """Features from an explicit scan of each policy's strictly earlier months."""
+    months = df.groupby(['PolicyID', 'TransactionMonth']).agg(
+        claims=('HasClaim', 'sum'), premium=('TotalPremium', 'sum')
+    ).reset_index()
+    months['index'] = (months['TransactionMonth'].dt.year * 12
+                       + months['TransactionMonth'].dt.month)
+    rows = {}
+    for policy, group in months.groupby('PolicyID'):
+        for current in group.itertuples():
+            before = group[group['index'] < current.index]
+            record = {f"ClaimsLast{w}M": before.loc[before['index'] >= current.index - w,
+                                                    'claims'].sum()
+                      for w in WINDOWS}
+            claimed = before.loc[before['claims'] > 0, 'index']
+            record['MonthsSinceLastClaim'] = (current.index - claimed.max()
+                                              if len(claimed) else np.nan)
+            record['CumulativePremium'] = before['premium'].sum()
+            record['PriorMonths'] = len(before)
+            rows[(policy, current.TransactionMonth)] = record
+    keys = list(zip(df['PolicyID'], df['TransactionMonth']))
+    return pd.DataFrame([rows[key] for key in keys], index=df.index)
+
+
+def _features(history: ClaimHistory, df: pd.DataFrame) -> pd.DataFrame:
+    return df[history.feature_names].astype(np.float64)
+
+
+def test_features_use_only_earlier_months(transactions):
+    history = ClaimHistory(WINDOWS)
+    result = _features(history, history.transform(transactions))
+    expected = _naive(transactions)[history.feature_names]
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False, rtol=1e-6)
+
+
+def test_later_months_do_not_change_earlier_features(transactions):
+    history = ClaimHistory(WINDOWS)
+    cutoff = pd.Timestamp('2015-01-01')
+    early = transactions['TransactionMonth'] < cutoff
+    full = _features(history, history.transform(transactions))
+    truncated = _features(history, history.transform(transactions[early]))
+    pd.testing.assert_frame_equal(full[early], truncated)
+
+
+def test_incremental_update_matches_full_transform(transactions, tmp_path):
+    full = ClaimHistory(WINDOWS).transform(transactions)
+    month = transactions['TransactionMonth']
+    cutoffs = [pd.Timestamp('2014-07-01'), pd.Timestamp('2015-02-01'),
+               pd.Timestamp('2015-03-01'), month.max() + pd.offsets.MonthBegin()]
+
+    state_path = tmp_path / 'history'
+    seed = ClaimHistory(WINDOWS, state_path=str(state_path))
+    parts = [seed.transform(transactions[month < cutoffs[0]])]
+    assert not state_path.exists()
+    seed.save_state()
+    for start, end in zip(cutoffs, cutoffs[1:]):
+        # A fresh instance resumes from the saved state
+        history = ClaimHistory(WINDOWS, state_path=str(state_path))
+        parts.append(history.update(transactions[(month >= start) & (month < end)]))
+    incremental = pd.concat(parts).loc[transactions.index]
+
+    names = ClaimHistory(WINDOWS).feature_names
+    pd.testing.assert_frame_equal(incremental[names], full[names])
+
+    with pytest.raises(ValueError, match='already covers'):
+        ClaimHistory(WINDOWS, state_path=str(state_path)).update(transactions.head(10))
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+from statsmodels.stats.multitest import multipletests
+
+from src.analysis.hypothesis import HypothesisTester, benjamini_hochberg
+
+
+@pytest.fixture(scope='module')
+def frame():
+    rng = np.random.default_rng(1)
+    n = 3000
+    region = rng.choice(['A', 'B', 'C', 'D'], n, p=[0.4, 0.3, 0.2, 0.1])
+    side = rng.choice(['left', 'right'], n, p=[0.7, 0.3])
+    df = pd.DataFrame({
+        'Region': region,
+        'Side': side,
+        'Claimed': (rng.random(n) < np.where(region == 'D', 0.15, 0.1)).astype(float),
+        # Unequal spreads, so Welch and the pooled t-test disagree
+        'Amount': rng.normal(np.where(side == 'left', 100.0, 104.0),
+                             np.where(side == 'left', 10.0, 40.0)),
+    })
+    df.loc[rng.random(n) < 0.05, 'Amount'] = np.nan
+    df.loc[rng.random(n) < 0.02, 'Region'] = None
+    return df
+
+
+def _groups(df, group, metric):
+    valid = df[[group, metric]].dropna()
+    return [g[metric].to_numpy() for _, g in valid.groupby(group)]
+
+
+def test_batch_statistics_match_scipy(frame):
+    tests = [('Region', 'Claimed'), ('Side', 'Claimed'), ('Region', 'Amount'),
+             ('Side', 'Amount')]
+    results = HypothesisTester().run_batch(frame, tests)
+    assert list(results['test']) == ['chi2', 'chi2', 'anova', 'welch_t']
+
+    for row in results.itertuples():
+        groups = _groups(frame, row.group, row.metric)
+        if row.test == 'chi2':
+            table = [[g.sum(), len(g) - g.sum()] for g in groups]
+            statistic, p_value, _, _ = stats.chi2_contingency(table, correction=False)
+        elif row.test == 'anova':
+            statistic, p_value = stats.f_oneway(*groups)
+        else:
+            statistic, p_value = stats.ttest_ind(*groups, equal_var=False)
+        assert row.n == sum(len(g) for g in groups)
+        assert row.statistic == pytest.approx(statistic, rel=1e-9)
+        assert row.p_value == pytest.approx(p_value, rel=1e-6)
+
+
+def test_benjamini_hochberg_matches_statsmodels():
+    p_values = np.array([0.001, 0.2, np.nan, 0.03, 0.04, 0.5, 0.012])
+    adjusted, reject = benjamini_hochberg(p_values, alpha=0.05)
+    present = ~np.isnan(p_values)
+    expected_reject, expected, _, _ = multipletests(p_values[present], alpha=0.05,
+                                                    method='fdr_bh')
+    np.testing.assert_allclose(adjusted[present], expected)
+    np.testing.assert_array_equal(reject[present], expected_reject)
+    assert np.isnan(adjusted[~present]).all() and not reject[~present].any()
+
+
+def test_permutation_p_values_follow_the_parametric_tests(frame):
+    tests = [('Region', 'Claimed'), ('Region', 'Amount'), ('Side', 'Amount')]
+    parametric = HypothesisTester().run_batch(frame, tests)
+    permuted = HypothesisTester(method='permutation', n_resamples=4000,
+                                random_state=3).run_batch(frame, tests)
+    assert list(permuted['test']) == [t + ' (permutation)' for t in parametric['test']]
+    # Monte Carlo error of a p-value near 0.1 is about 0.005 at 4000 resamples
+    np.testing.assert_allclose(permuted['p_value'], parametric['p_value'], atol=0.03)
+    # The two-group statistic is Welch's t, not the pooled t
+    pooled_t = stats.ttest_ind(*_groups(frame, 'Side', 'Amount')).pvalue
+    welch_p, permuted_p = parametric['p_value'].iloc[2], permuted['p_value'].iloc[2]
+    assert abs(permuted_p - welch_p) < abs(permuted_p - pooled_t) / 2
+
+    in_pool = HypothesisTester(max_workers=2, method='permutation', n_resamples=4000,
+                               random_state=3).run_batch(frame, tests)
+    pd.testing.assert_series_equal(in_pool['p_value'], permuted['p_value'])
+
+
+def test_margin_counts_claim_free_rows():
+    # Zero amounts parse as NaN in the raw extract
+    df = pd.DataFrame({
+        'Province': ['Gauteng', 'Gauteng', 'Limpopo', 'Limpopo', 'Limpopo'],
+        'Gender': ['Female', 'Male', 'Female', 'Male', 'Male'],
+        'TotalPremium': [100.0, np.nan, 80.0, 120.0, 90.0],
+        'TotalClaims': [np.nan, 500.0, np.nan, np.nan, 30.0],
+    })
+    results = HypothesisTester().test_provincial_risk(df).set_index('metric')
+    assert results.loc['Margin', 'n'] == 5
+    assert results.loc['ClaimFrequency', 'n'] == 5
+    assert results.loc['ClaimSeverity', 'n'] == 2
+    assert results.loc['Margin', 'min_mean'] == pytest.approx(-200.0)
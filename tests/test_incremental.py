@@ -0,0 +1,47 @@
+
+import pandas as pd
+import pytest
+
+from src.data_scripts.cleaner import DataCleaner
+from src.data_scripts.incremental import IncrementalIngestor
+from src.data_scripts.loader import InsuranceDataLoader
+from src.data_scripts.storage import read_parquet_dataset, write_parquet_stream
+
+
+@pytest.fixture
+def store_config(raw_config, tmp_path):
+    cfg = raw_config
+    cfg.config['data']['incremental'] = {'enabled': True, 'store_path': str(tmp_path / 'store')}
+    cfg.config['cleaning_strategies']['state_path'] = str(tmp_path / 'cleaner.json')
+    cfg.config['reports']['risk_cube_path'] = None
+    return cfg
+
+
+def _ingest(cfg):
+    return IncrementalIngestor(
+        cfg, InsuranceDataLoader(cfg), DataCleaner(cfg.get('cleaning_strategies'))
+    ).run()
+
+
+def test_rerun_is_a_no_op(store_config):
+    first = _ingest(store_config)
+    assert first['written'] and not first['unchanged']
+    second = _ingest(store_config)
+    assert second['written'] == [] and second['unchanged'] == first['written']
+
+
+def test_changed_strategies_rewrite_every_partition(store_config):
+    first = _ingest(store_config)
+    store_config.config['cleaning_strategies']['winsorize_limits'] = [0.05, 0.05]
+    second = _ingest(store_config)
+    assert second['written'] == first['written']
+
+
+def test_interrupted_staging_directory_is_not_read(tmp_path):
+    df = pd.DataFrame({'a': [1, 2, 3]})
+    write_parquet_stream([df], tmp_path / 'store' / 'month=2015-01')
+    write_parquet_stream([df], tmp_path / 'store' / 'month=2015-02')
+    # A crash between writing the parts and the swap leaves this behind
+    write_parquet_stream([df], tmp_path / 'store' / 'staged')
+    (tmp_path / 'store' / 'staged').rename(tmp_path / 'store' / 'month=2015-02.tmp')
+    assert len(read_parquet_dataset(tmp_path / 'store')) == 6
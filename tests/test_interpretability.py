@@ -0,0 +1,48 @@
+import copy
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.modeling.features import FeatureEncoder
+from src.modeling.checkpoints import read_checkpoint_meta
+from src.modeling.interpretability import ShapExplainer, stratified_sample
+
+
+@pytest.mark.parametrize('max_workers', [None, 2])
+def test_contributions_add_up_to_the_model_prediction(trained_xgboost, model_frame,
+                                                      tmp_path, max_workers):
+    cfg, trainer = trained_xgboost
+    cfg = copy.deepcopy(cfg)
+    cfg.config['model']['interpretability'] = {
+        'models': ['xgboost'], 'sample_size': 400, 'chunk_size': 150,
+        'max_workers': max_workers, 'cache_dir': str(tmp_path / 'shap'),
+    }
+    explained = ShapExplainer(cfg).explain('xgboost', model_frame)
+
+    checkpoint = trainer.save_dir / 'xgboost.joblib'
+    encoder = FeatureEncoder.from_dict(read_checkpoint_meta(checkpoint)['encoder'])
+    predictions = joblib.load(checkpoint).predict(
+        encoder.transform(model_frame.iloc[explained['rows']])
+    )
+    totals = explained['values'].sum(axis=1) + explained['base_values']
+    np.testing.assert_allclose(totals, predictions, rtol=1e-4, atol=1e-1)
+
+
+def test_stratified_sample_fills_the_budget():
+    rng = np.random.default_rng(0)
+    # A few large strata and many singletons, as with rare provinces
+    groups = np.concatenate([np.repeat(np.arange(5), 2000), np.arange(5, 80)])
+    df = pd.DataFrame({'Province': rng.permutation(groups)})
+    for size in (50, 100, 500, 3333):
+        rows = stratified_sample(df, size, ['Province'])
+        assert len(rows) == size == len(np.unique(rows))
+    # Every stratum is represented when the budget allows
+    assert df.iloc[stratified_sample(df, 100, ['Province'])]['Province'].nunique() == 80
+
+
+def test_stratified_sample_is_proportional():
+    df = pd.DataFrame({'Province': np.repeat(['a', 'b', 'c'], [6000, 3000, 1000])})
+    counts = df.iloc[stratified_sample(df, 1000, ['Province'])]['Province'].value_counts()
+    assert counts.to_dict() == {'a': 600, 'b': 300, 'c': 100}
@@ -0,0 +1,112 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_scripts.generator import SyntheticDataGenerator
+from src.data_scripts.loader import InsuranceDataLoader
+from src.data_scripts.schema import concat_chunks, filter_mask
+
+
+@pytest.fixture
+def loader(raw_config):
+    return InsuranceDataLoader(raw_config)
+
+
+def test_chunked_read_matches_a_single_read(loader, raw_config):
+    whole = loader.load_raw_data(use_cache=False)
+    chunked = loader.load_raw_data(use_cache=False, chunksize=700)
+    pd.testing.assert_frame_equal(chunked, whole)
+    streamed = concat_chunks(loader.iter_raw_data(chunksize=700, use_cache=False))
+    pd.testing.assert_frame_equal(streamed, whole)
+
+    # Dtypes are pinned by data.schema, not inferred per chunk
+    schema = raw_config.get('data.schema')
+    for col in schema['category']:
+        if col in whole:
+            assert isinstance(whole[col].dtype, pd.CategoricalDtype), col
+    for col in schema['float32']:
+        if col in whole:
+            assert whole[col].dtype == np.float32, col
+    assert whole['TransactionMonth'].dtype == 'datetime64[ns]'
+
+
+def test_zero_amounts_parse_as_missing(loader):
+    generated = SyntheticDataGenerator(3_000, seed=11, claim_rate=0.05).frame()
+    for chunksize in (None, 700):
+        parsed = loader.load_raw_data(use_cache=False, chunksize=chunksize)
+        zero = (generated['TotalClaims'] == 0).to_numpy()
+        assert zero.any()
+        np.testing.assert_array_equal(parsed['TotalClaims'].isna().to_numpy(), zero)
+        np.testing.assert_allclose(parsed['TotalClaims'].to_numpy()[~zero],
+                                   generated['TotalClaims'].to_numpy()[~zero], rtol=1e-6)
+
+
+
+def _cache_dirs(raw_config):
+    return sorted(p.name for p in Path(raw_config.get('data.cache_dir')).iterdir())
+
+
+def test_cache_is_reused_until_the_source_changes(loader, raw_config, monkeypatch):
+    builds = []
+    build = loader._build_cache
+    monkeypatch.setattr(loader, '_build_cache', lambda *a: builds.append(a[2]) or build(*a))
+
+    parsed = loader.load_raw_data(use_cache=False)
+    pd.testing.assert_frame_equal(loader.load_raw_data(use_cache=True), parsed)
+    pd.testing.assert_frame_equal(loader.load_raw_data(use_cache=True), parsed)
+    assert len(builds) == 1
+    assert _cache_dirs(raw_config) == [builds[0].name]
+
+    # Rewrite the raw file with other contents: a miss that replaces the old cache
+    raw = Path(raw_config.get('data.raw_dir')) / 'raw.txt'
+    SyntheticDataGenerator(2_000, seed=12, claim_rate=0.05).write(raw)
+    cached = loader.load_raw_data(use_cache=True)
+    assert len(builds) == 2 and builds[1] != builds[0]
+    pd.testing.assert_frame_equal(cached, loader.load_raw_data(use_cache=False))
+    assert _cache_dirs(raw_config) == [builds[1].name]
+
+
+def test_cache_cleanup_keeps_builds_and_other_files(loader, raw_config):
+    cache_dir = Path(raw_config.get('data.cache_dir'))
+    key = loader.source_fingerprint()
+    stale = cache_dir / 'raw-0123456789abcdef'
+    building = cache_dir / 'raw-fedcba9876543210.tmp'
+    other_file = cache_dir / 'raw-001-0123456789abcdef'
+    interrupted = cache_dir / f"raw-{key}.tmp"
+    for path in (stale, building, other_file, interrupted):
+        path.mkdir(parents=True)
+        (path / 'part-00000.parquet').write_bytes(b'not parquet')
+
+    df = loader.load_raw_data(use_cache=True)
+    assert len(df) == 3_000
+    # The interrupted build of this key was discarded, not read
+    assert _cache_dirs(raw_config) == sorted([f"raw-{key}", building.name, other_file.name])
+
+
+@pytest.mark.parametrize('filters', [
+    [('Province', 'in', ['Gauteng', 'Limpopo'])],
+    [('Gender', '!=', 'Male')],
+    [('Gender', 'not in', ['Male'])],
+    [('TotalClaims', '>', 0)],
+    [('TotalPremium', '<=', 50)],
+    [('TransactionMonth', '>=', '2015-01-01'), ('Province', '==', 'Gauteng')],
+    [('transactionmonth', 'in', ['2015-03-01', '2015-04-01'])],
+])
+@pytest.mark.parametrize('columns', [None, ['PolicyID', 'TotalClaims', 'Province']])
+def test_pushdown_gives_the_same_rows_on_every_reader(loader, filters, columns):
+    # Gender and TotalClaims have missing values, which filters must treat alike
+    expected = loader.load_raw_data(use_cache=False)
+    expected = expected[filter_mask(expected, loader.schema.normalize_filters(
+        filters, expected.columns
+    ))].reset_index(drop=True)
+    if columns is not None:
+        # Selected columns come back in file order
+        expected = expected[[col for col in expected.columns if col in columns]]
+    assert 0 < len(expected) < 3_000
+
+    for options in ({'use_cache': False}, {'use_cache': False, 'chunksize': 700},
+                    {'use_cache': True}):
+        result = loader.load_raw_data(columns=columns, filters=filters, **options)
+        pd.testing.assert_frame_equal(result, expected)
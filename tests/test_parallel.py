@@ -0,0 +1,21 @@
+import pandas as pd
+import pytest
+
+from src.data_scripts.cleaner import DataCleaner
+from src.data_scripts.loader import InsuranceDataLoader
+from src.data_scripts.parallel import ParallelPreprocessor
+
+
+@pytest.mark.parametrize('partition_by', ['rows', 'Province'])
+def test_partitioned_output_matches_the_serial_path(raw_config, tmp_path, partition_by):
+    raw_config.config['pipeline']['scratch_dir'] = str(tmp_path)
+    loader = InsuranceDataLoader(raw_config)
+    strategies = raw_config.get('cleaning_strategies')
+    raw = loader.load_raw_data(use_cache=False)
+    # Shuffle so partitions by value interleave in the input
+    raw = raw.sample(frac=1.0, random_state=0)
+
+    serial = DataCleaner(strategies).clean(loader.create_derived_features(raw))
+    parallel = ParallelPreprocessor(raw_config, DataCleaner(strategies), max_workers=2,
+                                    partition_by=partition_by).run(raw)
+    pd.testing.assert_frame_equal(parallel, serial)
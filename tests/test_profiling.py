@@ -0,0 +1,67 @@
+import json
+import time
+
+import pandas as pd
+import pytest
+
+from src.pipeline.runner import Stage, StageRunner
+from src.utils import profiling
+from src.utils.profiling import profiled
+
+
+def _load():
+    time.sleep(0.05)
+    return pd.DataFrame({'x': range(1000)})
+
+
+def _double(df):
+    with profiled('double.step', rows=len(df)):
+        time.sleep(0.02)
+        df = df.assign(x=df['x'] * 2)
+    return df
+
+
+def _total(df):
+    return int(df['x'].sum())
+
+
+@pytest.fixture
+def graph(config, tmp_path):
+    runner = StageRunner(config, cache_dir=str(tmp_path / 'stages'), max_workers=2)
+    runner.add(Stage('load', _load))
+    runner.add(Stage('double', _double, inputs=['load']))
+    runner.add(Stage('total', _total, inputs=['double']))
+    profiling.configure(enabled=True)
+    profiling.reset()
+    yield runner
+    profiling.reset()
+
+
+def test_report_records_stage_and_step_spans(graph, tmp_path):
+    assert graph.run()['total'] == 999_000
+    report = json.loads(profiling.write_report(tmp_path / 'profile.json', stages=None)
+                        .read_text())
+
+    spans = {span['name']: span for span in report['spans']}
+    assert set(spans) == {'stage.load', 'stage.double', 'double.step', 'stage.total'}
+    assert spans['stage.load']['wall_s'] >= 0.05
+    assert spans['double.step']['wall_s'] >= 0.02
+    assert spans['stage.double']['wall_s'] >= spans['double.step']['wall_s']
+    assert spans['stage.double']['rows'] == spans['double.step']['rows'] == 1000
+    # Spans close in dependency order
+    names = [span['name'] for span in report['spans']]
+    assert names.index('stage.load') < names.index('double.step') < names.index('stage.total')
+
+    summary = {row['name']: row for row in report['summary']}
+    assert summary['stage.load']['calls'] == 1
+    assert summary['stage.double']['rows_per_s'] == pytest.approx(
+        1000 / spans['stage.double']['wall_s']
+    )
+    assert {'commit', 'python', 'timestamp'} <= set(report['run'])
+
+
+def test_cached_stages_record_no_spans(graph):
+    graph.run()
+    profiling.reset()
+    assert graph.run()['total'] == 999_000
+    assert [span['name'] for span in profiling.records()] == []
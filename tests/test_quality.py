@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analysis.quality import QualityProfile, profile_chunks
+
+RANK_TOLERANCE = 0.005
+
+
+def _chunks(df, size=3_000):
+    return [df.iloc[start:start + size] for start in range(0, len(df), size)]
+
+
+def _number(value) -> float:
+    """Statistics as floats; timestamps as nanoseconds, NaT as NaN."""
+    if isinstance(value, pd.Timestamp) or value is pd.NaT:
+        return np.nan if value is pd.NaT else float(value.value)
+    return float(value)
+
+
+def _values(series: pd.Series) -> np.ndarray:
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.astype('int64').where(series.notna()).to_numpy(dtype=float)
+    return series.to_numpy(dtype=float, na_value=np.nan)
+
+
+@pytest.mark.parametrize('max_workers', [None, 2])
+def test_merged_profile_matches_the_full_frame(synthetic_frame, max_workers):
+    df = synthetic_frame
+    report = profile_chunks(_chunks(df), max_workers=max_workers).report()
+
+    missing = report['missing_values']['missing_count']
+    pd.testing.assert_series_equal(missing.sort_index(), df.isna().sum().sort_index(),
+                                   check_names=False)
+    np.testing.assert_allclose(report['missing_values']['missing_pct'],
+                               missing / len(df) * 100)
+
+    # Moments accumulate in float64; describe() would sum float32 columns in float32
+    described = df.astype({col: 'float64' for col in df.select_dtypes('float32')}).describe()
+    # Dates are described as timestamps, as describe() does
+    assert 'TransactionMonth' in report['numeric_stats']
+    assert set(report['numeric_stats']) == set(described.columns)
+    for col, stats in report['numeric_stats'].items():
+        expected = described[col]
+        for name in ('count', 'mean', 'std', 'min', 'max'):
+            assert _number(stats[name]) == pytest.approx(
+                _number(expected[name]), rel=1e-9, abs=1e-12, nan_ok=True
+            ), (col, name)
+        # Percentiles are sketched: order statistics within the rank tolerance
+        values = _values(df[col])
+        values = np.sort(values[~np.isnan(values)])
+        if not values.size:
+            assert all(np.isnan(_number(stats[f"{q * 100:g}%"])) for q in (0.25, 0.5, 0.75, 0.95))
+            continue
+        for q in (0.25, 0.5, 0.75, 0.95):
+            value = _number(stats[f"{q * 100:g}%"])
+            low = np.searchsorted(values, value, side='left')
+            high = np.searchsorted(values, value, side='right') - 1
+            rank = q * (values.size - 1)
+            assert max(low - rank, rank - high, 0) / values.size <= RANK_TOLERANCE, (col, q)
+
+    categorical = df.select_dtypes(include=['object', 'category'])
+    exact = categorical.nunique()
+    estimated = pd.Series(report['categorical_summary'])[exact.index]
+    np.testing.assert_allclose(estimated, exact, rtol=3 * 1.04 / np.sqrt(2 ** 12), atol=1)
+
+    # Keys are dtype names, so chunks with different category sets agree
+    assert report['dtype_summary'] == df.dtypes.astype(str).value_counts().to_dict()
+
+
+def test_merge_is_independent_of_the_split(synthetic_frame):
+    whole = QualityProfile().update(synthetic_frame).report()
+    parts = [QualityProfile().update(chunk) for chunk in _chunks(synthetic_frame, 7_000)]
+    merged = parts[0].merge(parts[1]).merge(parts[2]).report()
+    pd.testing.assert_frame_equal(merged['missing_values'].sort_index(),
+                                  whole['missing_values'].sort_index())
+    for col, stats in whole['numeric_stats'].items():
+        for name in ('count', 'mean', 'std', 'min', 'max'):
+            assert _number(merged['numeric_stats'][col][name]) == pytest.approx(
+                _number(stats[name]), rel=1e-9, nan_ok=True
+            ), (col, name)
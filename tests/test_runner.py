@@ -0,0 +1,82 @@
+import copy
+import importlib
+import sys
+import threading
+
+import pytest
+
+from src.pipeline import runner
+from src.pipeline.runner import Stage
+from src.utils.processes import process_pool
+
+
+@pytest.fixture
+def stage_package(tmp_path, monkeypatch):
+    package = tmp_path / 'stagepkg'
+    package.mkdir()
+    (package / '__init__.py').write_text('')
+    (package / 'helpers.py').write_text('def scale(x):\n    return x * 2\n')
+    (package / 'core.py').write_text('from .helpers import scale\n')
+    (package / 'stages.py').write_text(
+        'def run(x):\n'
+        '    from .core import scale\n'
+        '    return scale(x)\n'
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield package
+    for name in [m for m in sys.modules if m.startswith('stagepkg')]:
+        del sys.modules[name]
+    runner._module_imports.cache_clear()
+
+
+def test_code_hash_tracks_transitive_package_imports(stage_package):
+    stage = Stage('run', importlib.import_module('stagepkg.stages').run)
+    before = stage.code_hash()
+    runner._module_imports.cache_clear()
+    assert stage.code_hash() == before
+
+    (stage_package / 'helpers.py').write_text('def scale(x):\n    return x * 3\n')
+    runner._module_imports.cache_clear()
+    assert stage.code_hash() != before
+
+
+def test_code_hash_ignores_modules_outside_the_package():
+    def stage_func(x):
+        import json
+        return json.dumps(x)
+    assert runner._dependency_sources(stage_func, 'import json\n') == []
+
+
+def _square(x):
+    return x * x
+
+
+def test_process_pool_starts_from_a_worker_thread():
+    results = []
+
+    def work():
+        with process_pool(max_workers=2) as pool:
+            results.extend(pool.map(_square, range(4)))
+
+    thread = threading.Thread(target=work)
+    thread.start()
+    thread.join(timeout=120)
+    assert results == [0, 1, 4, 9]
+
+
+def test_pipeline_options_override_the_config(config):
+    from src.pipeline.stages import build_pipeline
+    cfg = copy.deepcopy(config)
+    cfg.config['data']['incremental']['enabled'] = True
+    assert 'load' not in build_pipeline(cfg).stages
+    assert 'load' in build_pipeline(cfg, incremental=False).stages
+    assert 'hypothesis' in build_pipeline(cfg).stages['hypothesis'].config_keys
+
+
+def test_hypothesis_tester_reads_its_config(config):
+    from src.analysis.hypothesis import HypothesisTester
+    cfg = copy.deepcopy(config)
+    cfg.config['hypothesis'].update(method='permutation', n_resamples=99, max_workers=2)
+    tester = HypothesisTester.from_config(cfg)
+    assert (tester.method, tester.n_resamples, tester.max_workers) == ('permutation', 99, 2)
+    assert tester.random_state == 42
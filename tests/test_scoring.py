@@ -0,0 +1,78 @@
+import json
+
+import joblib
+import numpy as np
+import pytest
+from scipy import sparse
+
+from src.modeling.checkpoints import read_checkpoint_meta
+from src.modeling.features import FeatureEncoder
+from src.modeling.scoring import MicroBatcher, PremiumScorer
+
+
+def _quotes(df, encoder):
+    columns = encoder.input_columns(df.columns) + ['RegistrationYear', 'TransactionMonth']
+    frame = df[list(dict.fromkeys(columns))]
+    return {col: frame[col].astype(object).where(frame[col].notna(), None).tolist()
+            for col in frame.columns}
+
+
+def test_scorer_matches_the_model_on_the_training_layout(trained_xgboost, model_frame):
+    cfg, trainer = trained_xgboost
+    checkpoint = trainer.save_dir / 'xgboost.joblib'
+    model = joblib.load(checkpoint)
+    encoder_state = read_checkpoint_meta(checkpoint)['encoder']
+    encoder = FeatureEncoder.from_dict(encoder_state)
+    df = model_frame[model_frame['TransactionMonth'].notna()].head(2000)
+
+    scorer = PremiumScorer(model, encoder_state)
+    X = encoder.transform(df)
+    assert isinstance(X, sparse.csr_matrix)
+    np.testing.assert_allclose(scorer.features(_quotes(df, encoder)), X.toarray(), rtol=1e-5)
+
+    expected = np.maximum(model.predict(X), 0.0)
+    scored = scorer.score(_quotes(df, encoder))['expected_claims']
+    np.testing.assert_allclose(scored, expected, rtol=1e-4, atol=1e-2)
+
+
+def test_empty_batch_scores_to_empty_arrays(trained_xgboost):
+    cfg, trainer = trained_xgboost
+    scorer = PremiumScorer.from_artifacts(cfg, 'xgboost')
+    result = scorer.score([])
+    assert result['premium'].shape == (0,) and result['expected_claims'].shape == (0,)
+
+
+def test_outdated_checkpoint_is_rejected(trained_xgboost, tmp_path):
+    _, trainer = trained_xgboost
+    checkpoint = tmp_path / 'xgboost.joblib'
+    checkpoint.write_bytes((trainer.save_dir / 'xgboost.joblib').read_bytes())
+    meta = read_checkpoint_meta(trainer.save_dir / 'xgboost.joblib')
+    meta['version'] = 1
+    del meta['encoder']
+    checkpoint.with_suffix('.json').write_text(json.dumps(meta))
+    with pytest.raises(ValueError, match='retrain'):
+        read_checkpoint_meta(checkpoint)
+
+
+def test_malformed_quote_fails_only_its_own_request(trained_xgboost):
+    cfg, _ = trained_xgboost
+    scorer = PremiumScorer.from_artifacts(cfg, 'xgboost')
+    quote = {'Province': 'Gauteng', 'Gender': 'Male', 'SumInsured': 100000.0,
+             'RegistrationYear': 2010, 'TransactionMonth': '2015-03-01'}
+    expected = scorer.score([quote])['premium']
+
+    calls = []
+    score = scorer.score
+    scorer.score = lambda quotes: calls.append(len(quotes)) or score(quotes)
+    # The wait window makes the three requests share one batch
+    batcher = MicroBatcher(scorer, max_wait_ms=500)
+    futures = [batcher.submit([quote]),
+               batcher.submit([dict(quote, SumInsured='lots')]),
+               batcher.submit([quote, quote])]
+
+    np.testing.assert_allclose(futures[0].result(timeout=10)['premium'], expected)
+    with pytest.raises(ValueError):
+        futures[1].result(timeout=10)
+    np.testing.assert_allclose(futures[2].result(timeout=10)['premium'],
+                               np.repeat(expected, 2))
+    assert calls[0] == 4
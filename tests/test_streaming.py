@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_scripts.cleaner import DataCleaner
+from src.data_scripts.generator import SyntheticDataGenerator
+from src.data_scripts.loader import InsuranceDataLoader
+from src.data_scripts.storage import read_parquet_dataset
+from src.data_scripts.streaming import preprocess_out_of_core
+
+# The sketches keep rank error around 0.1% of the count; allow a margin
+RANK_TOLERANCE = 0.005
+
+
+@pytest.fixture
+def streamed(raw_config, tmp_path):
+    """A raw file large enough for the quantile sketches to compact."""
+    SyntheticDataGenerator(30_000, seed=3, claim_rate=0.05).write(tmp_path / 'raw' / 'raw.txt')
+    loader = InsuranceDataLoader(raw_config)
+    cleaner = DataCleaner(raw_config.get('cleaning_strategies'))
+    rows = preprocess_out_of_core(loader, cleaner, tmp_path / 'processed', chunksize=4_000)
+    return loader, cleaner, rows, read_parquet_dataset(tmp_path / 'processed')
+
+
+def _rank_error(values: np.ndarray, value: float, rank: float) -> float:
+    """Distance from ``rank`` to the ranks ``value`` occupies, as a fraction."""
+    values = values[~np.isnan(values)]
+    low, high = np.sum(values < value), np.sum(values <= value) - 1
+    return max(low - rank, rank - high, 0) / values.size
+
+
+def test_streamed_output_matches_in_memory_clean(streamed, raw_config):
+    loader, stream_cleaner, rows, result = streamed
+    raw = loader.create_derived_features(loader.load_raw_data(use_cache=False))
+    assert rows == len(result) == len(raw) == 30_000
+
+    exact = DataCleaner(raw_config.get('cleaning_strategies')).fit(raw).state_
+    approx = stream_cleaner.state_
+    # Counted statistics are exact
+    assert approx['top_categories'] == exact['top_categories']
+    assert {k: v for k, v in approx['fill_values'].items() if isinstance(v, str)} == \
+        {k: v for k, v in exact['fill_values'].items() if isinstance(v, str)}
+
+    # Sketched ones are order statistics within the rank tolerance
+    lower, upper = raw_config.get('cleaning_strategies.winsorize_limits')
+    for col, (low, high) in approx['winsorize_bounds'].items():
+        values = raw[col].to_numpy(dtype=float, na_value=np.nan)
+        n = np.count_nonzero(~np.isnan(values))
+        assert _rank_error(values, low, int(lower * n)) <= RANK_TOLERANCE
+        assert _rank_error(values, high, n - int(upper * n) - 1) <= RANK_TOLERANCE
+    for col, median in approx['numeric_medians'].items():
+        values = raw[col].to_numpy(dtype=float, na_value=np.nan)
+        values = values[values != 0]
+        n = np.count_nonzero(~np.isnan(values))
+        assert _rank_error(values, median, 0.5 * (n - 1)) <= RANK_TOLERANCE
+    assert approx['numeric_medians'] and approx['winsorize_bounds']
+
+    # With the same statistics the streamed rows equal the in-memory clean
+    expected = DataCleaner(raw_config.get('cleaning_strategies'))
+    expected.state_ = approx
+    expected = expected.transform(raw)
+    pd.testing.assert_frame_equal(result, expected, check_categorical=False)
@@ -0,0 +1,110 @@
+import copy
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analysis.targeting import SegmentTargeter
+from src.data_scripts.generator import SyntheticDataGenerator
+from src.data_scripts.loader import InsuranceDataLoader
+
+
+def _buhlmann_straub(df: pd.DataFrame, dimension: str) -> pd.DataFrame:
+    """Textbook Bühlmann-Straub with segment-months as periods and premium as weights."""
+    periods = df.assign(Month=df['TransactionMonth'].dt.to_period('M')).groupby(
+        [dimension, 'Month'], observed=True
+    )[['TotalPremium', 'TotalClaims']].sum().reset_index()
+    periods = periods[periods['TotalPremium'] > 0]
+    periods['X'] = periods['TotalClaims'] / periods['TotalPremium']
+
+    segments = {}
+    for level, group in periods.groupby(dimension, observed=True):
+        w = group['TotalPremium'].sum()
+        x = (group['TotalPremium'] * group['X']).sum() / w
+        within = (group['TotalPremium'] * (group['X'] - x) ** 2).sum()
+        segments[str(level)] = {'w': w, 'x': x, 'within': within, 'n': len(group)}
+    table = pd.DataFrame(segments).T
+
+    total = table['w'].sum()
+    s2 = table['within'].sum() / (table['n'] - 1).sum()
+    collective = (table['w'] * table['x']).sum() / total
+    a = (((table['w'] * (table['x'] - collective) ** 2).sum() - (len(table) - 1) * s2)
+         / (total - (table['w'] ** 2).sum() / total))
+    table['Credibility'] = table['w'] / (table['w'] + s2 / a) if a > 0 else 0.0
+    table['CredibleLossRatio'] = (table['Credibility'] * table['x']
+                                  + (1 - table['Credibility']) * collective)
+    return table
+
+
+@pytest.fixture(scope='module')
+def portfolio():
+    """Policies whose claim rate differs by province, so credibility is positive."""
+    rng = np.random.default_rng(5)
+    n = 30_000
+    provinces = np.array(['Gauteng', 'Western Cape', 'Limpopo', 'Free State', 'North West'])
+    province = rng.choice(provinces, n, p=[0.5, 0.25, 0.15, 0.07, 0.03])
+    rate = pd.Series([0.02, 0.01, 0.04, 0.03, 0.005], index=provinces)[province].to_numpy()
+    claimed = rng.random(n) < rate
+    return pd.DataFrame({
+        'Province': province,
+        'Gender': rng.choice(['Male', 'Female'], n),
+        'TransactionMonth': pd.Timestamp('2014-01-01') + pd.to_timedelta(
+            rng.integers(0, 18, n) * 31, unit='D'
+        ),
+        'TotalPremium': rng.gamma(2.0, 60.0, n),
+        'TotalClaims': np.where(claimed, rng.gamma(1.5, 4000.0, n), 0.0),
+        'HasClaim': claimed.astype(float),
+    })
+
+
+@pytest.mark.parametrize('dimension', ['Province', 'Gender'])
+def test_credibility_matches_buhlmann_straub(portfolio, dimension):
+    targeter = SegmentTargeter([dimension], min_rows=1, n_bootstrap=50)
+    segments = targeter.evaluate(portfolio).set_index(dimension)
+    expected = _buhlmann_straub(portfolio, dimension)
+
+    if dimension == 'Province':
+        assert (expected['Credibility'] > 0).all()
+    result = segments.loc[expected.index]
+    np.testing.assert_allclose(result['Credibility'], expected['Credibility'].astype(float),
+                               rtol=1e-9)
+    np.testing.assert_allclose(result['CredibleLossRatio'],
+                               expected['CredibleLossRatio'].astype(float), rtol=1e-9)
+    assert (result['LowerBound'] <= result['UpperBound']).all()
+
+
+def test_rank_skips_segments_without_credibility():
+    segments = pd.DataFrame({
+        'Segment': ['A', 'B', 'C', 'D'],
+        'Premium': [100.0, 200.0, 300.0, 400.0],
+        'Credibility': [0.5, 0.0, 0.8, 0.9],
+        'UpperBound': [0.4, 0.1, 0.2, 0.7],
+    })
+    segments.attrs['portfolio_loss_ratio'] = 0.5
+    ranked = SegmentTargeter().rank(segments)
+
+    assert list(ranked['Segment']) == ['C', 'A']
+    assert list(ranked['Rank']) == [1, 2]
+    np.testing.assert_allclose(ranked['PremiumReduction'], [0.6, 0.2])
+    assert list(SegmentTargeter(target_loss_ratio=0.8).rank(segments)['Segment']) == \
+        ['C', 'A', 'D']
+
+
+@pytest.mark.parametrize('name', ['ranked.csv', 'ranked.parquet'])
+def test_export_round_trip(tmp_path, name):
+    ranked = pd.DataFrame({'Rank': [1, 2], 'Segment': ['Province=Gauteng', 'Gender=Male'],
+                           'PremiumReduction': [0.25, 0.125]})
+    path = SegmentTargeter.export(ranked, tmp_path / 'out' / name)
+    read = pd.read_parquet(path) if path.suffix == '.parquet' else pd.read_csv(path)
+    pd.testing.assert_frame_equal(read, ranked)
+    assert [p.name for p in path.parent.iterdir()] == [name]
+
+
+def test_auto_columns_include_targeting_dimensions(config, tmp_path):
+    cfg = copy.deepcopy(config)
+    cfg.config['dvc'] = {'remote_path': str(tmp_path / 'dvc')}
+    header = list(SyntheticDataGenerator(10).frame().columns)
+    assert 'Bank' not in InsuranceDataLoader(cfg).required_columns(header)
+
+    cfg.config['targeting']['dimensions'] = ['Province', 'bank']
+    assert 'Bank' in InsuranceDataLoader(cfg).required_columns(header)
@@ -0,0 +1,37 @@
+import shutil
+
+import numpy as np
+
+from src.modeling.trainer import RiskModelTrainer
+
+
+def test_feature_matrix_rebuilds_over_an_incomplete_cache(model_config, model_frame):
+    trainer = RiskModelTrainer(model_config)
+    matrix_dir, _ = trainer.build_feature_matrix(model_frame)
+    # A cache directory without its encoder is rebuilt in place
+    (matrix_dir / 'encoder.json').unlink()
+    (matrix_dir.with_name(matrix_dir.name + '.tmp')).mkdir()
+    shutil.copy(matrix_dir / 'y_test.npy', matrix_dir.with_name(matrix_dir.name + '.tmp'))
+
+    rebuilt, encoder = trainer.build_feature_matrix(model_frame)
+    assert rebuilt == matrix_dir
+    assert (rebuilt / 'encoder.json').exists()
+    assert sorted(p.name for p in rebuilt.parent.iterdir()) == [rebuilt.name]
+
+
+def test_feature_matrix_keeps_claim_free_rows_of_the_parsed_file(raw_config, tmp_path):
+    from src.data_scripts.history import ClaimHistory
+    from src.data_scripts.loader import InsuranceDataLoader
+
+    loader = InsuranceDataLoader(raw_config)
+    df = loader.load_raw_data()
+    # The NA markers of the raw file turn zero claim amounts into NaN
+    assert df['TotalClaims'].isna().any() and not (df['TotalClaims'] == 0).any()
+    df = ClaimHistory.from_config(raw_config).transform(loader.create_derived_features(df))
+
+    raw_config.config['model']['save_dir'] = str(tmp_path / 'models')
+    matrix_dir, _ = RiskModelTrainer(raw_config).build_feature_matrix(df)
+    y = np.concatenate([np.load(matrix_dir / 'y_train.npy'), np.load(matrix_dir / 'y_test.npy')])
+    assert len(y) == len(df)
+    assert not np.isnan(y).any()
+    assert (y == 0).sum() == df['TotalClaims'].isna().sum()
@@ -0,0 +1,76 @@
+import json
+import os
+
+import pytest
+
+from src.data_scripts import versioning
+from src.data_scripts.versioning import DVCManager
+
+
+@pytest.fixture
+def dvc(tmp_path):
+    return DVCManager(str(tmp_path / 'remote'), block_size=1024, max_workers=2)
+
+
+def _write(path, data: bytes):
+    path.write_bytes(data)
+    # Backdate the file so its index entry is trusted straight away
+    past = path.stat().st_mtime_ns - 10 * versioning.RACY_WINDOW_NS
+    os.utime(path, ns=(past, past))
+
+
+def test_batch_writes_index_once(dvc, tmp_path, monkeypatch):
+    paths = [tmp_path / f"data-{i}.bin" for i in range(3)]
+    for i, path in enumerate(paths):
+        _write(path, bytes([i]) * 5000)
+    replaced = []
+    real_replace = os.replace
+    monkeypatch.setattr(versioning.os, 'replace',
+                        lambda src, dst: replaced.append(dst) or real_replace(src, dst))
+
+    with dvc.batch():
+        digests = [dvc.content_hash(path) for path in paths]
+        assert not dvc.index_path.exists()
+    assert replaced == [dvc.index_path]
+
+    with open(dvc.index_path) as f:
+        files = json.load(f)['files']
+    assert [files[str(p.resolve())]['hash'] for p in paths] == digests
+
+
+def test_appended_file_matches_full_rehash(dvc, tmp_path):
+    path = tmp_path / 'data.bin'
+    _write(path, os.urandom(4500))
+    dvc.content_hash(path)
+    with open(path, 'ab') as f:
+        f.write(os.urandom(3000))
+
+    fresh = DVCManager(str(tmp_path / 'other'), block_size=1024, max_workers=1)
+    assert dvc.content_hash(path) == fresh.content_hash(path)
+
+
+def test_add_and_checkout_round_trip(dvc, tmp_path):
+    path = tmp_path / 'data.bin'
+    _write(path, b'month 1\n' * 1000)
+    digest = dvc.add(path)
+    assert dvc.add(path) == digest
+
+    _write(path, b'month 2\n' * 1000)
+    dvc.checkout(digest, path)
+    assert path.read_bytes() == b'month 1\n' * 1000
+    assert dvc.content_hash(path) == digest
+
+
+def test_file_rewritten_in_place_is_hashed_in_full(dvc, tmp_path):
+    path = tmp_path / 'data.csv'
+    _write(path, b'a,b\n' + b'1,2\n' * 1500)
+    inode = path.stat().st_ino
+    dvc.content_hash(path)
+    # Truncate and rewrite the same inode with larger, different contents
+    with open(path, 'r+b') as f:
+        f.truncate(0)
+        f.write(b'a,b\n' + b'3,4\n' * 1500 + b'5,6\n' * 10)
+    assert path.stat().st_ino == inode
+
+    fresh = DVCManager(str(tmp_path / 'other'), block_size=1024, max_workers=1)
+    assert dvc.content_hash(path) == fresh.content_hash(path)
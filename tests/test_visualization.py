@@ -0,0 +1,24 @@
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from src.utils.visualization import Visualizer
+
+
+def test_figures_render_in_a_pool_started_from_a_stage_thread(tmp_path):
+    importance = pd.DataFrame({'feature': ['a', 'b', 'c'], 'importance': [3.0, 2.0, 1.0]})
+    paths = []
+
+    def stage():
+        with Visualizer(dpi=50, max_workers=2) as visualizer:
+            paths.append(visualizer.plot_feature_importance(importance, str(tmp_path), 'model'))
+
+    # Another thread is busy while the stage starts its render pool
+    busy = threading.Thread(target=lambda: sum(range(10_000_000)))
+    busy.start()
+    thread = threading.Thread(target=stage)
+    thread.start()
+    thread.join(timeout=120)
+    busy.join()
+    assert paths and Path(paths[0]).stat().st_size > 0